@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
@@ -17,6 +18,9 @@ from ..comment.flag.admin import views as flag_views
 from ..topic.admin import views as topic_views
 from ..user.admin import views as user_views
 from ..comment.flag.models import CommentFlag, Flag
+from ..category.models import Category
+from ..core.models import ForumStats, DailyStats
+from ..core import tasks
 from ..admin.forms import BasicConfigForm
 from ..comment.flag.admin.forms import CommentFlagForm
 from ..user.admin.forms import UserForm, UserProfileForm
@@ -170,6 +174,94 @@ class AdminViewTest(TestCase):
         response = self.client.get(reverse('spirit:admin:topic:index'))
         self.assertEqual(response.status_code, 200)
 
+    def test_dashboard(self):
+        """
+        Should show the maintained stats
+        """
+        ForumStats.reconcile()
+        utils.login(self)
+        comment = utils.create_comment(topic=self.topic)
+        comment.increase_likes_count()
+        utils.create_category()
+        response = self.client.get(reverse('spirit:admin:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['users_count'], User.objects.all().count())
+        self.assertEqual(response.context['topics_count'], 1)
+        self.assertEqual(response.context['comments_count'], 1)
+        self.assertEqual(response.context['likes_count'], 1)
+        self.assertEqual(response.context['category_count'], Category.objects.all().count() - 1)
+        self.assertEqual(response.context['daily_stats'][0].comment_count, 1)
+        self.assertEqual(response.context['daily_stats'][0].like_count, 1)
+
+    @override_settings(ST_FORUM_STATS_FLUSH_INTERVAL=60)
+    def test_stats_buffer(self):
+        """
+        Should buffer the counts and write them once per flush interval
+        """
+        ForumStats.reconcile()
+        DailyStats.objects.all().delete()
+        cache.clear()
+        ForumStats.update_counters(topic_count=1)
+        DailyStats.update_counters(comment_count=1)
+        self.assertEqual(ForumStats.objects.get().topic_count, 2)
+        self.assertEqual(DailyStats.objects.get().comment_count, 1)
+
+        with self.assertNumQueries(0):
+            ForumStats.update_counters(topic_count=1)
+            ForumStats.update_counters(topic_count=-2)
+            ForumStats.update_counters(topic_count=-1)
+            DailyStats.update_counters(comment_count=1)
+
+        self.assertEqual(ForumStats.objects.get().topic_count, 2)
+        self.assertEqual(ForumStats.get().topic_count, 0)
+        self.assertEqual(DailyStats.objects.get().comment_count, 1)
+        self.assertEqual(DailyStats.get_latest()[0].comment_count, 2)
+
+        tasks.flush_stats()
+        self.assertEqual(ForumStats.objects.get().topic_count, 0)
+        self.assertEqual(DailyStats.objects.get().comment_count, 2)
+
+        ForumStats.update_counters(like_count=1)
+        tasks.flush_stats()
+        self.assertEqual(ForumStats.get().like_count, 1)
+
+    def test_stats_buffer_lock(self):
+        """
+        Should not take the buffered counts twice on concurrent flushes
+        """
+        ForumStats.reconcile()
+        cache.clear()
+        cache.set('spirit:stats:forum:flushed', True)
+        ForumStats.update_counters(topic_count=2)
+
+        # Taken by a concurrent flush
+        cache.set('spirit:stats:forum:lock', True)
+        ForumStats.flush()
+        self.assertEqual(ForumStats.objects.get().topic_count, 1)
+
+        cache.delete('spirit:stats:forum:lock')
+        ForumStats.flush()
+        self.assertEqual(ForumStats.objects.get().topic_count, 3)
+        ForumStats.flush()
+        self.assertEqual(ForumStats.objects.get().topic_count, 3)
+
+    def test_dashboard_reconcile(self):
+        """
+        Should recount the stats
+        """
+        ForumStats.objects.all().update(topic_count=100, flag_count=0)
+        CommentFlag.objects.create(comment=utils.create_comment(topic=self.topic))
+        stats = ForumStats.reconcile()
+        self.assertEqual(stats.topic_count, 1)
+        self.assertEqual(stats.flag_count, 1)
+        self.assertFalse(stats.is_stale())
+
+        # The buffered counts are in the recount
+        cache.set('spirit:stats:forum:flushed', True)
+        ForumStats.update_counters(topic_count=1)
+        self.assertEqual(ForumStats.reconcile().topic_count, 1)
+        self.assertEqual(ForumStats.get().topic_count, 1)
+
     def test_topic_deleted(self):
         """
         Deleted topics
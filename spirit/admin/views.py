@@ -5,19 +5,12 @@ from __future__ import unicode_literals
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.utils.translation import ugettext as _
-from django.contrib.auth import get_user_model
 
 import spirit
-from ..category.models import Category
-from ..comment.flag.models import CommentFlag
-from ..comment.like.models import CommentLike
-from ..comment.models import Comment
-from ..topic.models import Topic
+from ..core.models import ForumStats, DailyStats
 from ..core.utils.decorators import administrator_required
 from .forms import BasicConfigForm
 
-User = get_user_model()
-
 
 @administrator_required
 def config_basic(request):
@@ -39,15 +32,17 @@ def config_basic(request):
 
 @administrator_required
 def dashboard(request):
-    # Strongly inaccurate counters below...
+    stats = ForumStats.get()
     context = {
         'version': spirit.__version__,
-        'category_count': Category.objects.all().count() - 1,  # - private
-        'topics_count': Topic.objects.all().count(),
-        'comments_count': Comment.objects.all().count(),
-        'users_count': User.objects.all().count(),
-        'flags_count': CommentFlag.objects.filter(is_closed=False).count(),
-        'likes_count': CommentLike.objects.all().count()
+        'category_count': stats.category_count,
+        'topics_count': stats.topic_count,
+        'comments_count': stats.comment_count,
+        'users_count': stats.user_count,
+        'flags_count': stats.flag_count,
+        'likes_count': stats.like_count,
+        'stats': stats,
+        'daily_stats': DailyStats.get_latest(days=30)
     }
 
     return render(request, 'spirit/admin/dashboard.html', context)
@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
@@ -75,6 +76,31 @@ class AdminViewTest(TestCase):
         response = self.client.get(reverse('spirit:admin:category:update', kwargs={"category_id": self.category.pk, }))
         self.assertEqual(response.status_code, 200)
 
+    @override_settings(ST_PAGE_CACHE_ENABLE=True)
+    def test_category_update_purge_topic_pages(self):
+        """
+        Removing a category should purge the cached pages of its topics
+        """
+        subcategory = utils.create_category(parent=self.category)
+        topic = utils.create_topic(subcategory)
+        urls = [
+            reverse('spirit:topic:detail', kwargs={'pk': t.pk, 'slug': t.slug})
+            for t in (self.topic, topic)]
+
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        utils.login(self)
+        form_data = {"parent": "", "title": "foo", "description": "",
+                     "is_closed": False, "is_removed": True, "is_global": True}
+        response = self.client.post(reverse('spirit:admin:category:update', kwargs={"category_id": self.category.pk, }),
+                                    form_data)
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 404)
+
 
 class AdminFormTest(TestCase):
 
@@ -9,12 +9,24 @@ from django.contrib import messages
 from django.utils.translation import ugettext as _
 
 from ...core.utils.decorators import administrator_required
+from ...core.utils import page_cache
 from ..models import Category
 from .forms import CategoryForm
 
 User = get_user_model()
 
 
+def _purge_category_pages(category):
+    # The pages of the topics and subcategories
+    # are tagged with the category key as well
+    keys = [page_cache.category_key(category.pk), page_cache.ACTIVE]
+
+    if category.parent_id:
+        keys.append(page_cache.category_key(category.parent_id))
+
+    page_cache.purge(*keys)
+
+
 @administrator_required
 def index(request):
     categories = Category.objects.filter(parent=None, is_private=False)
@@ -28,7 +40,8 @@ def create(request):
         form = CategoryForm(data=request.POST)
 
         if form.is_valid():
-            form.save()
+            category = form.save()
+            _purge_category_pages(category)
             return redirect(reverse("spirit:admin:category:index"))
     else:
         form = CategoryForm()
@@ -46,7 +59,8 @@ def update(request, category_id):
         form = CategoryForm(data=request.POST, instance=category)
 
         if form.is_valid():
-            form.save()
+            category = form.save()
+            _purge_category_pages(category)
             messages.info(request, _("The category has been updated!"))
             return redirect(reverse("spirit:admin:category:index"))
     else:
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.db.models import Count, Sum, Max
+
+
+def populate_counters(apps, schema_editor):
+    Category = apps.get_model("spirit_category", "Category")
+    Topic = apps.get_model("spirit_topic", "Topic")
+
+    counters = Topic.objects\
+        .filter(is_removed=False)\
+        .values('category_id')\
+        .annotate(topics=Count('pk'), comments=Sum('comment_count'), last_active=Max('last_active'))\
+        .order_by()
+    counters = {c['category_id']: c for c in counters}
+    categories = list(Category.objects.all())
+
+    for category in categories:
+        category.topic_count = 0
+        category.comment_count = 0
+        category.last_active = None
+
+    categories_by_pk = {category.pk: category for category in categories}
+
+    for category in categories:
+        counter = counters.get(category.pk)
+
+        if counter is None:
+            continue
+
+        tree = [category]
+
+        if category.parent_id:
+            tree.append(categories_by_pk[category.parent_id])
+
+        for c in tree:
+            c.topic_count += counter['topics']
+            c.comment_count += counter['comments'] or 0
+            c.last_active = max(c.last_active or counter['last_active'], counter['last_active'])
+
+    for category in categories:
+        Category.objects\
+            .filter(pk=category.pk)\
+            .update(
+                topic_count=category.topic_count,
+                comment_count=category.comment_count,
+                last_active=category.last_active)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_category', '0003_category_is_global'),
+        ('spirit_topic', '0005_auto_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='topic_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='topic count'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='comment count'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='last_active',
+            field=models.DateTimeField(null=True, verbose_name='last active', blank=True),
+        ),
+        migrations.RunPython(populate_counters),
+    ]
@@ -2,13 +2,19 @@
 
 from __future__ import unicode_literals
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils.translation import ugettext_lazy as _
 from django.core.urlresolvers import reverse
 from django.conf import settings
 
 from .managers import CategoryQuerySet
-from ..core.utils.models import AutoSlugField
+from ..topic.models import Topic
+from ..topic.utils import update_user_counters
+from ..core.models import ForumStats
+from ..core.utils.models import AutoSlugField, increments
+
+COUNTER_FIELDS = ('topic_count', 'comment_count', 'last_active')
 
 
 class Category(models.Model):
@@ -25,7 +31,10 @@ class Category(models.Model):
     is_removed = models.BooleanField(_("removed"), default=False)
     is_private = models.BooleanField(_("private"), default=False)
 
-    # topic_count = models.PositiveIntegerField(_("topic count"), default=0)
+    # Rolled up to the parent category, see update_counters()
+    topic_count = models.PositiveIntegerField(_("topic count"), default=0)
+    comment_count = models.PositiveIntegerField(_("comment count"), default=0)
+    last_active = models.DateTimeField(_("last active"), null=True, blank=True)
 
     objects = CategoryQuerySet.as_manager()
 
@@ -34,6 +43,34 @@ class Category(models.Model):
         verbose_name = _("category")
         verbose_name_plural = _("categories")
 
+    def save(self, *args, **kwargs):
+        is_new = self.pk is None
+
+        # The counters are maintained by update_counters(),
+        # saving a stale instance must not overwrite them
+        if not self._state.adding and 'update_fields' not in kwargs:
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+
+        with transaction.atomic():
+            if not is_new:
+                old_parent_id = Category.objects\
+                    .filter(pk=self.pk)\
+                    .values_list('parent_id', flat=True)[0]
+
+            super(Category, self).save(*args, **kwargs)
+
+            if not is_new and old_parent_id != self.parent_id:
+                self.move_counters(from_parent_id=old_parent_id)
+
+        if is_new:
+            ForumStats.update_counters(category_count=1)
+        else:
+            self.update_topics()
+
     def get_absolute_url(self):
         if self.pk == settings.ST_TOPIC_PRIVATE_CATEGORY_PK:
             return reverse('spirit:topic:private:index')
@@ -47,14 +84,95 @@ class Category(models.Model):
         else:
             return False
 
-
-# def topic_posted_handler(sender, topic, **kwargs):
-#    if topic.category.is_subcategory:
-#        category = Category.objects.filter(pk__in=[topic.category.pk, topic.category.parent.pk])
-#    else:
-#        category = Category.objects.filter(pk=topic.category.pk)
-#
-#    category.update(topic_count=F('topic_count') + 1)
-
-
-# topic_posted.connect(topic_posted_handler, dispatch_uid=__name__)
+    @property
+    def is_tree_removed(self):
+        return self.is_removed or (self.is_subcategory and self.parent.is_removed)
+
+    def update_topics(self):
+        """
+        Propagate the removed and private state to\
+        the topics of this category and its subcategories.\
+        Only the topics out of sync get updated, their\
+        authors counters are updated accordingly
+        """
+        categories = [self]
+
+        if not self.is_subcategory:
+            subcategories = list(Category.objects.filter(parent=self))
+
+            for subcategory in subcategories:
+                subcategory.parent = self
+
+            categories.extend(subcategories)
+
+        for category in categories:
+            is_category_removed = category.is_tree_removed
+            topics = Topic.objects\
+                .filter(category=category)\
+                .exclude(is_category_removed=is_category_removed, is_private=category.is_private)
+
+            # The topics out of sync were counted, unless
+            # they are about to be (and the other way around)
+            is_counted = not is_category_removed and not category.is_private
+            counted = topics.filter(is_removed=False) if is_counted else topics.counted()
+            counted_pks = list(counted.values_list('pk', flat=True))
+
+            if counted_pks:
+                update_user_counters(
+                    Topic.objects.filter(pk__in=counted_pks),
+                    sign=1 if is_counted else -1)
+
+            topics.update(is_category_removed=is_category_removed, is_private=category.is_private)
+
+    @classmethod
+    def update_counters(cls, category_id, topic_count=0, comment_count=0, last_active=None):
+        """
+        Add the counts (which may be negative) to\
+        the category and to its parent category
+        """
+        fields = increments(topic_count=topic_count, comment_count=comment_count)
+
+        if last_active is not None:
+            fields['last_active'] = last_active
+
+        if not fields:
+            return
+
+        # *category* is the reverse of the parent relation
+        cls.objects\
+            .filter(Q(pk=category_id) | Q(category=category_id))\
+            .update(**fields)
+
+    def move_counters(self, from_parent_id):
+        """
+        Move the counters of the subcategory\
+        from the old parent to the new one
+        """
+        counters = Category.objects\
+            .filter(pk=self.pk)\
+            .values('topic_count', 'comment_count', 'last_active')[0]
+
+        if from_parent_id is not None:
+            Category.objects\
+                .filter(pk=from_parent_id)\
+                .update(**increments(
+                    topic_count=-counters['topic_count'],
+                    comment_count=-counters['comment_count']))
+
+        if self.parent_id is None:
+            return
+
+        fields = increments(
+            topic_count=counters['topic_count'],
+            comment_count=counters['comment_count'])
+
+        if fields:
+            Category.objects\
+                .filter(pk=self.parent_id)\
+                .update(**fields)
+
+        if counters['last_active'] is not None:
+            Category.objects\
+                .filter(pk=self.parent_id)\
+                .filter(Q(last_active=None) | Q(last_active__lt=counters['last_active']))\
+                .update(last_active=counters['last_active'])
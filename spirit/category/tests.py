@@ -14,6 +14,7 @@ from djconfig.utils import override_djconfig
 
 from ..core.tests import utils
 from ..topic.models import Topic
+from ..user.models import UserProfile
 from ..comment.bookmark.models import CommentBookmark
 from .models import Category
 
@@ -157,3 +158,122 @@ class CategoryViewTest(TestCase):
         response = self.client.get(reverse('spirit:category:detail', kwargs={'pk': self.category_1.pk,
                                                                              'slug': self.category_1.slug}))
         self.assertEqual(list(response.context['topics']), [topic, ])
+
+
+class CategoryModelTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.category = utils.create_category()
+        self.subcategory = utils.create_subcategory(self.category)
+        self.topic = utils.create_topic(category=self.category)
+        self.topic_sub = utils.create_topic(category=self.subcategory)
+
+    def test_category_update_topics(self):
+        """
+        Should propagate the removed and private state to the topics
+        """
+        self.category.is_removed = True
+        self.category.is_private = True
+        self.category.save()
+        self.assertTrue(Topic.objects.get(pk=self.topic.pk).is_category_removed)
+        self.assertTrue(Topic.objects.get(pk=self.topic.pk).is_private)
+        self.assertTrue(Topic.objects.get(pk=self.topic_sub.pk).is_category_removed)
+        self.assertFalse(Topic.objects.get(pk=self.topic_sub.pk).is_private)
+        self.assertEqual(list(Topic.objects.unremoved()), [])
+
+        self.category.is_removed = False
+        self.category.save()
+        self.subcategory.is_removed = True
+        self.subcategory.save()
+        self.assertFalse(Topic.objects.get(pk=self.topic.pk).is_category_removed)
+        self.assertTrue(Topic.objects.get(pk=self.topic_sub.pk).is_category_removed)
+        self.assertEqual(list(Topic.objects.unremoved()), [self.topic])
+
+    def test_category_update_topics_user_counters(self):
+        """
+        Should update the authors counters when removing\
+        the category, the same as the visible topics
+        """
+        user = utils.create_user()
+        topic = utils.create_topic(category=self.subcategory, user=user)
+        utils.create_comment(topic=topic, user=user)
+        utils.create_topic(category=self.subcategory, user=user, is_removed=True)
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 1)
+
+        self.category.is_removed = True
+        self.category.save()
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 0)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 0)
+        self.assertFalse(Topic.objects.get(pk=topic.pk).is_counted)
+
+        # Already uncounted
+        self.subcategory.is_removed = True
+        self.subcategory.save()
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 0)
+
+        self.category.is_removed = False
+        self.category.save()
+        self.subcategory.is_removed = False
+        self.subcategory.save()
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 1)
+
+    def test_category_counters(self):
+        """
+        Should count the topics and comments of the category and its subcategories
+        """
+        category = Category.objects.get(pk=self.category.pk)
+        subcategory = Category.objects.get(pk=self.subcategory.pk)
+        self.assertEqual(category.topic_count, 2)
+        self.assertEqual(subcategory.topic_count, 1)
+        self.assertIsNotNone(category.last_active)
+
+        self.topic_sub.increase_comment_count(count=2)
+        self.topic_sub.decrease_comment_count()
+        self.assertEqual(Category.objects.get(pk=self.category.pk).comment_count, 1)
+        self.assertEqual(Category.objects.get(pk=self.subcategory.pk).comment_count, 1)
+
+        # stale instance
+        self.category.title = "foo"
+        self.category.save()
+        self.assertEqual(Category.objects.get(pk=self.category.pk).topic_count, 2)
+
+    def test_category_counters_move_subcategory(self):
+        """
+        Should move the subcategory counters to the new parent
+        """
+        category = utils.create_category()
+        self.topic_sub.increase_comment_count(count=3)
+        subcategory = Category.objects.get(pk=self.subcategory.pk)
+        subcategory.parent = category
+        subcategory.save()
+        self.assertEqual(Category.objects.get(pk=self.category.pk).topic_count, 1)
+        self.assertEqual(Category.objects.get(pk=self.category.pk).comment_count, 0)
+        self.assertEqual(Category.objects.get(pk=category.pk).topic_count, 1)
+        self.assertEqual(Category.objects.get(pk=category.pk).comment_count, 3)
+        self.assertIsNotNone(Category.objects.get(pk=category.pk).last_active)
+        self.assertEqual(Category.objects.get(pk=self.subcategory.pk).topic_count, 1)
+
+        # Same parent
+        subcategory.title = "foo"
+        subcategory.save()
+        self.assertEqual(Category.objects.get(pk=category.pk).topic_count, 1)
+
+    def test_category_counters_move(self):
+        """
+        Should move the topic counters to the new category
+        """
+        category = utils.create_category()
+        self.topic_sub.increase_comment_count(count=3)
+        topic = Topic.objects.get(pk=self.topic_sub.pk)
+        topic.category = category
+        topic.save()
+        topic.move_counters(from_category_id=self.subcategory.pk)
+        self.assertEqual(Category.objects.get(pk=self.subcategory.pk).topic_count, 0)
+        self.assertEqual(Category.objects.get(pk=self.subcategory.pk).comment_count, 0)
+        self.assertEqual(Category.objects.get(pk=self.category.pk).topic_count, 1)
+        self.assertEqual(Category.objects.get(pk=self.category.pk).comment_count, 0)
+        self.assertEqual(Category.objects.get(pk=category.pk).topic_count, 1)
+        self.assertEqual(Category.objects.get(pk=category.pk).comment_count, 3)
@@ -9,10 +9,12 @@ from django.http import HttpResponsePermanentRedirect
 from djconfig import config
 
 from ..core.utils.paginator import yt_paginate
+from ..core.utils.page_cache import anonymous_page_cache, category_key, tag
 from ..topic.models import Topic
 from .models import Category
 
 
+@anonymous_page_cache(category_key('{pk}'))
 def detail(request, pk, slug):
     category = get_object_or_404(Category.objects.visible(),
                                  pk=pk)
@@ -43,7 +45,13 @@ def detail(request, pk, slug):
         'topics': topics
     }
 
-    return render(request, 'spirit/category/detail.html', context)
+    response = render(request, 'spirit/category/detail.html', context)
+
+    if category.parent_id:
+        # Removing the parent hides the subcategory
+        tag(response, category_key(category.parent_id))
+
+    return response
 
 
 class IndexView(ListView):
@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 
 from django import forms
 
+from ....core.models import ForumStats
 from ..models import CommentFlag
 
 
@@ -19,4 +20,9 @@ class CommentFlagForm(forms.ModelForm):
 
     def save(self, commit=True):
         self.instance.moderator = self.user
-        return super(CommentFlagForm, self).save(commit)
\ No newline at end of file
+        comment_flag = super(CommentFlagForm, self).save(commit)
+
+        if 'is_closed' in self.changed_data:
+            ForumStats.update_counters(flag_count=-1 if comment_flag.is_closed else 1)
+
+        return comment_flag
\ No newline at end of file
@@ -7,6 +7,7 @@ from django.utils.translation import ugettext_lazy as _
 from django.db import IntegrityError
 from django.utils import timezone
 
+from ...core.models import ForumStats
 from .models import Flag, CommentFlag
 
 
@@ -39,9 +40,13 @@ class FlagForm(forms.ModelForm):
             self.instance.comment = self.comment
 
             try:
-                CommentFlag.objects.update_or_create(comment=self.comment,
-                                                     defaults={'date': timezone.now(), })
+                comment_flag, created = CommentFlag.objects.update_or_create(
+                    comment=self.comment,
+                    defaults={'date': timezone.now(), })
             except IntegrityError:
                 pass
+            else:
+                if created:
+                    ForumStats.update_counters(flag_count=1)
 
         return super(FlagForm, self).save(commit)
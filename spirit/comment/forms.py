@@ -9,9 +9,10 @@ from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 
 from ..core import utils
-from ..core.utils.markdown import Markdown
+from ..core.utils.markdown import get_markdown
 from .models import Comment
 from ..topic.models import Topic
+from ..topic.utils import update_comment_counters
 
 
 class CommentForm(forms.ModelForm):
@@ -28,7 +29,7 @@ class CommentForm(forms.ModelForm):
         self.fields['comment'].widget.attrs['placeholder'] = _("Write comment...")
 
     def _get_comment_html(self):
-        markdown = Markdown(escape=True, hard_wrap=True)
+        markdown = get_markdown()
         comment_html = markdown.render(self.cleaned_data['comment'])
         self.mentions = markdown.get_mentions()
         return comment_html
@@ -48,6 +49,7 @@ class CommentMoveForm(forms.Form):
 
     def __init__(self, topic, *args, **kwargs):
         super(CommentMoveForm, self).__init__(*args, **kwargs)
+        self.topic = topic
         self.fields['comments'] = forms.ModelMultipleChoiceField(queryset=Comment.objects.filter(topic=topic),
                                                                  widget=forms.CheckboxSelectMultiple)
 
@@ -55,6 +57,11 @@ class CommentMoveForm(forms.Form):
         comments = self.cleaned_data['comments']
         comments_list = list(comments)
         topic = self.cleaned_data['topic']
+
+        # Moved from a counted topic to an uncounted one, or the other way around
+        if self.topic.is_counted != topic.is_counted:
+            update_comment_counters(comments, sign=1 if topic.is_counted else -1)
+
         comments.update(topic=topic)
 
         # Update topic in comment instance
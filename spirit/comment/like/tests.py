@@ -78,6 +78,21 @@ class LikeViewTest(TestCase):
         self.assertRedirects(response, self.comment.get_absolute_url(), status_code=302, target_status_code=302)
         self.assertEqual(len(CommentLike.objects.all()), 0)
 
+    def test_like_purge_topic_pages(self):
+        """
+        Should purge the cached pages of the topic on like and unlike
+        """
+        key = 'spirit:page:version:topic:%d' % self.topic.pk
+        cache.set(key, 'foo')
+        utils.login(self)
+        self.client.post(reverse('spirit:comment:like:create', kwargs={'comment_id': self.comment.pk, }))
+        self.assertNotEqual(cache.get(key), 'foo')
+
+        cache.set(key, 'foo')
+        like = CommentLike.objects.get(user=self.user, comment=self.comment)
+        self.client.post(reverse('spirit:comment:like:delete', kwargs={'pk': like.pk, }))
+        self.assertNotEqual(cache.get(key), 'foo')
+
     def test_like_delete_next(self):
         """
         delete like using next
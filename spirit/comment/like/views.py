@@ -7,6 +7,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.core.urlresolvers import reverse
 
 from ...core.utils import json_response
+from ...core.utils.page_cache import purge, topic_key
 from ..models import Comment
 from .models import CommentLike
 from .forms import LikeForm
@@ -22,6 +23,7 @@ def create(request, comment_id):
         if form.is_valid():
             like = form.save()
             like.comment.increase_likes_count()
+            purge(topic_key(comment.topic_id))
 
             if request.is_ajax():
                 return json_response({'url_delete': like.get_delete_url(), })
@@ -45,6 +47,7 @@ def delete(request, pk):
     if request.method == 'POST':
         like.delete()
         like.comment.decrease_likes_count()
+        purge(topic_key(like.comment.topic_id))
 
         if request.is_ajax():
             url = reverse('spirit:comment:like:create', kwargs={'comment_id': like.comment.pk, })
@@ -11,31 +11,28 @@ from .like.models import CommentLike
 
 class CommentQuerySet(models.QuerySet):
 
-    def filter(self, *args, **kwargs):
-        # TODO: find a better way
-        return super(CommentQuerySet, self)\
-            .filter(*args, **kwargs)\
-            .select_related('user__st')
-
     def unremoved(self):
         # TODO: remove action
-        return self.filter(Q(topic__category__parent=None) | Q(topic__category__parent__is_removed=False),
-                           topic__category__is_removed=False,
+        return self.filter(topic__is_category_removed=False,
                            topic__is_removed=False,
                            is_removed=False,
                            action=0)
 
     def public(self):
-        return self.filter(topic__category__is_private=False)
+        return self.filter(topic__is_private=False)
 
     def visible(self):
         return self.unremoved().public()
 
+    def counted(self):
+        # Counted in the user profile, see Comment.is_counted
+        return self.visible()
+
     def for_topic(self, topic):
         return self.filter(topic=topic)
 
     def _access(self, user):
-        return self.filter(Q(topic__category__is_private=False) | Q(topic__topics_private__user=user))
+        return self.filter(Q(topic__is_private=False) | Q(topic__topics_private__user=user))
 
     def with_likes(self, user):
         if not user.is_authenticated():
@@ -45,6 +42,13 @@ class CommentQuerySet(models.QuerySet):
         prefetch = Prefetch("comment_likes", queryset=user_likes, to_attr='likes')
         return self.prefetch_related(prefetch)
 
+    def for_listing(self):
+        # Rendering a comment requires its author and profile
+        return self.select_related('user__st')
+
+    def for_count(self):
+        return self.select_related(None).order_by()
+
     def for_access(self, user):
         return self.unremoved()._access(user=user)
 
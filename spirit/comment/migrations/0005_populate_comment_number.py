@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# Same as Comment.renumber(), by (date, pk) within the topic.
+# These are set based, a statement per table rather than per comment
+WINDOW_SQL = """
+    UPDATE {comment} SET {number} = numbered.row_number
+    FROM (
+        SELECT {pk}, ROW_NUMBER() OVER (PARTITION BY {topic} ORDER BY {date}, {pk}) AS row_number
+        FROM {comment}
+    ) AS numbered
+    WHERE {comment}.{pk} = numbered.{pk}
+"""
+
+MYSQL_WINDOW_SQL = """
+    UPDATE {comment} JOIN (
+        SELECT {pk}, ROW_NUMBER() OVER (PARTITION BY {topic} ORDER BY {date}, {pk}) AS row_number
+        FROM {comment}
+    ) AS numbered ON {comment}.{pk} = numbered.{pk}
+    SET {comment}.{number} = numbered.row_number
+"""
+
+CORRELATED_SQL = """
+    UPDATE {comment} SET {number} = (
+        SELECT COUNT(*) FROM {comment} AS previous
+        WHERE previous.{topic} = {comment}.{topic}
+        AND (previous.{date} < {comment}.{date}
+             OR (previous.{date} = {comment}.{date} AND previous.{pk} <= {comment}.{pk}))
+    )
+"""
+
+LAST_NUMBER_SQL = """
+    UPDATE {topic_table} SET {last_number} = (
+        SELECT COUNT(*) FROM {comment}
+        WHERE {comment}.{topic} = {topic_table}.{topic_pk}
+    )
+"""
+
+
+def populate_numbers(apps, schema_editor):
+    Comment = apps.get_model("spirit_comment", "Comment")
+    Topic = apps.get_model("spirit_topic", "Topic")
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    names = {
+        'comment': quote(Comment._meta.db_table),
+        'pk': quote(Comment._meta.pk.column),
+        'topic': quote(Comment._meta.get_field('topic').column),
+        'date': quote(Comment._meta.get_field('date').column),
+        'number': quote(Comment._meta.get_field('number').column),
+        'topic_table': quote(Topic._meta.db_table),
+        'topic_pk': quote(Topic._meta.pk.column),
+        'last_number': quote(Topic._meta.get_field('last_comment_number').column),
+    }
+
+    # The correlated subquery is portable, but MySQL
+    # can't select from the table being updated
+    if connection.vendor == 'postgresql':
+        numbers_sql = WINDOW_SQL
+    elif connection.vendor == 'mysql':
+        numbers_sql = MYSQL_WINDOW_SQL
+    else:
+        numbers_sql = CORRELATED_SQL
+
+    with connection.cursor() as cursor:
+        cursor.execute(numbers_sql.format(**names))
+        cursor.execute(LAST_NUMBER_SQL.format(**names))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_comment', '0004_auto_indexes'),
+        ('spirit_topic', '0003_topic_last_comment_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_numbers),
+    ]
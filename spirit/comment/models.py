@@ -7,9 +7,14 @@ from django.utils.translation import ugettext_lazy as _
 from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.db.models import F
+from django.db import transaction
 from django.utils import timezone
 
 from .managers import CommentQuerySet
+from ..topic.models import Topic
+from ..topic.unread.models import TopicUnread
+from ..user.models import UserProfile
+from ..core.models import ForumStats, DailyStats
 
 
 COMMENT_MAX_LEN = 3000  # changing this needs migration
@@ -41,17 +46,49 @@ class Comment(models.Model):
 
     modified_count = models.PositiveIntegerField(_("modified count"), default=0)
     likes_count = models.PositiveIntegerField(_("likes count"), default=0)
+    # Position within the topic, 0 means unknown
+    number = models.PositiveIntegerField(_("number"), default=0)
 
     objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['-date', '-pk']
+        index_together = [('topic', 'date')]
         verbose_name = _("comment")
         verbose_name_plural = _("comments")
 
+    def save(self, *args, **kwargs):
+        if self.pk is not None or self.number:
+            return super(Comment, self).save(*args, **kwargs)
+
+        # The topic row lock serializes the numbers
+        with transaction.atomic():
+            Topic.objects\
+                .filter(pk=self.topic_id)\
+                .update(last_comment_number=F('last_comment_number') + 1)
+            self.number = Topic.objects\
+                .filter(pk=self.topic_id)\
+                .values_list('last_comment_number', flat=True)[0]
+            super(Comment, self).save(*args, **kwargs)
+
+            if self.is_counted:
+                UserProfile.update_counters(self.user_id, comment_count=1)
+
+        ForumStats.update_counters(comment_count=1)
+
+        if self.action == COMMENT:
+            DailyStats.update_counters(comment_count=1)
+
     def get_absolute_url(self):
         return reverse('spirit:comment:find', kwargs={'pk': str(self.id), })
 
+    @property
+    def is_counted(self):
+        # Counted in the user profile
+        return (self.action == COMMENT and
+                not self.is_removed and
+                self.topic.is_counted)
+
     @property
     def like(self):
         # *likes* is dynamically created by manager.with_likes()
@@ -70,11 +107,43 @@ class Comment(models.Model):
         Comment.objects\
             .filter(pk=self.pk)\
             .update(likes_count=F('likes_count') + 1)
+        UserProfile.update_counters(self.user_id, received_likes_count=1)
+        ForumStats.update_counters(like_count=1)
+        DailyStats.update_counters(like_count=1)
 
     def decrease_likes_count(self):
         Comment.objects\
             .filter(pk=self.pk)\
             .update(likes_count=F('likes_count') - 1)
+        UserProfile.update_counters(self.user_id, received_likes_count=-1)
+        ForumStats.update_counters(like_count=-1)
+
+    @classmethod
+    def renumber(cls, topic):
+        # Required when comments get moved in or out
+        with transaction.atomic():
+            pks = list(
+                cls.objects
+                .filter(topic=topic)
+                .order_by('date', 'pk')
+                .values_list('pk', 'number')
+            )
+
+            count = 0
+
+            for count, (pk, number) in enumerate(pks, start=1):
+                if number != count:
+                    cls.objects\
+                        .filter(pk=pk)\
+                        .update(number=count)
+
+            Topic.objects\
+                .filter(pk=topic.pk)\
+                .update(last_comment_number=count)
+            # The read cursors can't be ahead of the last comment
+            TopicUnread.objects\
+                .filter(topic=topic, comment_number__gt=count)\
+                .update(comment_number=count)
 
     @classmethod
     def create_moderation_action(cls, user, topic, action):
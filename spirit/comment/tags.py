@@ -7,6 +7,7 @@ from django.utils.translation import ugettext as _
 from ..core.tags.registry import register
 from .forms import CommentForm
 from .models import MOVED, CLOSED, UNCLOSED, PINNED, UNPINNED
+from .utils import render_fragments
 
 
 @register.inclusion_tag('spirit/comment/_form.html')
@@ -29,3 +30,9 @@ def get_comment_action_text(action):
         return _("This topic has been unpinned")
     else:
         return _("Unknown topic moderation action")
+
+
+@register.assignment_tag()
+def get_comment_fragments(comments):
+    # Per viewer parts (likes, actions) are left out
+    return render_fragments(comments)
@@ -5,6 +5,7 @@ from __future__ import unicode_literals
 import os
 import json
 import shutil
+import datetime
 
 from django.test import TestCase, RequestFactory
 from django.core.cache import cache
@@ -20,14 +21,16 @@ from django.utils.six import BytesIO
 from ..core.tests import utils
 from .models import Comment
 from .forms import CommentForm, CommentMoveForm, CommentImageForm
-from .tags import render_comments_form
+from .tags import render_comments_form, get_comment_fragments
 from ..core.utils import markdown
 from .views import delete as comment_delete
 from ..topic.models import Topic
 from ..category.models import Category
 from ..user.models import UserProfile
 from .history.models import CommentHistory
-from .utils import comment_posted
+from .utils import comment_posted, comment_fan_out
+from ..core import tasks
+from ..core.models import Job
 from ..topic.notification.models import TopicNotification, MENTION
 from ..topic.unread.models import TopicUnread
 
@@ -108,7 +111,8 @@ class CommentViewTest(TestCase):
         should not be able to create a comment
         """
         # removed category
-        Category.objects.all().update(is_removed=True)
+        self.category.is_removed = True
+        self.category.save()
 
         utils.login(self)
         form_data = {'comment': 'foobar', }
@@ -117,7 +121,8 @@ class CommentViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
         # removed subcategory
-        Category.objects.all().update(is_removed=False)
+        self.category.is_removed = False
+        self.category.save()
         subcategory = utils.create_category(parent=self.category, is_removed=True)
         topic2 = utils.create_topic(subcategory)
 
@@ -128,7 +133,6 @@ class CommentViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
         # removed topic
-        Category.objects.all().update(is_removed=False)
         Topic.objects.all().update(is_removed=True)
 
         utils.login(self)
@@ -325,6 +329,51 @@ class CommentViewTest(TestCase):
         self.assertEqual(Comment.objects.filter(topic=self.topic.pk).count(), 0)
         self.assertEqual(Topic.objects.get(pk=self.topic.pk).comment_count, 0)
 
+    def test_comment_move_user_counters(self):
+        """
+        Should update the authors counters when moving\
+        between a counted and an uncounted topic
+        """
+        utils.login(self)
+        self.user.st.is_moderator = True
+        self.user.save()
+        user = utils.create_user()
+        comment = utils.create_comment(user=user, topic=self.topic)
+        utils.create_comment(user=user, topic=self.topic, is_removed=True)
+        removed_topic = utils.create_topic(category=self.category, is_removed=True)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 1)
+
+        form_data = {'topic': removed_topic.pk, 'comments': [comment.pk, ], }
+        self.client.post(reverse('spirit:comment:move', kwargs={'topic_id': self.topic.pk, }),
+                         form_data)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 0)
+
+        form_data = {'topic': self.topic.pk, 'comments': [comment.pk, ], }
+        self.client.post(reverse('spirit:comment:move', kwargs={'topic_id': removed_topic.pk, }),
+                         form_data)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 1)
+
+    def test_comment_move_renumber(self):
+        """
+        Should renumber the comments of both topics
+        """
+        utils.login(self)
+        self.user.st.is_moderator = True
+        self.user.save()
+        comment = utils.create_comment(user=self.user, topic=self.topic)
+        comment2 = utils.create_comment(user=self.user, topic=self.topic)
+        to_topic = utils.create_topic(category=self.category)
+        to_comment = utils.create_comment(user=self.user, topic=to_topic)
+        form_data = {'topic': to_topic.pk,
+                     'comments': [comment.pk, ], }
+        self.client.post(reverse('spirit:comment:move', kwargs={'topic_id': self.topic.pk, }),
+                         form_data)
+        self.assertEqual(Comment.objects.get(pk=comment2.pk).number, 1)
+        self.assertEqual(Comment.objects.get(pk=comment.pk).number, 1)
+        self.assertEqual(Comment.objects.get(pk=to_comment.pk).number, 2)
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).last_comment_number, 1)
+        self.assertEqual(Topic.objects.get(pk=to_topic.pk).last_comment_number, 2)
+
     def test_comment_find(self):
         """
         comment absolute and lazy url
@@ -334,6 +383,17 @@ class CommentViewTest(TestCase):
         expected_url = comment.topic.get_absolute_url() + "#c%d" % comment.pk
         self.assertRedirects(response, expected_url, status_code=302)
 
+    def test_comment_find_not_numbered(self):
+        """
+        Should find the position of comments missing a number
+        """
+        utils.create_comment(user=self.user, topic=self.topic)
+        comment = utils.create_comment(user=self.user, topic=self.topic)
+        Comment.objects.all().update(number=0)
+        response = self.client.get(reverse('spirit:comment:find', kwargs={'pk': comment.pk, }))
+        expected_url = comment.topic.get_absolute_url() + "#c2"
+        self.assertRedirects(response, expected_url, status_code=302)
+
     def test_comment_image_upload(self):
         """
         comment image upload
@@ -405,6 +465,39 @@ class CommentModelsTest(TestCase):
         comment.decrease_likes_count()
         self.assertEqual(Comment.objects.get(pk=comment.pk).likes_count, 0)
 
+    def test_comment_number(self):
+        """
+        Should number the comments of each topic
+        """
+        comment = utils.create_comment(topic=self.topic)
+        comment2 = utils.create_comment(topic=self.topic)
+        action = Comment.create_moderation_action(user=self.user, topic=self.topic, action=1)
+        other = utils.create_comment(topic=utils.create_topic(self.category))
+        self.assertEqual([comment.number, comment2.number, action.number, other.number], [1, 2, 3, 1])
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).last_comment_number, 3)
+
+        # Edits keep the number
+        comment.comment = 'foo'
+        comment.save()
+        self.assertEqual(Comment.objects.get(pk=comment.pk).number, 1)
+
+    def test_comment_renumber(self):
+        """
+        Should number the comments by date
+        """
+        comment = utils.create_comment(topic=self.topic)
+        comment2 = utils.create_comment(topic=self.topic)
+        Comment.objects.filter(pk=comment.pk).update(date=comment2.date + datetime.timedelta(seconds=1))
+        Comment.renumber(topic=self.topic)
+        self.assertEqual(Comment.objects.get(pk=comment2.pk).number, 1)
+        self.assertEqual(Comment.objects.get(pk=comment.pk).number, 2)
+
+        # The read cursors follow the comments moved out
+        TopicUnread.objects.create(user=self.user, topic=self.topic, comment_number=2)
+        Comment.objects.filter(pk=comment.pk).update(topic=utils.create_topic(self.category))
+        Comment.renumber(topic=self.topic)
+        self.assertEqual(TopicUnread.objects.get(user=self.user, topic=self.topic).comment_number, 1)
+
     def test_comment_create_moderation_action(self):
         """
         Create comment that tells what moderation action was made
@@ -437,6 +530,41 @@ class CommentTemplateTagTests(TestCase):
         self.assertIsInstance(context['form'], CommentForm)
         self.assertEqual(context['topic_id'], self.topic.pk)
 
+    def test_get_comment_fragments(self):
+        """
+        should render the comments and cache the result
+        """
+        comments = Comment.objects.filter(topic=self.topic).order_by('date')
+        out = Template(
+            "{% load spirit_tags %}"
+            "{% get_comment_fragments comments as fragments %}"
+            "{% for c, fragment in fragments %}{{ fragment.text }}{% endfor %}"
+        ).render(Context({'comments': comments, }))
+        self.assertEqual(out.count('comment_foobar'), 3)
+
+        fragments = get_comment_fragments(comments)
+        self.assertEqual([c for c, f in fragments], list(comments))
+        comment, fragment = fragments[0]
+        self.assertIn(comment.comment_html, fragment['text'])
+        self.assertIn(comment.user.username, fragment['info'])
+
+        # cached
+        Comment.objects.filter(pk=comment.pk).update(comment_html='edited')
+        comment, fragment = get_comment_fragments(comments)[0]
+        self.assertNotIn('edited', fragment['text'])
+
+        # edited
+        Comment.objects.filter(pk=comment.pk).update(modified_count=1)
+        comments = Comment.objects.filter(topic=self.topic).order_by('date')
+        comment, fragment = get_comment_fragments(comments)[0]
+        self.assertIn('edited', fragment['text'])
+
+        # author renamed
+        User.objects.filter(pk=comment.user.pk).update(username='renamed')
+        comments = Comment.objects.filter(topic=self.topic).order_by('date')
+        comment, fragment = get_comment_fragments(comments)[0]
+        self.assertIn('renamed', fragment['info'])
+
     def test_get_action_text(self):
         """
         should display action
@@ -582,8 +710,8 @@ class CommentUtilsTest(TestCase):
         # Should mark the topic as unread
         user_unread = utils.create_user()
         topic = utils.create_topic(self.category)
-        topic_unread_creator = TopicUnread.objects.create(user=user, topic=topic, is_read=True)
-        topic_unread_subscriber = TopicUnread.objects.create(user=user_unread, topic=topic, is_read=True)
+        topic_unread_creator = TopicUnread.objects.create(user=user, topic=topic)
+        topic_unread_subscriber = TopicUnread.objects.create(user=user_unread, topic=topic)
         comment = utils.create_comment(user=user, topic=topic)
         comment_posted(comment=comment, mentions=None)
         self.assertTrue(TopicUnread.objects.get(pk=topic_unread_creator.pk).is_read)
@@ -595,4 +723,60 @@ class CommentUtilsTest(TestCase):
         comment_posted(comment=comment, mentions=None)
         self.assertEqual(Topic.objects.get(pk=topic.pk).comment_count, 1)
         comment_posted(comment=comment, mentions=None)
-        self.assertEqual(Topic.objects.get(pk=topic.pk).comment_count, 2)
\ No newline at end of file
+        self.assertEqual(Topic.objects.get(pk=topic.pk).comment_count, 2)
+
+    @override_settings(ST_COMMENT_FAN_OUT_DEFERRED=True)
+    def test_comment_posted_deferred(self):
+        """
+        Should leave a job for later and do nothing else
+        """
+        comment = utils.create_comment(user=self.user, topic=self.topic)
+        comment_posted(comment=comment, mentions=None)
+        self.assertEqual(Job.objects.filter(task=tasks.COMMENT_FAN_OUT, key=str(self.topic.pk)).count(), 1)
+        self.assertEqual(len(TopicNotification.objects.all()), 0)
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).comment_count, 0)
+
+        tasks.run_jobs()
+        self.assertEqual(len(Job.objects.all()), 0)
+        self.assertEqual(len(TopicNotification.objects.all()), 1)
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).comment_count, 1)
+
+    @override_settings(ST_COMMENT_FAN_OUT_DEFERRED=True)
+    def test_comment_fan_out_coalesce(self):
+        """
+        Should process a burst of comments at once
+        """
+        subscriber = utils.create_user()
+        TopicNotification.objects.create(user=subscriber, topic=self.topic,
+                                         comment=utils.create_comment(topic=self.topic),
+                                         is_active=True, is_read=True)
+        TopicUnread.objects.create(user=self.user, topic=self.topic,
+                                   comment_number=Topic.objects.get(pk=self.topic.pk).last_comment_number)
+        mentioned = utils.create_user()
+        comment = utils.create_comment(user=self.user, topic=self.topic)
+        comment2 = utils.create_comment(topic=self.topic)
+        comment_posted(comment=comment, mentions={mentioned.username: mentioned, })
+        comment_posted(comment=comment2, mentions=None)
+
+        comment_fan_out(topic_id=self.topic.pk)
+        self.assertEqual(len(Job.objects.all()), 0)
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).comment_count, 2)
+        self.assertEqual(TopicNotification.objects.get(user=subscriber).comment, comment)
+        self.assertEqual(TopicNotification.objects.get(user=mentioned).action, MENTION)
+
+        # The author of the first comment has missed the second one
+        self.assertFalse(TopicUnread.objects.get(user=self.user, topic=self.topic).is_read)
+
+    def test_comment_fan_out_deleted_comment(self):
+        """
+        Should skip comments removed before the job runs
+        """
+        comment = utils.create_comment(user=self.user, topic=self.topic)
+
+        with override_settings(ST_COMMENT_FAN_OUT_DEFERRED=True):
+            comment_posted(comment=comment, mentions=None)
+
+        Comment.objects.filter(pk=comment.pk).delete()
+        comment_fan_out(topic_id=self.topic.pk)
+        self.assertEqual(len(Job.objects.all()), 0)
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).comment_count, 0)
@@ -2,14 +2,159 @@
 
 from __future__ import unicode_literals
 
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils import translation
+
+from ..core import tasks
+from ..core.models import Job
 from ..topic.notification.models import TopicNotification, UNDEFINED
+from ..topic.notification.utils import deferred_bumps
 from ..topic.unread.models import TopicUnread
+from ..topic.utils import purge_topic_pages
+from .models import Comment
+
+User = get_user_model()
+
+FRAGMENTS = ('head', 'info', 'text')
+
+
+def pages_cache_key(topic):
+    return 'spirit:comment:pages:%d' % topic.pk
 
 
 def comment_posted(comment, mentions):
     # Todo test detail views
-    TopicNotification.create_maybe(user=comment.user, comment=comment, action=UNDEFINED)
-    TopicNotification.notify_new_comment(comment=comment)
-    TopicNotification.notify_new_mentions(comment=comment, mentions=mentions)
-    TopicUnread.unread_new_comment(comment=comment)
-    comment.topic.increase_comment_count()
\ No newline at end of file
+    mentions = mentions or {}
+    Job.enqueue(
+        task=tasks.COMMENT_FAN_OUT,
+        key=comment.topic_id,
+        comment_id=comment.pk,
+        mentions=[user.pk for user in mentions.values()]
+    )
+
+    purge_topic_pages(comment.topic)
+
+    # Otherwise spiritrunjobs will take care of it
+    if not settings.ST_COMMENT_FAN_OUT_DEFERRED:
+        tasks.comment_fan_out.delay(topic_id=comment.topic_id)
+
+
+def comment_fan_out(topic_id):
+    """
+    Apply the pending comment_posted jobs of a topic.
+
+    Bursts of replies are processed together,\
+    so the topic and unread rows are updated once
+    """
+    # The versions change once the data is committed
+    with deferred_bumps(), transaction.atomic():
+        jobs = list(
+            Job.objects
+            .select_for_update()
+            .for_task(tasks.COMMENT_FAN_OUT)
+            .filter(key=str(topic_id))
+        )
+
+        if not jobs:
+            return
+
+        jobs_data = [job.get_data() for job in jobs]
+        comments = Comment.objects\
+            .select_related('topic', 'user')\
+            .in_bulk([data['comment_id'] for data in jobs_data])
+        users = User.objects.in_bulk([pk for data in jobs_data for pk in data['mentions']])
+        posted = []
+
+        for data in jobs_data:
+            comment = comments.get(data['comment_id'])
+
+            # Deleted in the meantime
+            if comment is None:
+                continue
+
+            mentions = {
+                users[pk].username: users[pk]
+                for pk in data['mentions']
+                if pk in users
+            }
+            TopicNotification.create_maybe(user=comment.user, comment=comment, action=UNDEFINED)
+            TopicNotification.notify_new_comment(comment=comment)
+            TopicNotification.notify_new_mentions(comment=comment, mentions=mentions)
+            posted.append(comment)
+
+        if posted:
+            TopicUnread.unread_new_comments(comments=posted)
+            posted[-1].topic.increase_comment_count(count=len(posted))
+            # The topic lists are sorted by last activity
+            purge_topic_pages(posted[-1].topic)
+
+        Job.objects\
+            .filter(pk__in=[job.pk for job in jobs])\
+            .delete()
+
+
+def _profile_version(user):
+    # Everything the fragments show about the author
+    profile = '%s:%s:%s:%s:%d:%d' % (
+        user.username, user.get_full_name(), user.email,
+        user.st.slug, user.st.is_administrator, user.st.is_moderator)
+    return hashlib.md5(profile.encode('utf-8')).hexdigest()[:8]
+
+
+def _fragment_key(comment, language=None):
+    return 'spirit:comment:fragment:%d:%d:%d:%d:%s:%s' % (
+        comment.pk, comment.modified_count, comment.likes_count, comment.is_removed,
+        _profile_version(comment.user), language or translation.get_language())
+
+
+def render_fragments(comments):
+    """
+    Return a list of (comment, fragment) tuples,\
+    the fragment being the viewer independent html\
+    of the comment. The key changes on every\
+    edit, like and removal of the comment, on\
+    changes to the author profile and per language
+    """
+    cache = caches[settings.ST_COMMENT_CACHE]
+    comments = list(comments)
+    keys = {c.pk: _fragment_key(c) for c in comments}
+    fragments = cache.get_many(list(keys.values()))
+    missing = {}
+
+    for c in comments:
+        key = keys[c.pk]
+
+        if key in fragments:
+            continue
+
+        missing[key] = {
+            name: render_to_string('spirit/comment/_fragment_%s.html' % name, {'c': c, })
+            for name in FRAGMENTS
+        }
+
+    if missing:
+        cache.set_many(missing, timeout=settings.ST_COMMENT_CACHE_TIMEOUT)
+        fragments.update(missing)
+
+    return [
+        (c, {name: mark_safe(html) for name, html in fragments[keys[c.pk]].items()})
+        for c in comments
+    ]
+
+
+def delete_fragments(comments):
+    """
+    Delete the cached fragments of the comments,\
+    for when the html changes without an edit
+    """
+    caches[settings.ST_COMMENT_CACHE].delete_many([
+        _fragment_key(c, language=language)
+        for c in comments
+        for language, _name in settings.LANGUAGES])
@@ -13,11 +13,14 @@ from djconfig import config
 from ..core.utils.ratelimit.decorators import ratelimit
 from ..core.utils.decorators import moderator_required
 from ..core.utils import markdown, paginator, render_form_errors, json_response
+from ..core.utils.paginator import PageIndex
 from ..topic.models import Topic
+from ..topic.utils import purge_topic_pages
+from ..user.models import UserProfile
 from .history.models import CommentHistory
 from .models import Comment
 from .forms import CommentForm, CommentMoveForm, CommentImageForm
-from .utils import comment_posted
+from .utils import comment_posted, pages_cache_key
 
 
 @login_required
@@ -37,7 +40,8 @@ def publish(request, topic_id, pk=None):
         initial = None
 
         if pk:
-            comment = get_object_or_404(Comment.objects.for_access(user=request.user), pk=pk)
+            comment = get_object_or_404(Comment.objects.for_access(user=request.user).select_related('user'),
+                                        pk=pk)
             quote = markdown.quotify(comment.comment, comment.user.username)
             initial = {'comment': quote, }
 
@@ -64,6 +68,7 @@ def update(request, pk):
             comment.increase_modified_count()
             CommentHistory.create_maybe(comment_pre)
             CommentHistory.create(comment)
+            purge_topic_pages(comment.topic)
             return redirect(request.POST.get('next', comment.get_absolute_url()))
     else:
         form = CommentForm(instance=comment)
@@ -78,10 +83,18 @@ def delete(request, pk, remove=True):
     comment = get_object_or_404(Comment, pk=pk)
 
     if request.method == 'POST':
-        Comment.objects\
-            .filter(pk=pk)\
+        count = Comment.objects\
+            .filter(pk=pk, is_removed=not remove)\
             .update(is_removed=remove)
 
+        # The comment is counted as long as it's not removed
+        comment.is_removed = False
+
+        if count and comment.is_counted:
+            UserProfile.update_counters(comment.user_id, comment_count=-1 if remove else 1)
+
+        purge_topic_pages(comment.topic)
+
         return redirect(comment.get_absolute_url())
 
     context = {'comment': comment, }
@@ -100,7 +113,13 @@ def move(request, topic_id):
 
         for comment in comments:
             comment_posted(comment=comment, mentions=None)
-            topic.decrease_comment_count()
+
+        topic.decrease_comment_count(count=len(comments))
+
+        # Comments may land before the last page
+        for t in (topic, form.cleaned_data['topic']):
+            Comment.renumber(topic=t)
+            PageIndex.invalidate(pages_cache_key(t))
     else:
         messages.error(request, render_form_errors(form))
 
@@ -108,8 +127,18 @@ def move(request, topic_id):
 
 
 def find(request, pk):
-    comment = get_object_or_404(Comment, pk=pk)
-    comment_number = Comment.objects.filter(topic=comment.topic, date__lte=comment.date).count()
+    comment = get_object_or_404(Comment.objects.select_related('topic'), pk=pk)
+    comment_number = comment.number
+
+    # Not numbered, see spiritcommentnumbers
+    if not comment_number:
+        index = PageIndex(
+            Comment.objects.for_topic(topic=comment.topic),
+            per_page=config.comments_per_page,
+            cache_key=pages_cache_key(comment.topic)
+        )
+        comment_number = index.number_of(date=comment.date, pk=comment.pk)
+
     url = paginator.get_url(comment.topic.get_absolute_url(),
                             comment_number,
                             config.comments_per_page,
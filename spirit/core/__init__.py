@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+default_app_config = 'spirit.core.apps.SpiritCoreConfig'
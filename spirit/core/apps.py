@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+
+
+class SpiritCoreConfig(AppConfig):
+
+    name = 'spirit.core'
+    verbose_name = "Spirit Core"
+    label = 'spirit_core'
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum, Max
+
+from ....topic.models import Topic
+from ....category.models import Category
+
+
+def update_counters():
+    """
+    Compute the counters of every category,\
+    the subcategories are rolled up to the parent.\
+    This is a grouped query and an UPDATE per category
+    """
+    counts = Topic.objects\
+        .filter(is_removed=False)\
+        .values('category_id')\
+        .annotate(
+            topic_count=Count('pk'),
+            comment_count=Sum('comment_count'),
+            last_active=Max('last_active'))\
+        .order_by()
+    counts = {c['category_id']: c for c in counts}
+    categories = list(Category.objects.values_list('pk', 'parent_id'))
+    counters = {
+        pk: {'topic_count': 0, 'comment_count': 0, 'last_active': None}
+        for pk, parent_id in categories
+    }
+
+    for pk, parent_id in categories:
+        if pk not in counts:
+            continue
+
+        for category_id in (pk, parent_id):
+            if category_id is None:
+                continue
+
+            counter = counters[category_id]
+            counter['topic_count'] += counts[pk]['topic_count']
+            counter['comment_count'] += counts[pk]['comment_count'] or 0
+            counter['last_active'] = max(
+                counter['last_active'] or counts[pk]['last_active'],
+                counts[pk]['last_active'])
+
+    for pk, counter in counters.items():
+        Category.objects\
+            .filter(pk=pk)\
+            .update(**counter)
+
+
+class Command(BaseCommand):
+    help = 'Computes the topic and comment counters and ' \
+           'the last activity of every category'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            update_counters()
+
+        self.stdout.write('ok')
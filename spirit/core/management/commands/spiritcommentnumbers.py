@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from ....topic.models import Topic
+from ....comment.models import Comment
+
+
+class Command(BaseCommand):
+    help = 'Numbers the comments of every topic. ' \
+           'The migrations do it once, this repairs the numbers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-pk', type=int, default=0,
+                            help='Resume from this topic pk')
+
+    def handle(self, *args, **options):
+        topics = Topic.objects\
+            .filter(pk__gte=options['start_pk'])\
+            .order_by('pk')\
+            .only('pk')
+
+        for count, topic in enumerate(topics.iterator(), start=1):
+            Comment.renumber(topic=topic)
+
+            if not count % 1000:
+                self.stdout.write('Done up to topic %d' % topic.pk)
+
+        self.stdout.write('ok')
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.conf import settings
+
+from ....topic.models import Topic
+from ....topic.notification.models import TopicNotification
+from ....category.models import Category
+
+User = get_user_model()
+
+
+def listings(user, category, per_page):
+    """
+    The canonical listing queries,\
+    as the views build them
+    """
+    active = Topic.objects\
+        .visible()\
+        .global_()\
+        .order_by('-is_globally_pinned', '-last_active')\
+        .select_related('category')
+
+    category_topics = Topic.objects\
+        .unremoved()\
+        .for_category(category=category)\
+        .order_by('-is_globally_pinned', '-is_pinned', '-last_active')\
+        .select_related('category')
+
+    unread = Topic.objects\
+        .for_access(user=user)\
+        .for_unread(user=user)\
+        .order_by('-last_active', '-pk')
+
+    notifications = TopicNotification.objects\
+        .for_access(user)\
+        .order_by('is_read', '-date')\
+        .select_related('comment__user__st', 'comment__topic')
+
+    notifications_unread = TopicNotification.objects\
+        .for_access(user)\
+        .filter(is_read=False)\
+        .order_by('-date', '-pk')
+
+    return [
+        ('topic.index_active', active[:per_page]),
+        ('category.detail', category_topics[:per_page]),
+        ('topic.unread.index', unread[:per_page]),
+        ('topic.notification.index_ajax', notifications[:per_page]),
+        ('topic.notification.index_unread', notifications_unread[:per_page]),
+    ]
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+
+    if connection.vendor == 'sqlite':
+        sql = 'EXPLAIN QUERY PLAN ' + sql
+    else:
+        sql = 'EXPLAIN ' + sql
+
+    cursor = connection.cursor()
+
+    try:
+        cursor.execute(sql, params)
+        columns = [c[0].lower() for c in cursor.description]
+        return [OrderedDict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def is_sequential_scan(row):
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan' in row['query plan']
+
+    if connection.vendor == 'sqlite':
+        detail = row['detail']
+        return detail.startswith('SCAN ') and 'USING' not in detail
+
+    if connection.vendor == 'mysql':
+        return row['type'] == 'ALL'
+
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Explains the main listing queries and flags sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, default=20,
+                            help='Page size (LIMIT) of the explained queries')
+
+    def handle(self, *args, **options):
+        # The plan does not depend on the user or category rows
+        user = User(pk=1)
+        category = Category(pk=settings.ST_UNCATEGORIZED_CATEGORY_PK)
+        flagged = 0
+
+        for name, queryset in listings(user=user, category=category, per_page=options['per_page']):
+            plan = explain(queryset)
+            scans = [row for row in plan if is_sequential_scan(row)]
+            flagged += bool(scans)
+
+            if scans:
+                self.stdout.write('%s: sequential scan' % name)
+            else:
+                self.stdout.write('%s: ok' % name)
+
+            if scans or int(options['verbosity']) > 1:
+                for row in plan:
+                    self.stdout.write('    %s' % ' | '.join(str(v) for v in row.values()))
+
+        self.stdout.write('%d listings flagged' % flagged)
+        self.stdout.write('ok')
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, division
+
+import time
+import threading
+
+from django.core.management.base import BaseCommand
+from django.core.cache import caches
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from ...utils.ratelimit import TokenBucket
+from ...utils.ratelimit.ratelimit import TIME_DICT
+
+
+def decide(engine, token_bucket, keys, requests, limit, period):
+    """
+    Make the rate limit decisions of a thread.\
+    Returns the count of limited requests
+    """
+    limited = 0
+
+    for i in range(requests):
+        key = keys[i % len(keys)]
+
+        if token_bucket is not None and not token_bucket.consume(key, limit=limit, period=period):
+            limited += 1
+        elif engine.hit(key, period=period) > limit:
+            limited += 1
+
+    return limited
+
+
+class Command(BaseCommand):
+    help = 'Measures the rate limit decisions per second ' \
+           'of the configured engine and cache under threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Number of concurrent threads')
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Number of decisions made by each thread')
+        parser.add_argument('--keys', type=int, default=100,
+                            help='Number of distinct users/ips')
+        parser.add_argument('--rate', default='5/5m',
+                            help='Rate limit, ie: 5/5m')
+        parser.add_argument('--engine', default=settings.ST_RATELIMIT_ENGINE,
+                            help='Engine dotted path')
+        parser.add_argument('--prefilter', action='store_true', default=False,
+                            help='Use the in-process token buckets')
+
+    def handle(self, *args, **options):
+        engine_class = import_string(options['engine'])
+        limit, period = options['rate'].split('/')
+        limit = int(limit)
+        period = int(period[:-1] or 1) * TIME_DICT[period[-1]]
+        token_bucket = TokenBucket() if options['prefilter'] else None
+        keys = ['spirit:ratelimit:bench:%d' % i for i in range(options['keys'])]
+        results = []
+
+        def run():
+            # Each thread gets its own cache connection
+            engine = engine_class(cache=caches[settings.ST_RATELIMIT_CACHE])
+            results.append(decide(
+                engine, token_bucket, keys, options['requests'], limit, period))
+
+        threads = [threading.Thread(target=run) for _ in range(options['threads'])]
+        start = time.time()
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.time() - start
+        decisions = options['threads'] * options['requests']
+        caches[settings.ST_RATELIMIT_CACHE].delete_many(
+            ['%s:%d' % (key, int(start // period) + window) for key in keys for window in (0, 1)])
+
+        self.stdout.write('%d decisions, %d limited' % (decisions, sum(results)))
+        self.stdout.write('%d decisions/s' % (decisions / max(elapsed, 1e-6)))
+        self.stdout.write('ok')
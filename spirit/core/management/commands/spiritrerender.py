@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Min, Max
+
+from ....comment.models import Comment
+from ....comment.utils import delete_fragments
+from ...utils.markdown import get_markdown
+
+
+def rerender(pk_range):
+    """
+    Render the comments within [start, end) pk range.\
+    This is run within the worker processes
+    """
+    start, end = pk_range
+    markdown = get_markdown()
+    comments = Comment.objects\
+        .filter(pk__gte=start, pk__lt=end)\
+        .select_related('user__st')
+
+    with transaction.atomic():
+        for comment in comments:
+            Comment.objects\
+                .filter(pk=comment.pk)\
+                .update(comment_html=markdown.render(comment.comment))
+
+    delete_fragments(comments)
+    return len(comments)
+
+
+class Command(BaseCommand):
+    help = 'Renders the html of every comment. ' \
+           'Required when the markdown renderer or the emojis change'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                            help='Number of worker processes')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of comments (pk range) rendered by each task')
+
+    def handle(self, *args, **options):
+        pks = Comment.objects.aggregate(min=Min('pk'), max=Max('pk'))
+
+        if pks['min'] is None:
+            self.stdout.write('ok')
+            return
+
+        chunk_size = options['chunk_size']
+        pk_ranges = [
+            (start, start + chunk_size)
+            for start in range(pks['min'], pks['max'] + 1, chunk_size)
+        ]
+
+        if options['processes'] > 1:
+            # Each worker must open its own connection
+            for connection in connections.all():
+                connection.close()
+
+            pool = multiprocessing.Pool(processes=options['processes'])
+            results = pool.imap_unordered(rerender, pk_ranges)
+        else:
+            pool = None
+            results = (rerender(pk_range) for pk_range in pk_ranges)
+
+        try:
+            count = 0
+
+            for rendered in results:
+                count += rendered
+                self.stdout.write('%d comments rendered' % count)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.stdout.write('ok')
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+import time
+
+from django.core.management.base import BaseCommand
+
+from ... import tasks
+
+
+class Command(BaseCommand):
+    help = 'Runs the pending Spirit jobs. ' \
+           'Use --interval to keep running as a worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Seconds to sleep between runs, 0 runs once')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        while True:
+            count = tasks.run_jobs()
+            self.stdout.write('%d batches processed' % count)
+
+            if not interval:
+                break
+
+            time.sleep(interval)
+
+        self.stdout.write('ok')
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Case, When, Value, IntegerField
+
+from ....topic.models import Topic
+from ....comment.models import Comment
+from ....comment.like.models import CommentLike
+from ....user.models import UserProfile
+
+
+def _counts(queryset, user_field, user_ids):
+    counts = queryset\
+        .filter(**{user_field + '__in': user_ids})\
+        .values(user_field)\
+        .annotate(count=Count('pk'))\
+        .order_by()
+    return {c[user_field]: c['count'] for c in counts}
+
+
+def _case(counts, user_ids):
+    return Case(
+        *[When(user_id=pk, then=Value(counts.get(pk, 0))) for pk in user_ids],
+        output_field=IntegerField())
+
+
+def update_counters(user_ids):
+    """
+    Compute the counters of the given users.\
+    This is a few grouped queries and a single UPDATE
+    """
+    topics = _counts(Topic.objects.counted(), 'user_id', user_ids)
+    comments = _counts(Comment.objects.counted(), 'user_id', user_ids)
+    likes = _counts(CommentLike.objects.all(), 'comment__user_id', user_ids)
+
+    UserProfile.objects\
+        .filter(user_id__in=user_ids)\
+        .update(
+            topic_count=_case(topics, user_ids),
+            comment_count=_case(comments, user_ids),
+            received_likes_count=_case(likes, user_ids))
+
+
+class Command(BaseCommand):
+    help = 'Computes the topic, comment and received likes ' \
+           'counters of every user. Required once when upgrading ' \
+           'to this version, it can be resumed with --start-pk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-pk', type=int, default=0,
+                            help='Resume from this user pk')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of users updated at once')
+
+    def handle(self, *args, **options):
+        start_pk = options['start_pk']
+        chunk_size = options['chunk_size']
+
+        while True:
+            user_ids = list(
+                UserProfile.objects
+                .filter(user_id__gte=start_pk)
+                .order_by('user_id')
+                .values_list('user_id', flat=True)[:chunk_size]
+            )
+
+            if not user_ids:
+                break
+
+            with transaction.atomic():
+                update_counters(user_ids)
+
+            self.stdout.write('Done up to user %d' % user_ids[-1])
+            start_pk = user_ids[-1] + 1
+
+        self.stdout.write('ok')
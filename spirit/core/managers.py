@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.db import models
+
+
+class JobQuerySet(models.QuerySet):
+
+    def for_task(self, task):
+        return self.filter(task=task)
+
+    def keys(self):
+        return self.order_by()\
+            .values_list('key', flat=True)\
+            .distinct()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(serialize=False, auto_created=True, primary_key=True, verbose_name='ID')),
+                ('task', models.CharField(max_length=255, verbose_name='task')),
+                ('key', models.CharField(max_length=255, blank=True, verbose_name='key')),
+                ('data', models.TextField(blank=True, verbose_name='data')),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'jobs',
+                'ordering': ['date', 'pk'],
+                'verbose_name': 'job',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='job',
+            index_together=set([('task', 'key')]),
+        ),
+    ]
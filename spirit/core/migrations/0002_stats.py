@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.AutoField(serialize=False, auto_created=True, primary_key=True, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='date')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='comment count')),
+                ('user_count', models.PositiveIntegerField(default=0, verbose_name='user count')),
+                ('like_count', models.PositiveIntegerField(default=0, verbose_name='like count')),
+            ],
+            options={
+                'verbose_name_plural': 'daily stats',
+                'ordering': ['-date'],
+                'verbose_name': 'daily stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='ForumStats',
+            fields=[
+                ('id', models.AutoField(serialize=False, auto_created=True, primary_key=True, verbose_name='ID')),
+                ('category_count', models.PositiveIntegerField(default=0, verbose_name='category count')),
+                ('topic_count', models.PositiveIntegerField(default=0, verbose_name='topic count')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='comment count')),
+                ('user_count', models.PositiveIntegerField(default=0, verbose_name='user count')),
+                ('flag_count', models.PositiveIntegerField(default=0, verbose_name='open flag count')),
+                ('like_count', models.PositiveIntegerField(default=0, verbose_name='like count')),
+                ('reconciled', models.DateTimeField(null=True, blank=True, verbose_name='reconciled')),
+            ],
+            options={
+                'verbose_name_plural': 'forum stats',
+                'verbose_name': 'forum stats',
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def create_row(apps, schema_editor):
+    # The write paths only update it,
+    # it gets counted on first read
+    ForumStats = apps.get_model('spirit_core', 'ForumStats')
+    ForumStats.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_core', '0002_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_row),
+    ]
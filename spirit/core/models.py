@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+import datetime
+
+from django.db import models, transaction, IntegrityError
+from django.core.cache import caches
+from django.utils.translation import ugettext_lazy as _
+from django.utils import timezone
+from django.conf import settings
+
+from .managers import JobQuerySet
+from .utils.models import increments
+
+STATS_PK = 1
+FORUM_STATS_KEY = 'spirit:stats:forum'
+FORUM_STATS_FIELDS = ('category_count', 'topic_count', 'comment_count',
+                      'user_count', 'flag_count', 'like_count')
+DAILY_STATS_FIELDS = ('comment_count', 'user_count', 'like_count')
+
+
+def _stats_cache():
+    return caches[settings.ST_FORUM_STATS_CACHE]
+
+
+def _buffer_keys(prefix, name):
+    # Memcached can't hold negative numbers,
+    # the subtractions are buffered on their own
+    return '%s:%s:add' % (prefix, name), '%s:%s:sub' % (prefix, name)
+
+
+def _buffer(prefix, counts):
+    cache = _stats_cache()
+
+    for name, count in counts.items():
+        if not count:
+            continue
+
+        add_key, sub_key = _buffer_keys(prefix, name)
+        key = add_key if count > 0 else sub_key
+
+        try:
+            cache.incr(key, abs(count))
+        except ValueError:
+            if not cache.add(key, abs(count), timeout=settings.ST_FORUM_STATS_TIMEOUT):
+                cache.incr(key, abs(count))
+
+
+def _pending(prefix, names):
+    """
+    Return the buffered counts
+    """
+    keys = {name: _buffer_keys(prefix, name) for name in names}
+    values = _stats_cache().get_many([key for pair in keys.values() for key in pair])
+    return {
+        name: values.get(add_key, 0) - values.get(sub_key, 0)
+        for name, (add_key, sub_key) in keys.items()
+    }
+
+
+def _pop(prefix, names):
+    """
+    Take the counts out of the buffer. A concurrent\
+    pop would take the same counts, so it gets nothing
+    """
+    cache = _stats_cache()
+    lock_key = prefix + ':lock'
+    counts = {name: 0 for name in names}
+
+    if not cache.add(lock_key, True, timeout=settings.ST_FORUM_STATS_FLUSH_INTERVAL):
+        return counts
+
+    try:
+        for name in names:
+            add_key, sub_key = _buffer_keys(prefix, name)
+
+            for sign, key in ((1, add_key), (-1, sub_key)):
+                count = cache.get(key, 0)
+
+                if not count:
+                    continue
+
+                try:
+                    cache.decr(key, count)
+                except ValueError:
+                    continue
+
+                counts[name] += sign * count
+    finally:
+        cache.delete(lock_key)
+
+    return counts
+
+
+def _should_flush(prefix):
+    # The first write of the interval flushes the buffer
+    return _stats_cache().add(
+        prefix + ':flushed', True, timeout=settings.ST_FORUM_STATS_FLUSH_INTERVAL)
+
+
+class Job(models.Model):
+    """
+    A pending task stored in the database,\
+    so it survives restarts and works without celery.
+
+    Jobs sharing the same task and key\
+    are meant to be processed together
+    """
+    task = models.CharField(_("task"), max_length=255)
+    key = models.CharField(_("key"), max_length=255, blank=True)
+    data = models.TextField(_("data"), blank=True)
+    date = models.DateTimeField(default=timezone.now)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        index_together = [('task', 'key'), ]
+        ordering = ['date', 'pk']
+        verbose_name = _("job")
+        verbose_name_plural = _("jobs")
+
+    def get_data(self):
+        return json.loads(self.data or '{}')
+
+    @classmethod
+    def enqueue(cls, task, key='', **data):
+        return cls.objects.create(
+            task=task,
+            key=str(key),
+            data=json.dumps(data)
+        )
+
+
+class ForumStats(models.Model):
+    """
+    The forum counters, it's a single row\
+    created by the migrations. The write paths\
+    buffer the counts in the cache, these are\
+    written by flush() and reconcile() recounts everything
+    """
+    category_count = models.PositiveIntegerField(_("category count"), default=0)
+    topic_count = models.PositiveIntegerField(_("topic count"), default=0)
+    comment_count = models.PositiveIntegerField(_("comment count"), default=0)
+    user_count = models.PositiveIntegerField(_("user count"), default=0)
+    flag_count = models.PositiveIntegerField(_("open flag count"), default=0)
+    like_count = models.PositiveIntegerField(_("like count"), default=0)
+    reconciled = models.DateTimeField(_("reconciled"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("forum stats")
+        verbose_name_plural = _("forum stats")
+
+    @classmethod
+    def get(cls):
+        """
+        Return the stored plus the buffered counts
+        """
+        try:
+            stats = cls.objects.get(pk=STATS_PK)
+        except cls.DoesNotExist:
+            stats = None
+
+        # Never counted since the upgrade
+        if stats is None or stats.reconciled is None:
+            return cls.reconcile()
+
+        for name, count in _pending(FORUM_STATS_KEY, FORUM_STATS_FIELDS).items():
+            setattr(stats, name, max(getattr(stats, name) + count, 0))
+
+        return stats
+
+    @classmethod
+    def update_counters(cls, **counts):
+        """
+        Add the counts (which may be negative)\
+        to the buffer, the counters row is not\
+        locked by the request (but once per flush interval)
+        """
+        _buffer(FORUM_STATS_KEY, counts)
+
+        if _should_flush(FORUM_STATS_KEY):
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """
+        Write the buffered counts
+        """
+        fields = increments(**_pop(FORUM_STATS_KEY, FORUM_STATS_FIELDS))
+
+        if not fields:
+            return
+
+        cls.objects\
+            .filter(pk=STATS_PK)\
+            .update(**fields)
+
+    @classmethod
+    def reconcile(cls):
+        """
+        Count everything, this is expensive.\
+        It fixes the counters drift (ie: deletions)
+        """
+        # These apps import this module
+        from django.contrib.auth import get_user_model
+        from ..category.models import Category
+        from ..topic.models import Topic
+        from ..comment.models import Comment
+        from ..comment.flag.models import CommentFlag
+        from ..comment.like.models import CommentLike
+
+        # Taken out before counting, the ones buffered
+        # in the meantime are in the counts as well as in the
+        # buffer, rather than dropped. The next reconcile fixes it
+        _pop(FORUM_STATS_KEY, FORUM_STATS_FIELDS)
+        counts = {
+            'category_count': Category.objects
+            .exclude(pk=settings.ST_TOPIC_PRIVATE_CATEGORY_PK)
+            .count(),
+            'topic_count': Topic.objects.all().count(),
+            'comment_count': Comment.objects.for_count().count(),
+            'user_count': get_user_model().objects.all().count(),
+            'flag_count': CommentFlag.objects.filter(is_closed=False).count(),
+            'like_count': CommentLike.objects.all().count(),
+            'reconciled': timezone.now()
+        }
+        stats, created = cls.objects.update_or_create(pk=STATS_PK, defaults=counts)
+        return stats
+
+    def is_stale(self):
+        interval = settings.ST_FORUM_STATS_RECONCILE_INTERVAL
+        return (self.reconciled is None or
+                (timezone.now() - self.reconciled).total_seconds() >= interval)
+
+
+class DailyStats(models.Model):
+    """
+    The forum activity per (UTC) day
+    """
+    date = models.DateField(_("date"), unique=True)
+    comment_count = models.PositiveIntegerField(_("comment count"), default=0)
+    user_count = models.PositiveIntegerField(_("user count"), default=0)
+    like_count = models.PositiveIntegerField(_("like count"), default=0)
+
+    class Meta:
+        ordering = ['-date', ]
+        verbose_name = _("daily stats")
+        verbose_name_plural = _("daily stats")
+
+    @staticmethod
+    def _buffer_prefix(date):
+        return 'spirit:stats:daily:%s' % date.isoformat()
+
+    @classmethod
+    def update_counters(cls, **counts):
+        """
+        Add the counts to the buffer of the day
+        """
+        _buffer(cls._buffer_prefix(timezone.now().date()), counts)
+
+        if _should_flush('spirit:stats:daily'):
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """
+        Write the buffered counts of today and yesterday
+        """
+        today = timezone.now().date()
+
+        for date in (today - datetime.timedelta(days=1), today):
+            counts = _pop(cls._buffer_prefix(date), DAILY_STATS_FIELDS)
+            fields = increments(**counts)
+
+            if not fields:
+                continue
+
+            if cls.objects.filter(date=date).update(**fields):
+                continue
+
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        date=date,
+                        **{name: max(count, 0) for name, count in counts.items()})
+            except IntegrityError:
+                # Created by a concurrent flush
+                cls.objects.filter(date=date).update(**fields)
+
+    @classmethod
+    def get_latest(cls, days=30):
+        """
+        Return the latest days, today\
+        includes the buffered counts
+        """
+        latest = list(cls.objects.all()[:days])
+        today = timezone.now().date()
+        pending = _pending(cls._buffer_prefix(today), DAILY_STATS_FIELDS)
+
+        if not any(pending.values()):
+            return latest
+
+        if not latest or latest[0].date != today:
+            latest = [cls(date=today)] + latest[:days - 1]
+
+        for name, count in pending.items():
+            setattr(latest[0], name, max(getattr(latest[0], name) + count, 0))
+
+        return latest
@@ -19,7 +19,8 @@
       commentTxt: "{user} has commented on {topic}",
       showAll: "Show all",
       empty: "Nothing to show",
-      unread: "unread"
+      unread: "unread",
+      storageKey: "spirit.notifications"
     };
 
     function Notification(el, options) {
@@ -27,6 +28,8 @@
       this.addErrorTxt = __bind(this.addErrorTxt, this);
       this.addIsEmptyTxt = __bind(this.addIsEmptyTxt, this);
       this.addNotifications = __bind(this.addNotifications, this);
+      this.setCached = __bind(this.setCached, this);
+      this.getCached = __bind(this.getCached, this);
       this.tabSwitch = __bind(this.tabSwitch, this);
       this.el = $(el);
       this.options = $.extend({}, this.defaults, options);
@@ -40,10 +43,20 @@
     };
 
     Notification.prototype.tabSwitch = function() {
-      var get;
-      get = $.getJSON(this.options.notificationUrl);
+      var cached, get, url;
+      cached = this.getCached();
+      url = this.options.notificationUrl;
+      if (cached != null) {
+        url = "" + url + "?since=" + (encodeURIComponent(cached.v));
+      }
+      get = $.getJSON(url);
       get.done((function(_this) {
         return function(data, status, jqXHR) {
+          if (data == null) {
+            data = cached;
+          } else {
+            _this.setCached(data);
+          }
           if (data.n.length > 0) {
             return _this.addNotifications(data);
           } else {
@@ -63,6 +76,32 @@
       })(this));
     };
 
+    Notification.prototype.getCached = function() {
+      var data, error;
+      try {
+        data = JSON.parse(sessionStorage.getItem(this.options.storageKey));
+      } catch (_error) {
+        error = _error;
+        data = null;
+      }
+      if ((data != null ? data.v : void 0) != null) {
+        return data;
+      }
+      return null;
+    };
+
+    Notification.prototype.setCached = function(data) {
+      var error;
+      if (data.v == null) {
+        return;
+      }
+      try {
+        sessionStorage.setItem(this.options.storageKey, JSON.stringify(data));
+      } catch (_error) {
+        error = _error;
+      }
+    };
+
     Notification.prototype.addNotifications = function(data) {
       var showAllLink, unread;
       unread = "<span class=\"row-unread\">" + this.options.unread + "</span>";
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from ..models import ForumStats
+from .registry import register
+
+
+@register.assignment_tag()
+def get_forum_stats():
+    return ForumStats.get()
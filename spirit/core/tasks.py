@@ -17,6 +17,9 @@ if not hasattr(settings, 'BROKER_URL'):
         return f
 
 
+COMMENT_FAN_OUT = 'comment_fan_out'
+
+
 @task
 def send_notification():
     pass
@@ -35,3 +38,77 @@ def search_index_update():
 @task
 def clean_sessions():
     pass
+
+
+@task
+def comment_fan_out(topic_id):
+    # comment.utils imports this module
+    from ..comment.utils import comment_fan_out as fan_out
+    fan_out(topic_id=topic_id)
+
+
+@task
+def flush_presence():
+    from ..user.utils import presence
+    return presence.flush()
+
+
+@task
+def flush_stats():
+    from .models import ForumStats, DailyStats
+    ForumStats.flush()
+    DailyStats.flush()
+
+
+@task
+def flush_view_counts():
+    from ..topic.models import Topic
+    return Topic.flush_view_counts()
+
+
+@task
+def reconcile_stats(force=False):
+    from .models import ForumStats
+
+    if force or ForumStats.get().is_stale():
+        ForumStats.reconcile()
+
+
+@task
+def cull_caches():
+    """
+    Delete the expired entries of the database caches
+    """
+    from django.core.cache import caches
+    from django.core.cache.backends.db import DatabaseCache
+    from .utils.cache import cull
+
+    for alias in settings.CACHES:
+        cache = caches[alias]
+
+        if isinstance(cache, DatabaseCache):
+            cull(cache)
+
+
+@task
+def run_jobs():
+    """
+    Process every pending job, one\
+    batch per topic. Returns the batch count.\
+    The users presence, the topic views and the forum\
+    stats are flushed, the stale forum stats are recounted\
+    and the database caches are culled as well
+    """
+    from .models import Job
+
+    topic_ids = list(Job.objects.for_task(COMMENT_FAN_OUT).keys())
+
+    for topic_id in topic_ids:
+        comment_fan_out(topic_id=int(topic_id))
+
+    flush_presence()
+    flush_view_counts()
+    flush_stats()
+    reconcile_stats()
+    cull_caches()
+    return len(topic_ids)
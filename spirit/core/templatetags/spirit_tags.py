@@ -9,11 +9,13 @@ from ...topic.favorite import tags as topic_favorite
 from ...topic.notification import tags as topic_notification
 from ...topic.poll import tags as topic_poll
 from ...topic.private import tags as topic_private
+from ...user import tags as user
 from ..tags import avatar
 from ..tags import gravatar
 from ..tags import messages
 from ..tags import paginator
 from ..tags import social_share
+from ..tags import stats
 from ..tags import time
 from ..tags.registry import register
 
@@ -26,11 +28,13 @@ __all__ = [
     'topic_favorite',
     'topic_notification',
     'topic_private',
+    'user',
     'avatar',
     'gravatar',
     'messages',
     'paginator',
     'social_share',
+    'stats',
     'time',
     'register'
 ]
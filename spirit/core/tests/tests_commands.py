@@ -11,6 +11,13 @@ from ..management.commands import spiritcompilemessages
 from ..management.commands import spirittxpush
 from ..management.commands import spiritinstall
 from ..management.commands import spiritupgrade
+from ..management.commands import spiritrunjobs
+from ...comment.models import Comment
+from ...comment.like.models import CommentLike
+from ...user.models import UserProfile
+from ...category.models import Category
+from ...topic.models import Topic
+from . import utils
 
 
 class CommandsTests(TestCase):
@@ -83,7 +90,7 @@ class CommandsTests(TestCase):
 
     def test_command_spiritupgrade(self):
         """
-        Should run migrations, rebuild search index and collect statics
+        Should run migrations, create the cache table, rebuild search index and collect statics
         """
         command_list = []
 
@@ -99,6 +106,138 @@ class CommandsTests(TestCase):
             out_put_err = err.getvalue().strip().splitlines()
             self.assertEqual(out_put[-1], "ok")
             self.assertEqual(out_put_err, [])
-            self.assertEqual(command_list, ["migrate", "rebuild_index", "collectstatic"])
+            self.assertEqual(command_list, ["migrate", "createcachetable", "rebuild_index", "collectstatic"])
         finally:
             spiritupgrade.call = org_call
+
+    def test_command_spiritrunjobs(self):
+        """
+        Should run the pending jobs
+        """
+        calls = []
+
+        def run_jobs_mock():
+            calls.append(True)
+            return 1
+
+        org_run_jobs, spiritrunjobs.tasks.run_jobs = spiritrunjobs.tasks.run_jobs, run_jobs_mock
+        try:
+            out = StringIO()
+            err = StringIO()
+            call_command('spiritrunjobs', stdout=out, stderr=err)
+            out_put = out.getvalue().strip().splitlines()
+            out_put_err = err.getvalue().strip().splitlines()
+            self.assertEqual(out_put, ["1 batches processed", "ok"])
+            self.assertEqual(out_put_err, [])
+            self.assertEqual(len(calls), 1)
+        finally:
+            spiritrunjobs.tasks.run_jobs = org_run_jobs
+
+    def test_command_spiritcommentnumbers(self):
+        """
+        Should number the comments of every topic
+        """
+        topic = utils.create_topic(utils.create_category())
+        comment = utils.create_comment(topic=topic)
+        comment2 = utils.create_comment(topic=topic)
+        Comment.objects.all().update(number=0)
+
+        out = StringIO()
+        err = StringIO()
+        call_command('spiritcommentnumbers', stdout=out, stderr=err)
+        out_put = out.getvalue().strip().splitlines()
+        self.assertEqual(out_put[-1], "ok")
+        self.assertEqual(Comment.objects.get(pk=comment.pk).number, 1)
+        self.assertEqual(Comment.objects.get(pk=comment2.pk).number, 2)
+
+    def test_command_spiritusercounters(self):
+        """
+        Should compute the counters of every user
+        """
+        user = utils.create_user()
+        user2 = utils.create_user()
+        topic = utils.create_topic(utils.create_category(), user=user)
+        comment = utils.create_comment(topic=topic, user=user)
+        utils.create_comment(topic=topic, user=user2)
+        CommentLike.objects.create(user=user2, comment=comment)
+        UserProfile.objects.all().update(topic_count=0, comment_count=0, received_likes_count=0)
+
+        out = StringIO()
+        err = StringIO()
+        call_command('spiritusercounters', chunk_size=1, stdout=out, stderr=err)
+        out_put = out.getvalue().strip().splitlines()
+        self.assertEqual(out_put[-1], "ok")
+        self.assertEqual(out_put[-2], "Done up to user %d" % user2.pk)
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user).received_likes_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user2).topic_count, 0)
+        self.assertEqual(UserProfile.objects.get(user=user2).comment_count, 1)
+
+    def test_command_spiritcategorycounters(self):
+        """
+        Should compute the counters of every category
+        """
+        category = utils.create_category()
+        subcategory = utils.create_subcategory(category)
+        utils.create_topic(category)
+        topic = utils.create_topic(subcategory)
+        utils.create_topic(subcategory, is_removed=True)
+        Topic.objects.filter(pk=topic.pk).update(comment_count=2)
+        Category.objects.all().update(topic_count=0, comment_count=0, last_active=None)
+
+        out = StringIO()
+        err = StringIO()
+        call_command('spiritcategorycounters', stdout=out, stderr=err)
+        out_put = out.getvalue().strip().splitlines()
+        self.assertEqual(out_put[-1], "ok")
+        category = Category.objects.get(pk=category.pk)
+        self.assertEqual(category.topic_count, 2)
+        self.assertEqual(category.comment_count, 2)
+        self.assertEqual(category.last_active, Topic.objects.get(pk=topic.pk).last_active)
+        subcategory = Category.objects.get(pk=subcategory.pk)
+        self.assertEqual(subcategory.topic_count, 1)
+        self.assertEqual(subcategory.comment_count, 2)
+
+    def test_command_spiritratelimitbench(self):
+        """
+        Should measure the rate limit decisions per second
+        """
+        out = StringIO()
+        err = StringIO()
+        call_command('spiritratelimitbench', threads=2, requests=10, keys=1, rate='5/m',
+                     prefilter=True, stdout=out, stderr=err)
+        out_put = out.getvalue().strip().splitlines()
+        self.assertEqual(out_put[-1], "ok")
+        self.assertTrue(out_put[-2].endswith("decisions/s"))
+        self.assertEqual(out_put[-3], "20 decisions, 15 limited")
+
+    def test_command_spiritindexcheck(self):
+        """
+        Should explain every listing query
+        """
+        out = StringIO()
+        err = StringIO()
+        call_command('spiritindexcheck', stdout=out, stderr=err)
+        out_put = out.getvalue().strip().splitlines()
+        self.assertEqual(out_put[-1], "ok")
+        self.assertTrue(out_put[-2].endswith("listings flagged"))
+        self.assertTrue(out_put[0].startswith("topic.index_active: "))
+
+    def test_command_spiritrerender(self):
+        """
+        Should render the html of every comment
+        """
+        user = utils.create_user(username='nitely')
+        topic = utils.create_topic(utils.create_category())
+        comment = utils.create_comment(topic=topic, comment='@nitely', comment_html='')
+        comment2 = utils.create_comment(topic=topic, comment='**foo**', comment_html='')
+
+        out = StringIO()
+        err = StringIO()
+        call_command('spiritrerender', processes=1, chunk_size=1, stdout=out, stderr=err)
+        out_put = out.getvalue().strip().splitlines()
+        self.assertEqual(out_put[-1], "ok")
+        self.assertEqual(out_put[-2], "2 comments rendered")
+        self.assertIn(user.st.get_absolute_url(), Comment.objects.get(pk=comment.pk).comment_html)
+        self.assertEqual(Comment.objects.get(pk=comment2.pk).comment_html, '<p><strong>foo</strong></p>')
@@ -23,6 +23,7 @@ from django.utils.translation import ugettext as _
 from django.utils.timezone import utc
 from django.utils.http import urlunquote
 from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
 
 from ...category.models import Category
 from .. import utils
@@ -35,7 +36,8 @@ from ...user.utils import email
 from ..tags import time as ttags_utils
 from ..tests import utils as test_utils
 from ..tags.messages import render_messages
-from ..utils.markdown import Markdown, quotify
+from ..utils.markdown import Markdown, quotify, get_markdown
+from ..utils.markdown.utils.emoji import get_emoji_urls
 
 User = get_user_model()
 
@@ -362,6 +364,71 @@ class UtilsMarkdownTests(TestCase):
         self.assertDictEqual(md.get_mentions(), {'nitely': self.user,
                                                  'esteban': self.user2})
 
+    def test_markdown_mentions_num_queries(self):
+        """
+        Should fetch all the mentioned users in a single query
+        """
+        comment = "@nitely, @esteban, @nitely @fakeone"
+        md = Markdown(escape=True, hard_wrap=True)
+
+        with self.assertNumQueries(1):
+            md.render(comment)
+
+        self.assertDictEqual(md.get_mentions(), {'nitely': self.user,
+                                                 'esteban': self.user2})
+
+    def test_markdown_mentions_cache(self):
+        """
+        Should cache the mentions until the user gets saved
+        """
+        comment = "@nitely, @fakeone"
+        md = Markdown(escape=True, hard_wrap=True)
+        md.render(comment)
+
+        with self.assertNumQueries(0):
+            comment_md = md.render(comment)
+
+        self.assertIn(self.user.st.get_absolute_url(), comment_md)
+
+        user = test_utils.create_user(username="fakeone")
+        comment_md = md.render(comment)
+        self.assertIn(user.st.get_absolute_url(), comment_md)
+
+    def test_markdown_mentions_cache_rename(self):
+        """
+        Should drop the old username on rename
+        """
+        comment = "@nitely"
+        md = Markdown(escape=True, hard_wrap=True)
+        self.assertIn(self.user.st.get_absolute_url(), md.render(comment))
+
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        user.save()
+        self.assertNotIn('comment-mention', md.render(comment))
+
+    def test_markdown_mentions_not_preloaded(self):
+        """
+        Should fetch the mentions missed by the preloading
+        """
+        md = Markdown(escape=True, hard_wrap=True)
+        md.inline.reset()
+        self.assertEqual(md.inline.output("@nitely"),
+                         '<a class="comment-mention" href="%s">@nitely</a>' % self.user.st.get_absolute_url())
+
+    def test_get_markdown(self):
+        """
+        Should reuse the thread renderer and reset its state
+        """
+        md = get_markdown()
+        self.assertIs(get_markdown(), md)
+        md.render("@nitely")
+        mentions = md.get_mentions()
+        self.assertDictEqual(mentions, {'nitely': self.user})
+        md.render("@esteban")
+        self.assertDictEqual(md.get_mentions(), {'esteban': self.user2})
+        self.assertDictEqual(mentions, {'nitely': self.user})
+
     def test_markdown_emoji(self):
         """
         markdown emojify
@@ -373,6 +440,26 @@ class UtilsMarkdownTests(TestCase):
                                      '<img class="comment-emoji" src="%(static)sspirit/emojis/8ball.png"> '
                                      ':bademoji: foo:</p>' % {'static': settings.STATIC_URL, })
 
+    def test_markdown_emoji_urls(self):
+        """
+        Should map every emoji to its static url
+        """
+        emoji_urls = get_emoji_urls()
+        self.assertIs(get_emoji_urls(), emoji_urls)
+        self.assertEqual(emoji_urls['airplane'], '%sspirit/emojis/airplane.png' % settings.STATIC_URL)
+
+    def test_markdown_emoji_in_text(self):
+        """
+        Should replace every emoji within the text
+        """
+        comment = "foo:smile:bar :bad: :+1:"
+        md = Markdown(escape=True, hard_wrap=True)
+        comment_md = md.render(comment)
+        self.assertEqual(comment_md, '<p>foo<img class="comment-emoji" src="%(smile)s">bar '
+                                     ':bad: <img class="comment-emoji" src="%(plus_one)s"></p>' %
+                                     {'smile': staticfiles_storage.url('spirit/emojis/smile.png'),
+                                      'plus_one': staticfiles_storage.url('spirit/emojis/+1.png')})
+
     @override_settings(LANGUAGE_CODE='en')
     def test_markdown_quote(self):
         """
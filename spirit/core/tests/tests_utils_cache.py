@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache as DjangoDatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from ..utils.cache import TwoTierCache, DatabaseCache, has_atomic_incr
+
+
+class UtilsCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.cache = TwoTierCache('default', {'OPTIONS': {'LOCAL_MAX_ENTRIES': 2}})
+        self.cache.clear()
+
+    def test_two_tier_cache(self):
+        """
+        Should read and write through the shared cache
+        """
+        self.cache.set('foo', 'bar')
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        self.assertEqual(cache.get('foo'), 'bar')
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.assertTrue(self.cache.has_key('foo'))
+        self.assertFalse(self.cache.has_key('missing'))
+
+        self.cache.delete('foo')
+        self.assertIsNone(self.cache.get('foo'))
+        self.assertIsNone(cache.get('foo'))
+
+        self.assertTrue(self.cache.add('foo', 1))
+        self.assertFalse(self.cache.add('foo', 2))
+        self.assertEqual(self.cache.incr('foo'), 2)
+        self.assertEqual(self.cache.get('foo'), 2)
+
+    def test_two_tier_cache_local(self):
+        """
+        Should serve the reads from the local tier
+        """
+        self.cache.set_many({'foo': 'bar', 'baz': 'qux'})
+        self.assertEqual(self.cache.get_many(['foo', 'baz']), {'foo': 'bar', 'baz': 'qux'})
+        cache.delete('foo')
+        self.assertEqual(self.cache.get('foo'), 'bar')
+
+        # Stored values can't be mutated
+        self.cache.set('set', set())
+        self.cache.get('set').add(1)
+        self.assertEqual(self.cache.get('set'), set())
+
+    def test_two_tier_cache_max_entries(self):
+        """
+        Should drop the least recently used entries
+        """
+        self.cache.set_many({'foo': 1, 'bar': 2, 'baz': 3})
+        self.cache.get('foo')
+        self.cache.get('bar')
+        self.cache.get('baz')
+        cache.clear()
+        self.assertIsNone(self.cache.get('foo'))
+        self.assertEqual(self.cache.get('baz'), 3)
+
+    def test_two_tier_cache_stamps(self):
+        """
+        Should drop the local entries written by other processes
+        """
+        options = {'STAMP_INTERVAL': 0, 'STAMP_SLOTS': 64}
+        other = TwoTierCache('default', {'OPTIONS': options})
+        self.cache = TwoTierCache('default', {'OPTIONS': options})
+        self.cache.set('foo', 'bar')
+        self.assertEqual(self.cache.get('foo'), 'bar')
+
+        # Simulate another process
+        other._local = type(self.cache._local)(max_entries=10)
+        other.set('foo', 'baz')
+        self.assertEqual(self.cache.get('foo'), 'baz')
+
+    def test_two_tier_cache_no_stamps(self):
+        """
+        Should write once to the shared cache
+        """
+        self.cache = TwoTierCache('default', {'OPTIONS': {'STAMP_SLOTS': 0}})
+        shared = self.cache.shared
+        written = []
+        org_set, shared.set = shared.set, lambda key, *args, **kwargs: written.append(key)
+
+        try:
+            self.cache.set('foo', 'bar')
+        finally:
+            shared.set = org_set
+
+        self.assertEqual(written, ['foo'])
+
+    def test_database_cache_incr(self):
+        """
+        Should incr and decr the stored value
+        """
+        db_cache = DatabaseCache('spirit_cache', {})
+        db_cache.clear()
+        self.assertRaises(ValueError, lambda: db_cache.incr('foo'))
+
+        db_cache.set('foo', 1)
+        self.assertEqual(db_cache.incr('foo'), 2)
+        self.assertEqual(db_cache.incr('foo', 10), 12)
+        self.assertEqual(db_cache.decr('foo', 2), 10)
+        self.assertEqual(db_cache.get('foo'), 10)
+
+        # Expired
+        db_cache.set('bar', 1, timeout=-1)
+        self.assertRaises(ValueError, lambda: db_cache.incr('bar'))
+
+    def test_has_atomic_incr(self):
+        """
+        Should tell the caches with an atomic incr
+        """
+        self.assertTrue(has_atomic_incr(DatabaseCache('spirit_cache', {})))
+        self.assertTrue(has_atomic_incr(LocMemCache('foo', {})))
+        self.assertTrue(has_atomic_incr(self.cache))
+        self.assertFalse(has_atomic_incr(DjangoDatabaseCache('spirit_cache', {})))
+
+    def test_database_cache_cull(self):
+        """
+        Should not count the rows on write, but\
+        delete the expired ones once per interval
+        """
+        db_cache = DatabaseCache('spirit_cache', {'OPTIONS': {'CULL_INTERVAL': 60}})
+        db_cache.clear()
+        DatabaseCache._culled.clear()
+        db_cache.set('quux', 1)
+        db_cache.set('foo', 1, timeout=-1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            db_cache.set('bar', 1)
+            db_cache.set('baz', 1)
+
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT' in q['sql']])
+        self.assertEqual(len([q for q in ctx.captured_queries if 'DELETE' in q['sql']]), 0)
+        self.assertTrue(db_cache.add('qux', 1))
+        self.assertFalse(db_cache.add('qux', 2))
+        self.assertEqual(db_cache.get('qux'), 1)
+
+        def rows():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT cache_key FROM spirit_cache")
+                return sorted(row[0] for row in cursor.fetchall())
+
+        self.assertIn(db_cache.make_key('foo'), rows())
+
+        DatabaseCache._culled.clear()
+        db_cache.set('bar', 2)
+        self.assertNotIn(db_cache.make_key('foo'), rows())
+        self.assertEqual(db_cache.get('bar'), 2)
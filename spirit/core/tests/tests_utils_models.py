@@ -3,7 +3,12 @@
 from __future__ import unicode_literals
 
 from django.test import TestCase
+from django.db import IntegrityError
 
+from ..utils.models import increments, bulk_create_missing
+from ...user.models import UserProfile
+from ...topic.notification.models import TopicNotification
+from . import utils
 from .models import AutoSlugPopulateFromModel, AutoSlugModel, AutoSlugDefaultModel, \
     AutoSlugBadPopulateFromModel
 
@@ -116,4 +121,45 @@ class UtilsModelsTests(TestCase):
         title = "s e  p   a    r     a     t    i   o  n s"
         foo_model = AutoSlugPopulateFromModel(title=title)
         foo_model.save()
-        self.assertEqual(foo_model.slug, "s-e-p-a-r-a-t-i-o-n-s")
\ No newline at end of file
+        self.assertEqual(foo_model.slug, "s-e-p-a-r-a-t-i-o-n-s")
+
+    def test_increments(self):
+        """
+        Should add the counts, subtractions stop at zero
+        """
+        user = utils.create_user()
+        profiles = UserProfile.objects.filter(user=user)
+        profiles.update(**increments(topic_count=2, comment_count=1, received_likes_count=0))
+        self.assertEqual(profiles.get().topic_count, 2)
+        self.assertEqual(profiles.get().comment_count, 1)
+
+        profiles.update(**increments(topic_count=-1, comment_count=-2))
+        self.assertEqual(profiles.get().topic_count, 1)
+        self.assertEqual(profiles.get().comment_count, 0)
+        self.assertEqual(increments(topic_count=0), {})
+
+    def test_bulk_create_missing(self):
+        """
+        Should skip the existing rows
+        """
+        user = utils.create_user()
+        user2 = utils.create_user()
+        comment = utils.create_comment(topic=utils.create_topic(utils.create_category()))
+        TopicNotification.objects.create(user=user, topic=comment.topic, comment=comment)
+        bulk_create_missing(
+            TopicNotification.objects.filter(topic=comment.topic),
+            [TopicNotification(user=u, topic=comment.topic, comment=comment, is_active=True)
+             for u in (user, user2)],
+            field='user')
+        self.assertEqual(TopicNotification.objects.filter(topic=comment.topic).count(), 2)
+        self.assertFalse(TopicNotification.objects.get(user=user).is_active)
+        self.assertTrue(TopicNotification.objects.get(user=user2).is_active)
+        bulk_create_missing(TopicNotification.objects.all(), [], field='user')
+
+        # Not a conflict
+        self.assertRaises(
+            IntegrityError,
+            lambda: bulk_create_missing(
+                TopicNotification.objects.filter(topic=comment.topic),
+                [TopicNotification(user=utils.create_user(), topic=comment.topic, comment_id=None)],
+                field='user'))
@@ -5,7 +5,9 @@ from __future__ import unicode_literals
 from django.core.cache import cache
 from django.test import TestCase, RequestFactory
 from django.template import Template, Context
-from django.test.utils import override_settings
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.db import connection
+from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.core.paginator import Page, Paginator
 
@@ -13,7 +15,8 @@ from ..tests import utils
 from ...comment.models import Comment
 from ..utils import paginator
 from ..utils.paginator import YTPaginator, InvalidPage, YTPage
-from ..utils.paginator import infinite_paginator, paginate, yt_paginate
+from ..utils.paginator import infinite_paginator, paginate, yt_paginate, keyset_paginate
+from ..utils.paginator import KeysetPaginator, PageIndex
 from ..tags.paginator import render_paginator
 from ..tags import paginator as ttag_paginator
 
@@ -138,6 +141,79 @@ class UtilsYTPaginatorTests(TestCase):
         page._max_pages = 3000
         self.assertEqual(page.num_pages, 30)
 
+    def test_yt_paginator_single_query(self):
+        """
+        Should fetch the page rows and the look-ahead in a single query
+        """
+        yt_paginator = YTPaginator(self.queryset, per_page=10)
+        expected = list(self.queryset[20:30])
+
+        with self.assertNumQueries(1):
+            page = yt_paginator.page(3)
+            self.assertListEqual(list(page), expected)
+            self.assertEqual(len(page), 10)
+            self.assertEqual(page.num_pages, 3 + 6)
+
+        # num_pages first
+        with self.assertNumQueries(1):
+            page = yt_paginator.page(3)
+            self.assertEqual(page.num_pages, 3 + 6)
+            self.assertListEqual(list(page), expected)
+
+    def test_yt_paginator_single_query_view(self):
+        """
+        Should query the topics once when rendering the view
+        """
+        category = utils.create_category()
+
+        for _ in range(3):
+            utils.create_topic(category)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('spirit:topic:index-active'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['topics']), 4)
+        topic_queries = [
+            query['sql']
+            for query in ctx.captured_queries
+            if 'FROM "spirit_topic_topic"' in query['sql']]
+        self.assertEqual(len(topic_queries), 1)
+
+    @override_settings(ST_YT_PAGINATOR_COUNT_TIMEOUT=60)
+    def test_yt_paginator_count(self):
+        """
+        Should reject the deep pages beyond the cached count
+        """
+        yt_paginator = YTPaginator(self.queryset, per_page=10)
+
+        # Not counted yet
+        with self.assertNumQueries(1):
+            self.assertRaises(InvalidPage, lambda: yt_paginator.page(31))
+
+        self.assertEqual(yt_paginator.count, 300)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(yt_paginator.count, 300)
+            self.assertRaises(InvalidPage, lambda: yt_paginator.page(31))
+
+        self.assertEqual(yt_paginator.page(30).number, 30)
+
+        yt_paginator = YTPaginator(list(range(0, 100)), per_page=10)
+        self.assertEqual(yt_paginator.count, 100)
+
+    @override_settings(ST_YT_PAGINATOR_COUNT_TIMEOUT=60)
+    def test_yt_paginator_count_last_page(self):
+        """
+        Should cache the count when a page reaches the end
+        """
+        yt_paginator = YTPaginator(self.queryset, per_page=10)
+        self.assertEqual(yt_paginator.page(28).num_pages, 30)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(yt_paginator.count, 300)
+            self.assertRaises(InvalidPage, lambda: yt_paginator.page(40))
+
     @override_settings(ST_YT_PAGINATOR_PAGE_RANGE=3)
     def test_yt_paginator_page_range(self):
         # 10 pages
@@ -165,6 +241,67 @@ class UtilsYTPaginatorTests(TestCase):
         self.assertListEqual(list(page.page_range), [1, 2])
 
 
+class UtilsKeysetPaginatorTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = utils.create_user()
+        self.topic = utils.create_topic(utils.create_category())
+
+        for _ in range(25):
+            utils.create_comment(user=self.user, topic=self.topic)
+
+        self.queryset = Comment.objects.filter(topic=self.topic).order_by('date', 'pk')
+
+    def test_keyset_paginator_page(self):
+        paginator = KeysetPaginator(self.queryset, per_page=10, cache_key='foo')
+        self.assertEqual(paginator.count, 25)
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertListEqual(list(paginator.page(1)), list(self.queryset[:10]))
+        self.assertListEqual(list(paginator.page(2)), list(self.queryset[10:20]))
+        self.assertListEqual(list(paginator.page(3)), list(self.queryset[20:]))
+        self.assertEqual(paginator.page(3).start_index(), 21)
+        self.assertRaises(InvalidPage, lambda: paginator.page(4))
+
+        # empty first page
+        paginator = KeysetPaginator(self.queryset.none(), per_page=10, cache_key='bar')
+        self.assertListEqual(list(paginator.page(1)), [])
+
+    def test_keyset_paginator_new_objects(self):
+        """
+        Should extend the cached index
+        """
+        paginator = KeysetPaginator(self.queryset, per_page=10, cache_key='foo')
+        self.assertEqual(paginator.num_pages, 3)
+
+        for _ in range(10):
+            utils.create_comment(user=self.user, topic=self.topic)
+
+        paginator = KeysetPaginator(self.queryset, per_page=10, cache_key='foo')
+        self.assertEqual(paginator.count, 35)
+        self.assertEqual(len(cache.get('foo')['boundaries']), 4)
+        self.assertListEqual(list(paginator.page(4)), list(self.queryset[30:]))
+
+        # per page change
+        paginator = KeysetPaginator(self.queryset, per_page=5, cache_key='foo')
+        self.assertEqual(paginator.num_pages, 7)
+        self.assertListEqual(list(paginator.page(7)), list(self.queryset[30:]))
+
+    def test_page_index_number_of(self):
+        index = PageIndex(self.queryset, per_page=10, cache_key='foo')
+        comments = list(self.queryset)
+
+        for number, comment in enumerate(comments, start=1):
+            self.assertEqual(index.number_of(date=comment.date, pk=comment.pk), number)
+
+    def test_keyset_paginate(self):
+        page = keyset_paginate(self.queryset, cache_key='foo', per_page=10, page_number=2)
+        self.assertIsInstance(page, Page)
+        self.assertListEqual(list(page), list(self.queryset[10:20]))
+        self.assertRaises(Http404, keyset_paginate,
+                          self.queryset, cache_key='foo', per_page=10, page_number=99)
+
+
 class UtilsYTPaginatorTemplateTagsTests(TestCase):
 
     def setUp(self):
@@ -2,6 +2,7 @@
 
 from __future__ import unicode_literals
 import hashlib
+import time
 
 from django.core.cache import cache
 from django.test import TestCase, RequestFactory
@@ -9,8 +10,11 @@ from django.contrib.auth.models import AnonymousUser, User
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.conf import settings
 from django.core.cache import caches
+from django.test.utils import override_settings
+from django.core.exceptions import ImproperlyConfigured
 
-from ..utils.ratelimit import RateLimit
+from ..utils.ratelimit import RateLimit, FixedWindow, SlidingWindow, TokenBucket
+from ..utils.ratelimit.engines import bucket
 from ..utils.ratelimit.decorators import ratelimit
 
 
@@ -128,7 +132,8 @@ class UtilsRateLimitTests(TestCase):
         req.user.pk = 1
         RateLimit(req, 'func_name')
         rl_cache = caches[settings.ST_RATELIMIT_CACHE]
-        self.assertIsNotNone(rl_cache.get('srl:02b3cee0bd2a40ec0fca9b1bef06fb560a081673'))
+        window = int(time.time()) // (60 * 5)
+        self.assertIsNotNone(rl_cache.get('srl:02b3cee0bd2a40ec0fca9b1bef06fb560a081673:%d' % window))
 
     def test_rate_limit_unique_key(self):
         """
@@ -148,4 +153,90 @@ class UtilsRateLimitTests(TestCase):
 
         one(req)
         rl_cache = caches[settings.ST_RATELIMIT_CACHE]
-        self.assertIsNotNone(rl_cache.get(key))
\ No newline at end of file
+        window = int(time.time()) // 60
+        self.assertIsNotNone(rl_cache.get('%s:%d' % (key, window)))
+
+    def test_rate_limit_fixed_window(self):
+        """
+        Should reset the count every window
+        """
+        now = [0]
+        engine = FixedWindow(cache=cache, timer=lambda: now[0])
+        self.assertEqual(engine.hit('foo', period=60), 1)
+        self.assertEqual(engine.hit('foo', period=60), 2)
+        now[0] = 59
+        self.assertEqual(engine.hit('foo', period=60), 3)
+        now[0] = 60
+        self.assertEqual(engine.hit('foo', period=60), 1)
+
+    def test_rate_limit_sliding_window(self):
+        """
+        Should weight the previous window count
+        """
+        now = [0]
+        engine = SlidingWindow(cache=cache, timer=lambda: now[0])
+
+        for _ in range(4):
+            engine.hit('foo', period=60)
+
+        now[0] = 60 + 15
+        self.assertEqual(engine.hit('foo', period=60), 1 + 4 * 0.75)
+        now[0] = 60 + 45
+        self.assertEqual(engine.hit('foo', period=60), 2 + 4 * 0.25)
+        now[0] = 60 * 3
+        self.assertEqual(engine.hit('foo', period=60), 1)
+
+    def test_rate_limit_token_bucket(self):
+        """
+        Should refill the tokens over the period
+        """
+        now = [0]
+        token_bucket = TokenBucket(max_size=1, timer=lambda: now[0])
+        self.assertTrue(token_bucket.consume('foo', limit=2, period=60))
+        self.assertTrue(token_bucket.consume('foo', limit=2, period=60))
+        self.assertFalse(token_bucket.consume('foo', limit=2, period=60))
+        now[0] = 30
+        self.assertTrue(token_bucket.consume('foo', limit=2, period=60))
+        self.assertFalse(token_bucket.consume('foo', limit=2, period=60))
+
+        # max_size
+        self.assertTrue(token_bucket.consume('bar', limit=1, period=60))
+        self.assertTrue(token_bucket.consume('foo', limit=1, period=60))
+
+    @override_settings(ST_RATELIMIT_PREFILTER=True)
+    def test_rate_limit_prefilter(self):
+        """
+        Should reject without hitting the cache when the bucket is empty
+        """
+        bucket.clear()
+        req = RequestFactory().post('/')
+        req.user = AnonymousUser()
+        self.assertFalse(RateLimit(req, 'func_name', rate='1/m').is_limited())
+        cache.clear()
+        self.assertTrue(RateLimit(req, 'func_name', rate='1/m').is_limited())
+        bucket.clear()
+
+    @override_settings(ST_RATELIMIT_ENGINE='spirit.core.utils.ratelimit.FixedWindow')
+    def test_rate_limit_engine(self):
+        """
+        Should use the configured engine
+        """
+        req = RequestFactory().post('/')
+        req.user = AnonymousUser()
+        rl = RateLimit(req, 'func_name', rate='2/m')
+        self.assertEqual(list(rl.cache_values.values()), [1])
+        self.assertIsInstance(rl._get_engine(), FixedWindow)
+        self.assertNotIsInstance(rl._get_engine(), SlidingWindow)
+
+    @override_settings(
+        CACHES=dict(settings.CACHES, not_atomic={
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'spirit_cache'}),
+        ST_RATELIMIT_CACHE='not_atomic')
+    def test_rate_limit_cache_not_atomic(self):
+        """
+        Should refuse a cache without an atomic incr
+        """
+        req = RequestFactory().post('/')
+        req.user = AnonymousUser()
+        self.assertRaises(ImproperlyConfigured, lambda: RateLimit(req, 'func_name', rate='2/m'))
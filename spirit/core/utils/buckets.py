@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import calendar
+
+from django.utils import timezone
+
+
+def _bucket_key(prefix, minute):
+    # The count of values recorded within the minute
+    return '%s:minute:%d' % (prefix, minute)
+
+
+def _slot_key(prefix, minute, slot):
+    return '%s:minute:%d:%d' % (prefix, minute, slot)
+
+
+def minute(date=None):
+    """
+    Return the minutes since the epoch
+    """
+    date = date or timezone.now()
+    return calendar.timegm(date.utctimetuple()) // 60
+
+
+def add(cache, prefix, value, timeout, date=None):
+    """
+    Record the value in the bucket of the minute.\
+    Each value gets its own slot, the incr\
+    is atomic on memcached and redis
+    """
+    current = minute(date)
+    key = _bucket_key(prefix, current)
+
+    try:
+        slot = cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=timeout):
+            slot = 1
+        else:
+            slot = cache.incr(key)
+
+    cache.set(_slot_key(prefix, current, slot), value, timeout=timeout)
+
+
+def get(cache, prefix, minutes):
+    """
+    Return the set of values recorded\
+    within the *minutes* (an iterable)
+    """
+    minutes = list(minutes)
+    counts = cache.get_many([_bucket_key(prefix, m) for m in minutes])
+    slot_keys = [
+        _slot_key(prefix, m, slot)
+        for m in minutes
+        for slot in range(1, counts.get(_bucket_key(prefix, m), 0) + 1)
+    ]
+    return set(cache.get_many(slot_keys).values())
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+import zlib
+import base64
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends import db
+from django.db import connections, router, transaction, DatabaseError
+from django.db.backends.utils import typecast_timestamp
+from django.utils import timezone, six
+from django.utils.encoding import force_bytes
+from django.utils.six.moves import cPickle as pickle
+from django.conf import settings
+
+__all__ = ['TwoTierCache', 'DatabaseCache', 'has_atomic_incr', 'cull']
+
+_MISSING = object()
+
+# Per process, shared between threads
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+class LocalTier(object):
+    """
+    A bounded LRU of pickled values\
+    plus the last known stamps
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.stamps = {}
+        self.stamps_checked = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None:
+                self._entries[key] = entry
+
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stamps = {}
+            self.stamps_checked = 0
+
+
+class TwoTierCache(BaseCache):
+    """
+    A bounded in-process LRU over a shared cache.\
+    The *LOCATION* is the alias of the shared cache.
+
+    Local entries live LOCAL_TIMEOUT seconds at most,\
+    so the writes of other processes may lag that long.
+
+    With STAMP_SLOTS, writes also bump a stamp (of one\
+    of the slots) in the shared cache, the other processes\
+    check the stamps once per STAMP_INTERVAL and drop the\
+    entries of the bumped slots. That's an extra shared\
+    write per write, STAMP_SLOTS=0 turns them off\
+    (LOCAL_TIMEOUT is the lag then). incr() and\
+    decr() never bump them
+    """
+    def __init__(self, location, params):
+        super(TwoTierCache, self).__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._stamp_interval = options.get('STAMP_INTERVAL', 1)
+        self._stamp_slots = options.get('STAMP_SLOTS', 64)
+        self._stamp_keys = [
+            'spirit:cache:stamp:%d' % slot
+            for slot in range(self._stamp_slots)
+        ]
+
+        with _local_tiers_lock:
+            self._local = _local_tiers.setdefault(
+                location, LocalTier(max_entries=options.get('LOCAL_MAX_ENTRIES', 1000)))
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_key(self, key, version=None):
+        return self.shared.make_key(key, version=version)
+
+    def _slot(self, local_key):
+        if not self._stamp_slots:
+            return 0
+
+        return zlib.crc32(local_key.encode('utf-8')) % self._stamp_slots
+
+    def _get_stamps(self):
+        if not self._stamp_slots:
+            return self._local.stamps
+
+        now = time.time()
+
+        if now - self._local.stamps_checked >= self._stamp_interval:
+            stamps = self.shared.get_many(self._stamp_keys)
+            self._local.stamps = {
+                slot: stamps.get(key, 0)
+                for slot, key in enumerate(self._stamp_keys)
+            }
+            self._local.stamps_checked = now
+
+        return self._local.stamps
+
+    def _bump_stamp(self, slot):
+        key = self._stamp_keys[slot]
+
+        try:
+            self.shared.incr(key)
+        except ValueError:
+            if not self.shared.add(key, 1, timeout=None):
+                self.shared.incr(key)
+
+    def _invalidate(self, keys, version=None):
+        local_keys = [self._local_key(key, version=version) for key in keys]
+
+        for local_key in local_keys:
+            self._local.delete(local_key)
+
+        if not self._stamp_slots:
+            return
+
+        for slot in set(self._slot(local_key) for local_key in local_keys):
+            self._bump_stamp(slot)
+
+    def _get_local(self, local_key, stamps):
+        entry = self._local.get(local_key)
+
+        if entry is None:
+            return _MISSING
+
+        pickled, expires, stamp = entry
+
+        if expires <= time.time() or stamp != stamps.get(self._slot(local_key), 0):
+            self._local.delete(local_key)
+            return _MISSING
+
+        return pickled
+
+    def _set_local(self, local_key, value, stamps):
+        # Pickled so callers can't mutate the stored value
+        if value is not None:
+            value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        expires = time.time() + self._local_timeout
+        self._local.set(local_key, (value, expires, stamps.get(self._slot(local_key), 0)))
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        stamps = self._get_stamps()
+        values = {}
+        missing = []
+
+        for key in keys:
+            pickled = self._get_local(self._local_key(key, version=version), stamps)
+
+            if pickled is _MISSING:
+                missing.append(key)
+            elif pickled is not None:
+                values[key] = pickle.loads(pickled)
+
+        if not missing:
+            return values
+
+        shared_values = self.shared.get_many(missing, version=version)
+
+        # Misses are stored as None
+        for key in missing:
+            self._set_local(self._local_key(key, version=version), shared_values.get(key), stamps)
+
+        values.update(shared_values)
+        return values
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self._invalidate([key], version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set_many(data, timeout=timeout, version=version)
+        self._invalidate(list(data.keys()), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+
+        if added:
+            self._invalidate([key], version=version)
+
+        return added
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self._invalidate([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        self.shared.delete_many(keys, version=version)
+        self._invalidate(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta=delta, version=version)
+        self._local.delete(self._local_key(key, version=version))
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self.shared.decr(key, delta=delta, version=version)
+        self._local.delete(self._local_key(key, version=version))
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self._local.clear()
+
+
+class DatabaseCache(db.DatabaseCache):
+    """
+    The Django database cache with an atomic incr()\
+    and decr(). The row is locked (the table on sqlite)\
+    by a no-op UPDATE, before reading the value.
+
+    The writes don't count the rows (and cull them\
+    past MAX_ENTRIES), the expired ones are deleted\
+    once per CULL_INTERVAL seconds per process\
+    and by cull() (spiritrunjobs), so MAX_ENTRIES\
+    is ignored
+    """
+    # Per process, the last cull of each table
+    _culled = {}
+
+    def __init__(self, table, params):
+        super(DatabaseCache, self).__init__(table, params)
+        options = params.get('OPTIONS', {})
+        self._cull_interval = options.get('CULL_INTERVAL', 60 * 5)
+
+    def _maybe_cull(self):
+        now = time.time()
+
+        if now - self._culled.get(self._table, 0) < self._cull_interval:
+            return
+
+        self._culled[self._table] = now
+        cull(self)
+
+    def _base_set(self, mode, key, value, timeout=DEFAULT_TIMEOUT):
+        # Same as the Django one, without the COUNT(*)
+        self._maybe_cull()
+        timeout = self.get_backend_timeout(timeout)
+        alias = router.db_for_write(self.cache_model_class)
+        connection = connections[alias]
+        table = connection.ops.quote_name(self._table)
+        now = timezone.now().replace(microsecond=0)
+
+        if timeout is None:
+            expires = datetime.max
+        elif settings.USE_TZ:
+            expires = datetime.utcfromtimestamp(timeout)
+        else:
+            expires = datetime.fromtimestamp(timeout)
+
+        expires = connection.ops.value_to_db_datetime(expires.replace(microsecond=0))
+        encoded = base64.b64encode(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        if six.PY3:
+            encoded = encoded.decode('latin1')
+
+        try:
+            with transaction.atomic(using=alias), connection.cursor() as cursor:
+                cursor.execute("SELECT cache_key, expires FROM %s "
+                               "WHERE cache_key = %%s" % table, [key])
+                row = cursor.fetchone()
+
+                if row is not None:
+                    current_expires = row[1]
+
+                    if (connection.features.needs_datetime_string_cast and
+                            not isinstance(current_expires, datetime)):
+                        current_expires = typecast_timestamp(str(current_expires))
+
+                if row is not None and (mode == 'set' or current_expires < now):
+                    cursor.execute("UPDATE %s SET value = %%s, expires = %%s "
+                                   "WHERE cache_key = %%s" % table,
+                                   [encoded, expires, key])
+                else:
+                    cursor.execute("INSERT INTO %s (cache_key, value, expires) "
+                                   "VALUES (%%s, %%s, %%s)" % table,
+                                   [key, encoded, expires])
+        except DatabaseError:
+            # A concurrent insert, same as the Django one
+            return False
+
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_key(key, version=version)
+        self.validate_key(cache_key)
+        alias = router.db_for_write(self.cache_model_class)
+        connection = connections[alias]
+        table = connection.ops.quote_name(self._table)
+
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute("UPDATE %s SET expires = expires "
+                           "WHERE cache_key = %%s" % table, [cache_key])
+            cursor.execute("SELECT value, expires FROM %s "
+                           "WHERE cache_key = %%s" % table, [cache_key])
+            row = cursor.fetchone()
+
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+
+            value, expires = row
+
+            if connection.features.needs_datetime_string_cast and not isinstance(expires, datetime):
+                expires = typecast_timestamp(str(expires))
+
+            if expires < timezone.now():
+                raise ValueError("Key '%s' not found" % key)
+
+            value = connection.ops.process_clob(value)
+            value = pickle.loads(base64.b64decode(force_bytes(value))) + delta
+            encoded = base64.b64encode(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+            if six.PY3:
+                encoded = encoded.decode('latin1')
+
+            cursor.execute("UPDATE %s SET value = %%s "
+                           "WHERE cache_key = %%s" % table, [encoded, cache_key])
+
+        return value
+
+
+def has_atomic_incr(cache):
+    """
+    Return whether the cache incr() is atomic,\
+    the base incr() is a get() and a set()
+    """
+    if isinstance(cache, TwoTierCache):
+        cache = cache.shared
+
+    return (six.get_unbound_function(type(cache).incr) is not
+            six.get_unbound_function(BaseCache.incr))
+
+
+def cull(cache):
+    """
+    Delete the expired entries of a DatabaseCache.\
+    The backend does this within set() once it\
+    has MAX_ENTRIES, this is meant to run\
+    in the background instead. Returns\
+    the count of deleted entries
+    """
+    db = router.db_for_write(cache.cache_model_class)
+    connection = connections[db]
+    table = connection.ops.quote_name(cache._table)
+    # Same as the backend, expires is stored naive
+    now = timezone.now().replace(microsecond=0, tzinfo=None)
+
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM %s WHERE expires < %%s" % table,
+                       [connection.ops.value_to_db_datetime(now)])
+        return cursor.rowcount
@@ -3,24 +3,29 @@
 from __future__ import unicode_literals
 import re
 import copy
-import os
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.urlresolvers import reverse
 
 import mistune
 
-from .utils.emoji import emojis
+from .utils.emoji import get_emoji_urls
+from .utils import mention
 
 User = get_user_model()
 
+mention_search = re.compile(
+    r'@(?P<username>[\w.@+-]+)',
+    flags=re.UNICODE
+)
 
-class InlineGrammar(mistune.InlineGrammar):
+emoji_search = re.compile(
+    r':(?P<emoji>[A-Za-z0-9_\-\+]+?):'
+)
 
-    emoji = re.compile(
-        r'^:(?P<emoji>[A-Za-z0-9_\-\+]+?):'
-    )
+
+class InlineGrammar(mistune.InlineGrammar):
 
     mention = re.compile(
         r'^@(?P<username>[\w.@+-]+)',
@@ -29,17 +34,17 @@ class InlineGrammar(mistune.InlineGrammar):
 
     # Override
     def hard_wrap(self):
-        # Adds ":" and "@" as a valid text character, so we can match emojis and mentions.
+        # Adds "@" as a valid text character, so we can match mentions.
+        # Emojis are replaced within the text, see output_text
         self.linebreak = re.compile(r'^ *\n(?!\s*$)')
         self.text = re.compile(
-            r'^[\s\S]+?(?=[\\<!\[_*`:@~]|https?://| *\n|$)'
+            r'^[\s\S]+?(?=[\\<!\[_*`@~]|https?://| *\n|$)'
         )
 
 
 class InlineLexer(mistune.InlineLexer):
 
     default_features = copy.copy(mistune.InlineLexer.default_features)
-    default_features.insert(0, 'emoji')
     default_features.insert(0, 'mention')
 
     def __init__(self, renderer, rules=None, **kwargs):
@@ -48,28 +53,62 @@ class InlineLexer(mistune.InlineLexer):
 
         super(InlineLexer, self).__init__(renderer, rules, **kwargs)
 
+        self.reset()
+
+    def reset(self):
         self.mentions = {}
         self._mention_count = 0
+        self._users = {}
+        self._preloaded = set()
 
-    def output_emoji(self, m):
-        emoji = m.group('emoji')
+    def preload_mentions(self, text):
+        """
+        Resolve the mentioned users of the whole\
+        text at once, the mentions limit\
+        applies to the candidates
+        """
+        usernames = []
 
-        if emoji not in emojis:
-            return m.group(0)
+        for m in mention_search.finditer(text):
+            username = m.group('username')
+
+            if username in usernames:
+                continue
+
+            if len(usernames) >= settings.ST_MENTIONS_PER_COMMENT:
+                break
+
+            usernames.append(username)
 
-        image = emoji + '.png'
-        rel_path = os.path.join('spirit', 'emojis', image).replace('\\', '/')
-        path = staticfiles_storage.url(rel_path)
+        if usernames:
+            self._users = mention.resolve(usernames)
 
-        return self.renderer.emoji(path)
+        self._preloaded = set(usernames)
+
+    def output_text(self, m):
+        text = super(InlineLexer, self).output_text(m)
+
+        if ':' not in text:
+            return text
+
+        emoji_urls = get_emoji_urls()
+
+        def emojify(m_emoji):
+            url = emoji_urls.get(m_emoji.group('emoji'))
+
+            if url is None:
+                return m_emoji.group(0)
+
+            return self.renderer.emoji(url)
+
+        return emoji_search.sub(emojify, text)
 
     def output_mention(self, m):
         username = m.group('username')
 
         # Already mentioned?
         if username in self.mentions:
-            user = self.mentions[username]
-            return self.renderer.mention(username, user.st.get_absolute_url())
+            return self._render_mention(username)
 
         # Mentions limiter
         if self._mention_count >= settings.ST_MENTIONS_PER_COMMENT:
@@ -78,13 +117,19 @@ class InlineLexer(mistune.InlineLexer):
         # We increase this before doing the query to avoid abuses
         self._mention_count += 1
 
-        # New mention
-        try:
-            user = User.objects\
-                .select_related('st')\
-                .get(username=username)
-        except User.DoesNotExist:
+        # New mention, the preloading may miss
+        # some (ie: mentions after a code block)
+        if username not in self._preloaded:
+            self._users.update(mention.resolve([username]))
+
+        if username not in self._users:
             return m.group(0)
 
-        self.mentions[username] = user
-        return self.renderer.mention(username, user.st.get_absolute_url())
+        pk, _ = self._users[username]
+        self.mentions[username] = User(pk=pk, username=username)
+        return self._render_mention(username)
+
+    def _render_mention(self, username):
+        pk, slug = self._users[username]
+        url = reverse('spirit:user:detail', kwargs={'pk': pk, 'slug': slug})
+        return self.renderer.mention(username, url)
@@ -2,6 +2,8 @@
 
 from __future__ import unicode_literals
 
+import threading
+
 import mistune
 
 from .block import BlockLexer
@@ -24,6 +26,8 @@ class Markdown(mistune.Markdown):
             super(Markdown, self).__init__(renderer=renderer, **kwargs)
 
         def render(self, text):
+            self.inline.reset()
+            self.inline.preload_mentions(text)
             return super(Markdown, self).render(text).strip()
 
         def get_mentions(self):
@@ -43,3 +47,19 @@ class Markdown(mistune.Markdown):
 
         def parse_vimeo(self):
             return self.renderer.vimeo(video_id=self.token['video_id'])
+
+
+_local = threading.local()
+
+
+def get_markdown():
+    """
+    Return the comments renderer of the current thread.\
+    Building the lexers is expensive and they\
+    are not thread safe, so each thread reuses its own
+    """
+    try:
+        return _local.markdown
+    except AttributeError:
+        _local.markdown = Markdown(escape=True, hard_wrap=True)
+        return _local.markdown
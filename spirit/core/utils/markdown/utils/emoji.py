@@ -2,6 +2,8 @@
 
 from __future__ import unicode_literals
 
+from django.contrib.staticfiles.storage import staticfiles_storage
+
 
 emojis = {
     "+1", "-1", "100", "1234", "8ball", "a", "ab", "abc", "abcd", "accept", "aerial_tramway", "airplane",
@@ -114,3 +116,21 @@ emojis = {
     "wink", "wolf", "woman", "womans_clothes", "womans_hat", "womens", "worried", "wrench", "x", "yellow_heart",
     "yen", "yum", "zap", "zero", "zzz",
 }
+
+
+_emoji_urls = {}
+
+
+def get_emoji_urls():
+    """
+    Return a dict of emoji name: static url.\
+    Built on the first call, the static\
+    storage may not be ready on start up
+    """
+    if not _emoji_urls:
+        _emoji_urls.update({
+            emoji: staticfiles_storage.url('spirit/emojis/%s.png' % emoji)
+            for emoji in emojis
+        })
+
+    return _emoji_urls
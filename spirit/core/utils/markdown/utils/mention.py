@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def _cache_key(username):
+    username_hash = hashlib.sha1(username.encode('utf-8')).hexdigest()
+    return 'spirit:mention:%s' % username_hash
+
+
+def resolve(usernames):
+    """
+    Return a dict of username: (pk, slug) of\
+    the existing users. The lookups, including the\
+    not found ones, are cached until the user gets saved
+    """
+    cache = caches[settings.ST_MENTIONS_CACHE]
+    keys = {_cache_key(username): username for username in usernames}
+    found = {keys[key]: value for key, value in cache.get_many(list(keys.keys())).items()}
+    missing = [username for username in usernames if username not in found]
+
+    if missing:
+        users = User.objects\
+            .filter(username__in=missing)\
+            .values_list('pk', 'username', 'st__slug')
+        fetched = {username: (pk, slug) for pk, username, slug in users}
+        resolved = {username: fetched.get(username, ()) for username in missing}
+        cache.set_many(
+            {_cache_key(username): value for username, value in resolved.items()},
+            timeout=settings.ST_MENTIONS_CACHE_TIMEOUT
+        )
+        found.update(resolved)
+
+    return {username: tuple(value) for username, value in found.items() if value}
+
+
+def invalidate(username):
+    caches[settings.ST_MENTIONS_CACHE].delete(_cache_key(username))
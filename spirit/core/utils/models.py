@@ -4,12 +4,14 @@ from __future__ import unicode_literals
 
 from slugify import slugify as unicode_slugify
 
-from django.db.models.fields import SlugField
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Case, When, Value, sql
+from django.db.models.fields import SlugField, PositiveIntegerField, AutoField
 from django.utils.encoding import smart_text
 from django.utils.text import slugify
 from django.conf import settings
 
-__all__ = ['AutoSlugField', ]
+__all__ = ['AutoSlugField', 'increments', 'bulk_create_missing']
 
 
 class AutoSlugField(SlugField):
@@ -61,3 +63,105 @@ class AutoSlugField(SlugField):
             kwargs['populate_from'] = self.populate_from
 
         return name, path, args, kwargs
+
+
+def increments(**counts):
+    """
+    Return the update() expressions adding the\
+    counts to the counter fields. Subtractions stop\
+    at zero, since the counters may drift. ie:\
+    Model.objects.update(**increments(foo_count=-1))
+    """
+    fields = {}
+
+    for name, count in counts.items():
+        if count > 0:
+            fields[name] = F(name) + count
+        elif count < 0:
+            fields[name] = Case(
+                When(then=F(name) + count, **{name + '__gte': -count}),
+                default=Value(0),
+                output_field=PositiveIntegerField())
+
+    return fields
+
+
+def _can_ignore_conflicts(connection):
+    # SQLite's INSERT OR IGNORE would skip
+    # the NOT NULL and CHECK violations as well
+    return (connection.vendor == 'postgresql' and
+            connection.pg_version >= 90500)
+
+
+def _unique_columns(model, field):
+    for names in model._meta.unique_together:
+        if field in names:
+            return [model._meta.get_field(name).column for name in names]
+
+    return [model._meta.get_field(field).column]
+
+
+def _insert_ignore_conflicts(model, objs, field, using):
+    connection = connections[using]
+    # Only the conflicts of the constraint are skipped
+    on_conflict = ' ON CONFLICT (%s) DO NOTHING' % ', '.join(
+        connection.ops.quote_name(column)
+        for column in _unique_columns(model, field))
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if not isinstance(field, AutoField)
+    ]
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+
+    with transaction.atomic(using=using, savepoint=False):
+        for start in range(0, len(objs), batch_size):
+            query = sql.InsertQuery(model)
+            query.insert_values(fields, objs[start:start + batch_size])
+            statements = query.get_compiler(using=using).as_sql()
+
+            with connection.cursor() as cursor:
+                for statement, params in statements:
+                    cursor.execute(statement + on_conflict, params)
+
+
+def bulk_create_missing(queryset, objs, field):
+    """
+    Insert the objects skipping the ones that\
+    conflict with an existing row. The *queryset*\
+    is the unique constraint scope and *field* is\
+    the constraint field varying between the objects.\
+    Postgres 9.5+ skips the conflicts on insert,\
+    other backends select the existing rows first.\
+    Other integrity errors are raised. ie:\
+    bulk_create_missing(Model.objects.filter(topic=topic), objs, field='user')
+    """
+    if not objs:
+        return
+
+    model = queryset.model
+    using = router.db_for_write(model)
+
+    if _can_ignore_conflicts(connections[using]):
+        _insert_ignore_conflicts(model, objs, field=field, using=using)
+        return
+
+    attname = model._meta.get_field(field).attname
+    existing = set(
+        queryset
+        .filter(**{field + '__in': [getattr(obj, attname) for obj in objs]})
+        .values_list(field, flat=True))
+    missing = [obj for obj in objs if getattr(obj, attname) not in existing]
+
+    try:
+        with transaction.atomic(using=using):
+            model.objects.bulk_create(missing)
+    except IntegrityError:
+        # Some were created concurrently
+        for obj in missing:
+            try:
+                with transaction.atomic(using=using):
+                    obj.save(force_insert=True, using=using)
+            except IntegrityError:
+                if not queryset.filter(**{field: getattr(obj, attname)}).exists():
+                    raise
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import translation
+
+ACTIVE = 'active'
+
+
+def topic_key(pk):
+    return 'topic:%s' % pk
+
+
+def category_key(pk):
+    return 'category:%s' % pk
+
+
+def _cache():
+    return caches[settings.ST_PAGE_CACHE]
+
+
+def _version_key(key):
+    return 'spirit:page:version:%s' % key
+
+
+def _get_versions(keys):
+    """
+    The version of a surrogate key changes on each purge.\
+    A missing (evicted) version gets a new one, so\
+    a page cached for the old one is never served
+    """
+    cache = _cache()
+    version_keys = [_version_key(key) for key in keys]
+    versions = cache.get_many(version_keys)
+
+    for version_key in version_keys:
+        if version_key not in versions:
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            versions[version_key] = cache.get(version_key)
+
+    return [versions[version_key] for version_key in version_keys]
+
+
+def _page_key(request, keys):
+    page = '%s:%s:%s' % (
+        translation.get_language(),
+        request.get_host(),
+        request.get_full_path())
+    page_hash = hashlib.md5(page.encode('utf-8')).hexdigest()
+    versions = ':'.join(str(version) for version in _get_versions(keys))
+    return 'spirit:page:%s:%s' % (page_hash, versions)
+
+
+def purge(*keys):
+    _cache().set_many(
+        {_version_key(key): uuid.uuid4().hex for key in keys},
+        timeout=None)
+
+
+def tag(response, *keys):
+    """
+    Tag the response with more surrogate keys,\
+    the ones not known before running the view\
+    (ie: the topic category). Returns the response
+    """
+    response.surrogate_keys = getattr(response, 'surrogate_keys', ()) + keys
+    return response
+
+
+def _is_fresh(versions):
+    # The versions of the keys tagged by the view
+    if not versions:
+        return True
+
+    keys = list(versions.keys())
+    return _get_versions(keys) == [versions[key] for key in keys]
+
+
+def _is_cacheable(request, response):
+    return (response.status_code == 200 and
+            not response.cookies and
+            not request.META.get('CSRF_COOKIE_USED'))
+
+
+def anonymous_page_cache(*keys, **options):
+    """
+    Cache the whole page for anonymous users.\
+    The page is tagged with the surrogate keys\
+    (formatted with the view kwargs) and the ones\
+    added by the view (see tag()), purging any\
+    of them expires the page. The *on_hit* callable\
+    gets called (as the view) when the page is served\
+    from the cache. ie:\
+    @anonymous_page_cache('topic:{pk}', on_hit=count_view)
+    """
+    on_hit = options.get('on_hit')
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.ST_PAGE_CACHE_ENABLE or
+                    request.method != 'GET' or
+                    request.user.is_authenticated()):
+                return view_func(request, *args, **kwargs)
+
+            cache = _cache()
+            page_key = _page_key(request, [key.format(**kwargs) for key in keys])
+            page = cache.get(page_key)
+
+            if page is not None and _is_fresh(page[0]):
+                if on_hit is not None:
+                    on_hit(request, *args, **kwargs)
+
+                return page[1]
+
+            response = view_func(request, *args, **kwargs)
+
+            if _is_cacheable(request, response):
+                tagged = getattr(response, 'surrogate_keys', ())
+                versions = dict(zip(tagged, _get_versions(tagged)))
+                cache.set(page_key, (versions, response), timeout=settings.ST_PAGE_CACHE_TIMEOUT)
+
+            return response
+
+        return wrapper
+
+    return decorator
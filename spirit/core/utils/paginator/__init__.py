@@ -2,11 +2,26 @@
 
 from __future__ import unicode_literals
 
+import functools
+
 from django.core.paginator import InvalidPage, Paginator
 from django.http import Http404
 from django.utils.http import urlencode
 
 from .yt_paginator import YTPaginator, YTPage
+from .keyset_paginator import KeysetPaginator, PageIndex
+
+__all__ = [
+    'YTPaginator',
+    'YTPage',
+    'KeysetPaginator',
+    'PageIndex',
+    'get_page_number',
+    'get_url',
+    'paginate',
+    'yt_paginate',
+    'keyset_paginate'
+]
 
 
 def get_page_number(obj_number, per_page):
@@ -43,4 +58,9 @@ def paginate(*args, **kwargs):
 
 
 def yt_paginate(*args, **kwargs):
-    return _paginate(YTPaginator, *args, **kwargs)
\ No newline at end of file
+    return _paginate(YTPaginator, *args, **kwargs)
+
+
+def keyset_paginate(object_list, cache_key, *args, **kwargs):
+    paginator_class = functools.partial(KeysetPaginator, cache_key=cache_key)
+    return _paginate(paginator_class, object_list, *args, **kwargs)
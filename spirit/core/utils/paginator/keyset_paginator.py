@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import bisect
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+def _cache():
+    return caches[settings.ST_COMMENT_PAGES_CACHE]
+
+
+def _seek(object_list, key):
+    date, pk = key
+    return object_list.filter(Q(date__gt=date) | Q(date=date, pk__gte=pk))
+
+
+class PageIndex(object):
+    """
+    Keeps the (date, pk) key of the first object\
+    of every page, so a page can be fetched without\
+    scanning the ones before it.
+
+    The index is cached for ST_COMMENT_PAGES_CACHE_TIMEOUT,\
+    only the last page and the objects added after it\
+    are read again. It must be invalidated when objects\
+    are inserted before the last page
+    """
+
+    def __init__(self, object_list, per_page, cache_key):
+        self.object_list = object_list.order_by('date', 'pk')
+        self.per_page = per_page
+        self.cache_key = cache_key
+        self.boundaries, self.count = self._load()
+
+    def _load(self):
+        cache = _cache()
+        index = cache.get(self.cache_key)
+        known = []
+        object_list = self.object_list
+
+        if index is not None and index['per_page'] == self.per_page and index['boundaries']:
+            # The last page may have grown
+            known = index['boundaries'][:-1]
+            object_list = _seek(object_list, index['boundaries'][-1])
+
+        keys = list(
+            object_list
+            .prefetch_related(None)
+            .values_list('date', 'pk')
+        )
+        boundaries = known + keys[::self.per_page]
+        count = len(known) * self.per_page + len(keys)
+
+        if index is None or index['boundaries'] != boundaries:
+            cache.set(
+                self.cache_key,
+                {'per_page': self.per_page, 'boundaries': boundaries},
+                timeout=settings.ST_COMMENT_PAGES_CACHE_TIMEOUT)
+
+        return boundaries, count
+
+    def page_list(self, number):
+        if number > len(self.boundaries):
+            return self.object_list.none()
+
+        return _seek(self.object_list, self.boundaries[number - 1])[:self.per_page]
+
+    def number_of(self, date, pk):
+        """
+        Return the 1-based position of the object
+        """
+        key = (date, pk)
+        page_number = bisect.bisect_right(self.boundaries, key)
+
+        if not page_number:
+            return 0
+
+        position = _seek(self.object_list, self.boundaries[page_number - 1])\
+            .filter(Q(date__lt=date) | Q(date=date, pk__lte=pk))\
+            .count()
+
+        return (page_number - 1) * self.per_page + position
+
+    @classmethod
+    def invalidate(cls, cache_key):
+        _cache().delete(cache_key)
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator that seeks pages through a\
+    (date, pk) ordered queryset instead\
+    of using COUNT and OFFSET
+    """
+
+    def __init__(self, object_list, per_page, cache_key, **kwargs):
+        super(KeysetPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.index = PageIndex(object_list, per_page, cache_key)
+
+    def _get_count(self):
+        return self.index.count
+
+    count = property(_get_count)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        return self._get_page(self.index.page_list(number), number, self)
@@ -2,10 +2,19 @@
 
 from __future__ import unicode_literals
 
+import hashlib
+
 from django.core.paginator import InvalidPage
+from django.core.cache import caches
+from django.db.models.query import QuerySet, prefetch_related_objects
 from django.conf import settings
 
 
+def _count_key(object_list):
+    sql = str(object_list.query).encode('utf-8')
+    return 'spirit:yt:count:%s' % hashlib.md5(sql).hexdigest()
+
+
 class YTPaginator(object):
     """
     It'll limit the page list to a given limit
@@ -28,16 +37,58 @@ class YTPaginator(object):
 
         return number
 
+    @property
+    def count(self):
+        """
+        Return the cached row count, the\
+        cache is keyed by the query signature
+        """
+        if not isinstance(self.object_list, QuerySet):
+            try:
+                return self.object_list.count()
+            except (AttributeError, TypeError):
+                # If has no count() method or requires arguments
+                return len(self.object_list)
+
+        count = self._get_cached_count()
+
+        if count is None:
+            count = self.object_list.count()
+            self._set_cached_count(count)
+
+        return count
+
+    def _get_cached_count(self):
+        if not settings.ST_YT_PAGINATOR_COUNT_TIMEOUT:
+            return
+
+        cache = caches[settings.ST_YT_PAGINATOR_COUNT_CACHE]
+        return cache.get(_count_key(self.object_list))
+
+    def _set_cached_count(self, count):
+        if not settings.ST_YT_PAGINATOR_COUNT_TIMEOUT:
+            return
+
+        cache = caches[settings.ST_YT_PAGINATOR_COUNT_CACHE]
+        cache.set(_count_key(self.object_list), count, timeout=settings.ST_YT_PAGINATOR_COUNT_TIMEOUT)
+
     def page(self, number):
         """
         Returns a Page object for the given 1-based page number.
         """
         number = self.validate_number(number)
-        offset = (number - 1) * self.per_page
-        limit = offset + self.per_page
+        max_pages = settings.ST_YT_PAGINATOR_PAGE_RANGE * 2 + 1
 
-        object_list = self.object_list[offset:limit]
-        page = YTPage(object_list, number, self)
+        # Deep pages beyond the end are rejected without
+        # the offset scan. The count gets cached when a\
+        # page reaches the end, it's never counted here
+        if number > max_pages and isinstance(self.object_list, QuerySet):
+            count = self._get_cached_count()
+
+            if count is not None and (number - 1) * self.per_page >= count:
+                raise InvalidPage("That page contains no results")
+
+        page = YTPage(self.object_list, number, self)
 
         if not page.num_pages:
             if number != 1 or not self.allow_empty_first_page:
@@ -58,39 +109,63 @@ class YTPage(object):
         return '<Page %s>' % self.number
 
     def __len__(self):
+        self._fetch()
         return len(self.object_list)
 
     def __getitem__(self, index):
-        if not isinstance(self.object_list, list):
-            self.object_list = list(self.object_list)
-
+        self._fetch()
         return self.object_list[index]
 
-    @property
-    def num_pages(self):
+    def _fetch(self):
         """
-        Return the number of pages
-        relative to the current page
-        limited by max_pages
+        Fetch the rows of the page along the rows\
+        of the look-ahead pages, in a single query.\
+        The page rows and the number of pages\
+        come from that, whatever gets evaluated first
         """
         if self._num_pages is not None:
-            return self._num_pages
+            return
 
-        offset = (self.number - 1) * self.paginator.per_page
-        limit = offset + self.paginator.per_page * self._max_pages
+        per_page = self.paginator.per_page
+        offset = (self.number - 1) * per_page
+        limit = offset + per_page * self._max_pages
+        object_list = self.paginator.object_list
 
-        try:
-            count = self.paginator.object_list[offset:limit].count()
-        except (AttributeError, TypeError):
-            # If has no count() method or requires arguments
-            count = len(self.paginator.object_list[offset:limit])
+        if isinstance(object_list, QuerySet):
+            # Prefetch the page rows alone
+            lookups = object_list._prefetch_related_lookups
+            rows = list(object_list.prefetch_related(None)[offset:limit])
+            count = len(rows)
+            self.object_list = rows[:per_page]
+
+            if lookups:
+                prefetch_related_objects(self.object_list, lookups)
+
+            if count and count < limit - offset:
+                self.paginator._set_cached_count(offset + count)
+        else:
+            self.object_list = list(object_list[offset:offset + per_page])
+
+            try:
+                count = object_list[offset:limit].count()
+            except (AttributeError, TypeError):
+                # If has no count() method or requires arguments
+                count = len(object_list[offset:limit])
 
         if not count:
             self._num_pages = 0
         else:
-            offset_pages = (-count // self.paginator.per_page) * -1  # ceil
+            offset_pages = (-count // per_page) * -1  # ceil
             self._num_pages = self.number - 1 + offset_pages
 
+    @property
+    def num_pages(self):
+        """
+        Return the number of pages
+        relative to the current page
+        limited by max_pages
+        """
+        self._fetch()
         return self._num_pages
 
     @property
@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
 
 from .ratelimit import RateLimit
+from .engines import FixedWindow, SlidingWindow, TokenBucket
 
-__all__ = ['RateLimit']
+__all__ = [
+    'RateLimit',
+    'FixedWindow',
+    'SlidingWindow',
+    'TokenBucket'
+]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals, division
+
+import time
+import threading
+from collections import OrderedDict
+
+__all__ = [
+    'FixedWindow',
+    'SlidingWindow',
+    'TokenBucket'
+]
+
+
+class FixedWindow(object):
+    """
+    Count the hits within the current window.\
+    The window is part of the key, so the count\
+    is reset every period no matter how often\
+    it's hit. Increments are atomic on backends\
+    with an atomic incr (ie: memcached, redis)
+    """
+    def __init__(self, cache, timer=time.time):
+        self.cache = cache
+        self.timer = timer
+
+    def _incr(self, key, timeout):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, timeout=timeout):
+                return 1
+
+            return self.cache.incr(key)
+
+    def _window_key(self, key, window):
+        return '%s:%d' % (key, window)
+
+    def hit(self, key, period):
+        """
+        Record a hit, return the hits in the window
+        """
+        window = int(self.timer() // period)
+        return self._incr(self._window_key(key, window), timeout=period)
+
+
+class SlidingWindow(FixedWindow):
+    """
+    Weight the previous window count by its\
+    overlap with the sliding window. This avoids\
+    the burst of twice the limit at the window edges
+    """
+    def hit(self, key, period):
+        now = self.timer()
+        window = int(now // period)
+        elapsed = (now % period) / period
+        # The previous window is read during the next one
+        count = self._incr(self._window_key(key, window), timeout=period * 2)
+        previous = self.cache.get(self._window_key(key, window - 1), 0)
+        return count + previous * (1 - elapsed)
+
+
+class TokenBucket(object):
+    """
+    In-process token buckets, they are not shared\
+    between workers. A worker running out of tokens\
+    means the shared limit has been reached as well,\
+    so it's used to reject requests without a cache\
+    round trip. The least recently used buckets are\
+    dropped when there are more than *max_size*
+    """
+    def __init__(self, max_size=10000, timer=time.time):
+        self.max_size = max_size
+        self.timer = timer
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, limit, period):
+        """
+        Take a token, return False if there are none left
+        """
+        with self._lock:
+            now = self.timer()
+            tokens, last = self._buckets.pop(key, (limit, now))
+            tokens = min(limit, tokens + (now - last) * limit / period)
+            is_allowed = tokens >= 1
+
+            if is_allowed:
+                tokens -= 1
+
+            self._buckets[key] = (tokens, now)
+
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+
+            return is_allowed
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+bucket = TokenBucket()
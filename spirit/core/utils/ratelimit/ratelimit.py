@@ -6,6 +6,11 @@ import hashlib
 
 from django.conf import settings
 from django.core.cache import caches
+from django.utils.module_loading import import_string
+from django.core.exceptions import ImproperlyConfigured
+
+from .engines import bucket
+from ..cache import has_atomic_incr
 
 
 TIME_DICT = {
@@ -64,21 +69,33 @@ class RateLimit:
 
         return [self._make_cache_key(k) for k in keys]
 
+    def _get_engine(self):
+        cache = caches[settings.ST_RATELIMIT_CACHE]
+
+        # Concurrent hits would be lost
+        if not has_atomic_incr(cache):
+            raise ImproperlyConfigured(
+                "ST_RATELIMIT_CACHE requires a cache with an atomic "
+                "incr (ie: memcached, redis, spirit.core.utils.cache.DatabaseCache)")
+
+        engine_class = import_string(settings.ST_RATELIMIT_ENGINE)
+        return engine_class(cache=cache)
+
     def _incr_cache(self):
         if not self.cache_keys:
             return {}
 
-        cache = caches[settings.ST_RATELIMIT_CACHE]
-        cache_values = cache.get_many(self.cache_keys)
-
-        for key in self.cache_keys:
-            if key in cache_values:
-                cache_values[key] += 1
-            else:
-                cache_values[key] = 1
-
-        cache.set_many(cache_values, timeout=self.time)
-        return cache_values
+        if settings.ST_RATELIMIT_PREFILTER:
+            for key in self.cache_keys:
+                if not bucket.consume(key, limit=self.limit, period=self.time):
+                    # Limited, skip the cache
+                    return {key: self.limit + 1}
+
+        engine = self._get_engine()
+        return {
+            key: engine.hit(key, period=self.time)
+            for key in self.cache_keys
+        }
 
     def is_limited(self):
         for count in self.cache_values.values():
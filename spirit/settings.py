@@ -11,18 +11,77 @@ ST_UNCATEGORIZED_CATEGORY_PK = 2
 
 ST_RATELIMIT_ENABLE = True
 ST_RATELIMIT_CACHE_PREFIX = 'srl'
+# It must have an atomic incr (ie: memcached, redis,
+# the default database cache), otherwise it raises
 ST_RATELIMIT_CACHE = 'default'
+ST_RATELIMIT_ENGINE = 'spirit.core.utils.ratelimit.SlidingWindow'
+# Reject with in-process token buckets first
+ST_RATELIMIT_PREFILTER = True
 
 ST_NOTIFICATIONS_PER_PAGE = 20
+ST_TOPIC_NOTIFICATION_CACHE = 'default'
+# Bounds the drift of the maintained unread counts
+# (ie: removed topics/categories, concurrent recounts)
+ST_TOPIC_NOTIFICATION_UNREAD_TIMEOUT = 60 * 60
+# Comments on topics with more subscribers
+# than this are notified on read
+ST_TOPIC_NOTIFICATION_FAN_OUT_LIMIT = 1000
 
 ST_MENTIONS_PER_COMMENT = 30
+ST_MENTIONS_CACHE = 'default'
+ST_MENTIONS_CACHE_TIMEOUT = 60 * 60 * 24
+
+ST_COMMENT_FAN_OUT_DEFERRED = False
+
+ST_COMMENT_CACHE = 'default'
+ST_COMMENT_CACHE_TIMEOUT = 60 * 60 * 24
+# Page index of the topic comments, appended
+# comments don't invalidate it
+ST_COMMENT_PAGES_CACHE = 'default'
+ST_COMMENT_PAGES_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Requires a cache with atomic incr (ie: the default,
+# memcached, redis), otherwise concurrent views get lost
+ST_TOPIC_VIEW_COUNT_CACHE = 'default'
+ST_TOPIC_VIEW_COUNT_FLUSH_INTERVAL = 60
+# Expiration of the buffered views, the ones
+# since the last flush get dropped
+ST_TOPIC_VIEW_COUNT_TIMEOUT = 60 * 60 * 24
+
+ST_TOPIC_READ_CACHE = 'default'
+ST_TOPIC_READ_CACHE_TIMEOUT = 60 * 60 * 24
+
+ST_PAGE_CACHE_ENABLE = False
+ST_PAGE_CACHE = 'default'
+ST_PAGE_CACHE_TIMEOUT = 60 * 10
 
 ST_YT_PAGINATOR_PAGE_RANGE = 3
+# Seconds the row count of deep pages is cached, 0 to disable
+ST_YT_PAGINATOR_COUNT_TIMEOUT = 0
+ST_YT_PAGINATOR_COUNT_CACHE = 'default'
 
 ST_SEARCH_QUERY_MIN_LEN = 3
 
 ST_USER_LAST_SEEN_THRESHOLD_MINUTES = 1
 
+# Write the users last seen/ip from spiritrunjobs,
+# instead of within the request. It requires
+# a cache with atomic incr (ie: the default, memcached, redis)
+ST_PRESENCE_DEFERRED = False
+ST_PRESENCE_CACHE = 'default'
+ST_PRESENCE_MINUTES = 60
+# The online users list is this stale at most
+ST_PRESENCE_ONLINE_TIMEOUT = 30
+
+# Seconds between the spiritrunjobs recounts of the dashboard stats
+ST_FORUM_STATS_RECONCILE_INTERVAL = 60 * 60 * 24
+# The stats are buffered in the cache and written
+# by spiritrunjobs or once per flush interval.
+# Requires a cache with atomic incr (ie: the default, memcached, redis)
+ST_FORUM_STATS_CACHE = 'default'
+ST_FORUM_STATS_FLUSH_INTERVAL = 60
+ST_FORUM_STATS_TIMEOUT = 60 * 60 * 24 * 2
+
 ST_PRIVATE_FORUM = False
 
 ST_ALLOWED_UPLOAD_IMAGE_FORMAT = ('jpeg', 'png', 'gif')
@@ -77,10 +136,27 @@ INSTALLED_APPS = [
 ]
 
 # python manage.py createcachetable
+# The local tier entries are dropped within STAMP_INTERVAL
+# seconds of a write by another process. The database cache
+# deletes the expired entries once per CULL_INTERVAL seconds
+# (and spiritrunjobs does it too), it doesn't cull on each write
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'BACKEND': 'spirit.core.utils.cache.TwoTierCache',
+        'LOCATION': 'st_shared',
+        'OPTIONS': {
+            'LOCAL_TIMEOUT': 5,
+            'LOCAL_MAX_ENTRIES': 1000,
+            'STAMP_SLOTS': 64,
+            'STAMP_INTERVAL': 1,
+        },
+    },
+    'st_shared': {
+        'BACKEND': 'spirit.core.utils.cache.DatabaseCache',
         'LOCATION': 'spirit_cache',
+        'OPTIONS': {
+            'CULL_INTERVAL': 60 * 5,
+        },
     },
 }
 
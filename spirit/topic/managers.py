@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 
 from django.db import models
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Prefetch
+from django.db.models import Q, F, Prefetch
 
 from ..comment.bookmark.models import CommentBookmark
 
@@ -12,16 +12,19 @@ from ..comment.bookmark.models import CommentBookmark
 class TopicQuerySet(models.QuerySet):
 
     def unremoved(self):
-        return self.filter(Q(category__parent=None) | Q(category__parent__is_removed=False),
-                           category__is_removed=False,
+        return self.filter(is_category_removed=False,
                            is_removed=False)
 
     def public(self):
-        return self.filter(category__is_private=False)
+        return self.filter(is_private=False)
 
     def visible(self):
         return self.unremoved().public()
 
+    def counted(self):
+        # Counted in the user profile, see Topic.is_counted
+        return self.visible()
+
     def opened(self):
         return self.filter(is_closed=False)
 
@@ -35,14 +38,14 @@ class TopicQuerySet(models.QuerySet):
         return self.filter(Q(category=category) | Q(category__parent=category))
 
     def _access(self, user):
-        return self.filter(Q(category__is_private=False) | Q(topics_private__user=user))
+        return self.filter(Q(is_private=False) | Q(topics_private__user=user))
 
     def for_access(self, user):
         return self.unremoved()._access(user=user)
 
     def for_unread(self, user):
         return self.filter(topicunread__user=user,
-                           topicunread__is_read=False)
+                           topicunread__comment_number__lt=F('last_comment_number'))
 
     def with_bookmarks(self, user):
         if not user.is_authenticated():
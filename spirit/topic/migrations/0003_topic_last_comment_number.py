@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_topic', '0002_auto_20150828_2003'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='last_comment_number',
+            field=models.PositiveIntegerField(default=0, verbose_name='last comment number'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def populate_visibility(apps, schema_editor):
+    Category = apps.get_model("spirit_category", "Category")
+    Topic = apps.get_model("spirit_topic", "Topic")
+
+    for category in Category.objects.select_related('parent'):
+        is_category_removed = category.is_removed or bool(category.parent_id and category.parent.is_removed)
+        Topic.objects\
+            .filter(category=category)\
+            .update(is_category_removed=is_category_removed, is_private=category.is_private)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_category', '0003_category_is_global'),
+        ('spirit_topic', '0003_topic_last_comment_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='is_category_removed',
+            field=models.BooleanField(default=False, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='is_private',
+            field=models.BooleanField(default=False, db_index=True),
+        ),
+        migrations.RunPython(populate_visibility),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def create_partial_indexes(apps, schema_editor):
+    # Visible topics of the active listing, postgres only
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX spirit_topic_topic_visible_active "
+        "ON spirit_topic_topic (is_globally_pinned DESC, last_active DESC) "
+        "WHERE is_removed = false AND is_category_removed = false AND is_private = false"
+    )
+
+
+def drop_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS spirit_topic_topic_visible_active")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_category', '0003_category_is_global'),
+        ('spirit_topic', '0004_topic_visibility'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='topic',
+            index_together=set([('is_globally_pinned', 'last_active'),
+                                ('category', 'is_globally_pinned', 'is_pinned', 'last_active')]),
+        ),
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
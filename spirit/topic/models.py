@@ -8,9 +8,20 @@ from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import F
+from django.core.cache import caches
 
 from .managers import TopicQuerySet
+from ..user.models import UserProfile
+from ..core.models import ForumStats
 from ..core.utils.models import AutoSlugField
+from ..core.utils import buckets
+
+VIEWED_PREFIX = 'spirit:topic:viewed'
+VIEWS_FLUSHED_KEY = 'spirit:topic:views:flushed'
+
+
+def _view_count_key(topic_id):
+    return 'spirit:topic:views:%d' % topic_id
 
 
 class Topic(models.Model):
@@ -27,23 +38,54 @@ class Topic(models.Model):
     is_globally_pinned = models.BooleanField(_("globally pinned"), default=False)
     is_closed = models.BooleanField(_("closed"), default=False)
     is_removed = models.BooleanField(default=False)
+    # Denormalized from the category (and its parent), see Category.update_topics()
+    is_category_removed = models.BooleanField(default=False, db_index=True)
+    is_private = models.BooleanField(default=False, db_index=True)
 
     view_count = models.PositiveIntegerField(_("views count"), default=0)
     comment_count = models.PositiveIntegerField(_("comment count"), default=0)
+    last_comment_number = models.PositiveIntegerField(_("last comment number"), default=0)
 
     objects = TopicQuerySet.as_manager()
 
     class Meta:
         ordering = ['-last_active', '-pk']
+        index_together = [
+            ('is_globally_pinned', 'last_active'),
+            ('category', 'is_globally_pinned', 'is_pinned', 'last_active'),
+        ]
         verbose_name = _("topic")
         verbose_name_plural = _("topics")
 
+    def save(self, *args, **kwargs):
+        is_new = self.pk is None
+        self.is_category_removed = self.category.is_tree_removed
+        self.is_private = self.category.is_private
+        super(Topic, self).save(*args, **kwargs)
+
+        if is_new:
+            ForumStats.update_counters(topic_count=1)
+
+        if is_new and not self.is_removed:
+            self.update_category_counters(last_active=self.last_active)
+
+            if self.is_counted:
+                UserProfile.update_counters(self.user_id, topic_count=1)
+
     def get_absolute_url(self):
         if self.category_id == settings.ST_TOPIC_PRIVATE_CATEGORY_PK:
             return reverse('spirit:topic:private:detail', kwargs={'topic_id': str(self.id), 'slug': self.slug})
         else:
             return reverse('spirit:topic:detail', kwargs={'pk': str(self.id), 'slug': self.slug})
 
+    @property
+    def is_counted(self):
+        # Counted in the user profile (and so are
+        # its comments), same as visible()
+        return (not self.is_private and
+                not self.is_removed and
+                not self.is_category_removed)
+
     @property
     def main_category(self):
         return self.category.parent or self.category
@@ -58,17 +100,116 @@ class Topic(models.Model):
             return
 
     def increase_view_count(self):
-        Topic.objects\
-            .filter(pk=self.pk)\
-            .update(view_count=F('view_count') + 1)
+        """
+        Views are buffered in the cache and written\
+        at most once per flush interval, the first\
+        view of the interval writes them. The rest\
+        get written by flush_view_counts() (spiritrunjobs).\
+        The buffer expires after ST_TOPIC_VIEW_COUNT_TIMEOUT
+        """
+        cache = caches[settings.ST_TOPIC_VIEW_COUNT_CACHE]
+        key = _view_count_key(self.pk)
 
-    def increase_comment_count(self):
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=settings.ST_TOPIC_VIEW_COUNT_TIMEOUT):
+                cache.incr(key)
+
+        flush_key = key + ':flushed'
+
+        if cache.add(flush_key, True, timeout=settings.ST_TOPIC_VIEW_COUNT_FLUSH_INTERVAL):
+            self.flush_view_count()
+            # Every view after this one happens within the interval
+            buckets.add(
+                cache, VIEWED_PREFIX, self.pk,
+                timeout=settings.ST_TOPIC_VIEW_COUNT_TIMEOUT)
+
+    def flush_view_count(self):
+        Topic.flush_view_counts(topic_ids=[self.pk])
+
+    @classmethod
+    def flush_view_counts(cls, topic_ids=None):
+        """
+        Write the buffered views. These are the views\
+        of the *topic_ids* or, if not given, the views\
+        of every topic viewed since the last time.\
+        There is an UPDATE per distinct count.\
+        Returns the count of updated topics
+        """
+        cache = caches[settings.ST_TOPIC_VIEW_COUNT_CACHE]
+
+        if topic_ids is None:
+            now_minute = buckets.minute()
+            interval = -(-settings.ST_TOPIC_VIEW_COUNT_FLUSH_INTERVAL // 60)
+            start = max(
+                cache.get(VIEWS_FLUSHED_KEY, 0) - interval,
+                now_minute - settings.ST_TOPIC_VIEW_COUNT_TIMEOUT // 60)
+            topic_ids = buckets.get(cache, VIEWED_PREFIX, range(start, now_minute + 1))
+            # The current minute is scanned again next time
+            cache.set(VIEWS_FLUSHED_KEY, now_minute, timeout=None)
+
+        counts = cache.get_many([_view_count_key(pk) for pk in topic_ids])
+        topic_ids_by_count = {}
+
+        for pk in topic_ids:
+            count = counts.get(_view_count_key(pk))
+
+            if not count:
+                continue
+
+            try:
+                cache.decr(_view_count_key(pk), count)
+            except ValueError:
+                continue
+
+            topic_ids_by_count.setdefault(count, []).append(pk)
+
+        for count, pks in topic_ids_by_count.items():
+            cls.objects\
+                .filter(pk__in=pks)\
+                .update(view_count=F('view_count') + count)
+
+        return sum(len(pks) for pks in topic_ids_by_count.values())
+
+    def increase_comment_count(self, count=1):
+        now = timezone.now()
         Topic.objects\
             .filter(pk=self.pk)\
-            .update(comment_count=F('comment_count') + 1, last_active=timezone.now())
+            .update(comment_count=F('comment_count') + count, last_active=now)
 
-    def decrease_comment_count(self):
+        if not self.is_removed:
+            self._update_category(comment_count=count, last_active=now)
+
+    def decrease_comment_count(self, count=1):
         # todo: update last_active to last() comment
         Topic.objects\
             .filter(pk=self.pk)\
-            .update(comment_count=F('comment_count') - 1)
+            .update(comment_count=F('comment_count') - count)
+
+        if not self.is_removed:
+            self._update_category(comment_count=-count)
+
+    def _update_category(self, category_id=None, **counts):
+        from ..category.models import Category
+
+        Category.update_counters(category_id or self.category_id, **counts)
+
+    def update_category_counters(self, sign=1, category_id=None, last_active=None):
+        """
+        Add (or subtract, sign=-1) the topic\
+        and its comments to the category counters.\
+        Used on publish, move and (un)delete
+        """
+        self._update_category(
+            category_id=category_id,
+            topic_count=sign,
+            comment_count=sign * self.comment_count,
+            last_active=last_active)
+
+    def move_counters(self, from_category_id):
+        if self.is_removed:
+            return
+
+        self.update_category_counters(sign=-1, category_id=from_category_id)
+        self.update_category_counters()
@@ -8,6 +8,8 @@ from django.core.urlresolvers import reverse
 
 from ...core.tests import utils
 from ...comment.models import Comment, CLOSED, UNCLOSED, PINNED, UNPINNED
+from ...category.models import Category
+from ...user.models import UserProfile
 from ..models import Topic
 
 
@@ -33,6 +35,7 @@ class TopicViewTest(TestCase):
         expected_url = topic.get_absolute_url()
         self.assertRedirects(response, expected_url, status_code=302)
         self.assertTrue(Topic.objects.get(pk=topic.pk).is_removed)
+        self.assertEqual(Category.objects.get(pk=category.pk).topic_count, 0)
 
     def test_topic_moderate_undelete(self):
         """
@@ -50,6 +53,42 @@ class TopicViewTest(TestCase):
         expected_url = topic.get_absolute_url()
         self.assertRedirects(response, expected_url, status_code=302)
         self.assertFalse(Topic.objects.get(pk=topic.pk).is_removed)
+        self.assertEqual(Category.objects.get(pk=category.pk).topic_count, 1)
+
+    def test_topic_moderate_delete_user_counters(self):
+        """
+        Should subtract the topic and its comments from the\
+        authors counters, and add them back on undelete
+        """
+        utils.login(self)
+        self.user.st.is_moderator = True
+        self.user.save()
+
+        user = utils.create_user()
+        user2 = utils.create_user()
+        topic = utils.create_topic(utils.create_category(), user=user)
+        utils.create_comment(topic=topic, user=user)
+        utils.create_comment(topic=topic, user=user2)
+        utils.create_comment(topic=topic, user=user2)
+        comment = utils.create_comment(topic=topic, user=user2)
+        utils.create_comment(topic=topic, user=user2, action=CLOSED)
+
+        def counts():
+            return [
+                (p.topic_count, p.comment_count)
+                for p in UserProfile.objects.filter(user__in=[user, user2]).order_by('user_id')]
+
+        self.assertEqual(counts(), [(1, 1), (0, 3)])
+
+        self.client.post(reverse('spirit:topic:moderate:delete', kwargs={'pk': topic.pk, }))
+        self.assertEqual(counts(), [(0, 0), (0, 0)])
+
+        # Not counted while the topic is removed
+        self.client.post(reverse('spirit:comment:delete', kwargs={'pk': comment.pk, }))
+        self.assertEqual(counts(), [(0, 0), (0, 0)])
+
+        self.client.post(reverse('spirit:topic:moderate:undelete', kwargs={'pk': topic.pk, }))
+        self.assertEqual(counts(), [(1, 1), (0, 2)])
 
     def test_topic_moderate_lock(self):
         """
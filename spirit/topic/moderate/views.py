@@ -9,6 +9,15 @@ from django.utils.decorators import method_decorator
 from ...core.utils.decorators import moderator_required
 from ...comment.models import Comment, CLOSED, UNCLOSED, PINNED, UNPINNED
 from ..models import Topic
+from ..utils import purge_topic_pages, update_user_counters
+
+
+def _update_user_counters(topic, sign):
+    # The topic is counted as long as it's not removed
+    if topic.is_private or topic.is_category_removed:
+        return
+
+    update_user_counters(Topic.objects.filter(pk=topic.pk), sign)
 
 
 class BaseView(View):
@@ -27,6 +36,9 @@ class BaseView(View):
         pk = kwargs['pk']
         count = self.update(pk)
 
+        if count:
+            purge_topic_pages(self.topic)
+
         if count and self.action is not None:
             Comment.create_moderation_action(
                 user=request.user,
@@ -55,12 +67,30 @@ class DeleteView(BaseView):
     field_name = 'is_removed'
     to_value = True
 
+    def update(self, pk):
+        count = super(DeleteView, self).update(pk)
+
+        if count:
+            self.topic.update_category_counters(sign=-1)
+            _update_user_counters(self.topic, sign=-1)
+
+        return count
+
 
 class UnDeleteView(BaseView):
 
     field_name = 'is_removed'
     to_value = False
 
+    def update(self, pk):
+        count = super(UnDeleteView, self).update(pk)
+
+        if count:
+            self.topic.update_category_counters()
+            _update_user_counters(self.topic, sign=1)
+
+        return count
+
 
 class LockView(BaseView):
 
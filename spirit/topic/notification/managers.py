@@ -5,19 +5,20 @@ from __future__ import unicode_literals
 from django.db import models
 from django.db.models import Q
 
+from .utils import bump_versions, reset_unread_counts
+
 
 class TopicNotificationQuerySet(models.QuerySet):
 
     def unremoved(self):
-        return self.filter(Q(topic__category__parent=None) | Q(topic__category__parent__is_removed=False),
-                           topic__category__is_removed=False,
+        return self.filter(topic__is_category_removed=False,
                            topic__is_removed=False)
 
     def unread(self):
         return self.filter(is_read=False)
 
     def _access(self, user):
-        return self.filter(Q(topic__category__is_private=False) | Q(topic__topics_private__user=user),
+        return self.filter(Q(topic__is_private=False) | Q(topic__topics_private__user=user),
                            user=user)
 
     def for_access(self, user):
@@ -27,5 +28,8 @@ class TopicNotificationQuerySet(models.QuerySet):
 
     def read(self, user):
         # returns updated rows count (int)
-        return self.filter(user=user)\
+        count = self.filter(user=user)\
             .update(is_read=True)
+        reset_unread_counts([user.pk])
+        bump_versions([user.pk])
+        return count
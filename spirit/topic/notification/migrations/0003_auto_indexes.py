@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+def create_partial_indexes(apps, schema_editor):
+    # Unread notifications of a user, postgres only
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX spirit_topic_notification_unread "
+        "ON spirit_topic_notification_topicnotification (user_id, date DESC) "
+        "WHERE is_read = false"
+    )
+
+
+def drop_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS spirit_topic_notification_unread")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('spirit_topic_notification', '0002_auto_20150828_2003'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='topicnotification',
+            index_together=set([('user', 'is_read', 'date')]),
+        ),
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_topic', '0005_auto_indexes'),
+        ('spirit_comment', '0004_auto_indexes'),
+        ('spirit_topic_notification', '0003_auto_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicNotificationEvent',
+            fields=[
+                ('id', models.AutoField(primary_key=True, verbose_name='ID', auto_created=True, serialize=False)),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('comment', models.ForeignKey(related_name='+', to='spirit_comment.Comment')),
+                ('topic', models.OneToOneField(related_name='st_notification_event', to='spirit_topic.Topic')),
+            ],
+            options={
+                'verbose_name_plural': 'topics notification event',
+                'verbose_name': 'topic notification event',
+            },
+        ),
+    ]
@@ -3,12 +3,16 @@
 from __future__ import unicode_literals
 
 from django.db import models
+from django.db.models import F
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
 from django.utils import timezone
-from django.db import IntegrityError, transaction
 
+from ...core.utils.models import bulk_create_missing
 from .managers import TopicNotificationQuerySet
+from .utils import (
+    bump_versions, bump_topic_versions, get_version,
+    get_unread_count, incr_unread_counts, reset_unread_counts)
 
 
 UNDEFINED, MENTION, COMMENT = range(3)
@@ -35,10 +39,17 @@ class TopicNotification(models.Model):
 
     class Meta:
         unique_together = ('user', 'topic')
+        index_together = [('user', 'is_read', 'date')]
         ordering = ['-date', '-pk']
         verbose_name = _("topic notification")
         verbose_name_plural = _("topics notification")
 
+    def save(self, *args, **kwargs):
+        super(TopicNotification, self).save(*args, **kwargs)
+        # It may (un)follow the topic
+        bump_versions([self.user_id])
+        reset_unread_counts([self.user_id])
+
     def get_absolute_url(self):
         return self.comment.get_absolute_url()
 
@@ -54,14 +65,93 @@ class TopicNotification(models.Model):
     def is_comment(self):
         return self.action == COMMENT
 
+    @classmethod
+    def _followed_topic_ids(cls, user):
+        # The fan-out on read ones, the others
+        # bump the user token on write
+        return cls.objects\
+            .filter(user=user, is_active=True, topic__st_notification_event__isnull=False)\
+            .values_list('topic_id', flat=True)
+
+    @classmethod
+    def _count_unread(cls, user):
+        return cls.objects\
+            .for_access(user=user)\
+            .unread()\
+            .count()
+
+    @classmethod
+    def _count_pending(cls, user):
+        # The events to merge, this is
+        # a read, so they are not merged here
+        return cls.objects\
+            .for_access(user=user)\
+            .filter(is_read=True, is_active=True,
+                    topic__st_notification_event__date__gt=F('date'))\
+            .count()
+
+    @classmethod
+    def get_version(cls, user):
+        return get_version(user, followed=cls._followed_topic_ids)
+
+    @classmethod
+    def get_unread_count(cls, user):
+        return get_unread_count(
+            user,
+            recount=cls._count_unread,
+            recount_pending=cls._count_pending,
+            followed=cls._followed_topic_ids)
+
+    @classmethod
+    def _merge_events(cls, notifications, is_read):
+        events = notifications\
+            .filter(is_active=True, topic__st_notification_event__date__gt=F('date'))\
+            .values_list(
+                'pk',
+                'topic__st_notification_event__comment',
+                'topic__st_notification_event__date')
+        count = 0
+
+        for pk, comment_id, date in events:
+            count += cls.objects\
+                .filter(pk=pk, date__lt=date)\
+                .update(comment=comment_id, date=date, action=COMMENT, is_read=is_read)
+
+        return count
+
+    @classmethod
+    def merge_events(cls, user):
+        """
+        Notify the user of the comments posted\
+        on the fan-out on read topics since the\
+        last time. This must be called before\
+        listing or counting the notifications
+        """
+        count = cls._merge_events(
+            cls.objects.filter(user=user, is_read=True),
+            is_read=False)
+
+        if count:
+            incr_unread_counts([user.pk], count)
+            bump_versions([user.pk])
+
+        return count
+
     @classmethod
     def mark_as_read(cls, user, topic):
         if not user.is_authenticated():
             return
 
-        cls.objects\
-            .filter(user=user, topic=topic)\
+        count = cls.objects\
+            .filter(user=user, topic=topic, is_read=False)\
             .update(is_read=True)
+        merged = cls._merge_events(
+            cls.objects.filter(user=user, topic=topic),
+            is_read=True)
+
+        if merged or count:
+            incr_unread_counts([user.pk], -count)
+            bump_versions([user.pk])
 
     @classmethod
     def create_maybe(cls, user, comment, is_read=True, action=COMMENT):
@@ -78,42 +168,110 @@ class TopicNotification(models.Model):
         )
 
     @classmethod
-    def notify_new_comment(cls, comment):
+    def _has_many_subscribers(cls, topic):
+        limit = settings.ST_TOPIC_NOTIFICATION_FAN_OUT_LIMIT
+        subscribers = cls.objects\
+            .filter(topic=topic, is_active=True)[:limit + 1]\
+            .count()
+        return subscribers > limit
+
+    @classmethod
+    def _notify_event(cls, comment):
+        # The subscribers merge it on read
+        now = timezone.now()
+        is_recorded = TopicNotificationEvent.objects\
+            .filter(topic=comment.topic)\
+            .update(comment=comment, date=now)
+
+        if not is_recorded:
+            if not cls._has_many_subscribers(comment.topic):
+                return False
+
+            TopicNotificationEvent.objects.update_or_create(
+                topic=comment.topic,
+                defaults={'comment': comment, 'date': now})
+
+            # Once per topic, so the subscribers
+            # follow the topic stamp from now on
+            subscribers = cls.objects\
+                .filter(topic=comment.topic, is_active=True)\
+                .values_list('user_id', flat=True)
+            bump_versions(subscribers)
+
+        # The author has seen its own comment
         cls.objects\
+            .filter(user=comment.user, topic=comment.topic, date__lt=now)\
+            .update(comment=comment, date=now)
+
+        bump_topic_versions([comment.topic_id])
+        return True
+
+    @classmethod
+    def notify_new_comment(cls, comment):
+        if cls._notify_event(comment):
+            return
+
+        # There are no more than the fan-out limit
+        notifications = cls.objects\
             .filter(topic=comment.topic, is_active=True, is_read=True)\
-            .exclude(user=comment.user)\
+            .exclude(user=comment.user)
+        user_ids = list(notifications.values_list('user_id', flat=True))
+
+        if not user_ids:
+            return
+
+        notifications\
+            .filter(user_id__in=user_ids)\
             .update(comment=comment, is_read=False, action=COMMENT, date=timezone.now())
+        incr_unread_counts(user_ids)
+        bump_versions(user_ids)
+
+    @classmethod
+    def _create_missing(cls, users, comment, action):
+        bulk_create_missing(
+            cls.objects.filter(topic=comment.topic),
+            [cls(user=user,
+                 topic=comment.topic,
+                 comment=comment,
+                 action=action,
+                 is_active=True)
+             for user in users],
+            field='user')
 
     @classmethod
     def notify_new_mentions(cls, comment, mentions):
         if not mentions:
             return
 
-        # TODO: refactor
-        for username, user in mentions.items():
-            try:
-                with transaction.atomic():
-                    cls.objects.create(
-                        user=user,
-                        topic=comment.topic,
-                        comment=comment,
-                        action=MENTION,
-                        is_active=True
-                    )
-            except IntegrityError:
-                pass
-
+        users = list(mentions.values())
+        cls._create_missing(users, comment, action=MENTION)
         cls.objects\
-            .filter(user__in=mentions.values(), topic=comment.topic, is_read=True)\
+            .filter(user__in=users, topic=comment.topic, is_read=True)\
             .update(comment=comment, is_read=False, action=MENTION, date=timezone.now())
 
+        # There are no more than the mentions per comment
+        user_ids = [user.pk for user in users]
+        reset_unread_counts(user_ids)
+        bump_versions(user_ids)
+
     @classmethod
     def bulk_create(cls, users, comment):
-        return cls.objects.bulk_create([
-            cls(user=user,
-                topic=comment.topic,
-                comment=comment,
-                action=COMMENT,
-                is_active=True)
-            for user in users
-        ])
+        cls._create_missing(users, comment, action=COMMENT)
+        user_ids = [user.pk for user in users]
+        reset_unread_counts(user_ids)
+        bump_versions(user_ids)
+
+
+class TopicNotificationEvent(models.Model):
+    """
+    The last comment of a topic with more than\
+    ST_TOPIC_NOTIFICATION_FAN_OUT_LIMIT subscribers.\
+    Their notifications older than the event are unread
+    """
+    topic = models.OneToOneField('spirit_topic.Topic', related_name='st_notification_event')
+    comment = models.ForeignKey('spirit_comment.Comment', related_name='+')
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = _("topic notification event")
+        verbose_name_plural = _("topics notification event")
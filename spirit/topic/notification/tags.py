@@ -9,7 +9,12 @@ from .forms import NotificationForm
 
 @register.assignment_tag()
 def has_topic_notifications(user):
-    return TopicNotification.objects.for_access(user=user).unread().exists()
+    return TopicNotification.get_unread_count(user) > 0
+
+
+@register.assignment_tag()
+def get_topic_notifications_count(user):
+    return TopicNotification.get_unread_count(user)
 
 
 @register.inclusion_tag('spirit/topic/notification/_form.html')
@@ -5,7 +5,8 @@ import json
 import datetime
 
 from django.test import TestCase, RequestFactory
-from django.test.utils import override_settings
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.db import connection
 from django.core.urlresolvers import reverse
 from django.core.cache import cache
 from django.template import Template, Context
@@ -14,7 +15,8 @@ from django.utils import timezone
 from djconfig.utils import override_djconfig
 
 from ...core.tests import utils
-from .models import TopicNotification, COMMENT, MENTION
+from .models import TopicNotification, TopicNotificationEvent, COMMENT, MENTION
+from .utils import deferred_bumps, _unread_count_key
 from .forms import NotificationCreationForm, NotificationForm
 from .tags import render_notification_form, has_topic_notifications
 
@@ -187,6 +189,35 @@ class TopicNotificationViewTest(TestCase):
         self.assertGreater(TopicNotification.objects.filter(user=self.user).count(), 1)
         self.assertEqual(len(res['n']), 1)
 
+    def test_topic_notification_ajax_not_modified(self):
+        """
+        Should skip the notifications when the client has the current version
+        """
+        utils.login(self)
+        response = self.client.get(reverse('spirit:topic:notification:index-ajax'),
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        version = json.loads(response.content.decode('utf-8'))['v']
+        self.assertEqual(response['ETag'], '"%s"' % version)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('spirit:topic:notification:index-ajax'),
+                                       HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+                                       HTTP_IF_NONE_MATCH='"%s"' % version)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in queries.captured_queries if 'topicnotification' in q['sql']])
+
+        response = self.client.get(reverse('spirit:topic:notification:index-ajax') + '?since=' + version,
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 304)
+
+        TopicNotification.objects.filter(pk=self.topic_notification.pk).update(is_read=True)
+        comment = utils.create_comment(topic=self.topic)
+        TopicNotification.notify_new_comment(comment)
+        response = self.client.get(reverse('spirit:topic:notification:index-ajax') + '?since=' + version,
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(json.loads(response.content.decode('utf-8'))['v'], version)
+
     @override_settings(ST_NOTIFICATIONS_PER_PAGE=20)
     def test_topic_notification_ajax_order(self):
         """
@@ -437,6 +468,45 @@ class TopicNotificationModelsTest(TestCase):
         notification2 = TopicNotification.objects.get(user=creator, topic=topic)
         self.assertTrue(notification2.is_read)
 
+    @override_settings(ST_TOPIC_NOTIFICATION_FAN_OUT_LIMIT=1)
+    def test_topic_notification_notify_new_comment_fan_out_on_read(self):
+        """
+        Should record a single event for topics with many subscribers
+        """
+        user = utils.create_user()
+        version = TopicNotification.get_version(user)
+        comment = utils.create_comment(topic=self.topic, user=self.user2)
+        TopicNotification.notify_new_comment(comment=comment)
+        # Not a follower
+        self.assertEqual(TopicNotification.get_version(user), version)
+        self.assertEqual(TopicNotificationEvent.objects.get(topic=self.topic).comment, comment)
+        self.assertTrue(TopicNotification.objects.get(pk=self.topic_notification.pk).is_read)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(TopicNotification.get_unread_count(self.user2), 0)
+
+        # Counting is a read, the listings merge the event
+        self.assertTrue(TopicNotification.objects.get(pk=self.topic_notification.pk).is_read)
+        TopicNotification.merge_events(self.user)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+        notification = TopicNotification.objects.get(pk=self.topic_notification.pk)
+        self.assertFalse(notification.is_read)
+        self.assertEqual(notification.comment, comment)
+        self.assertEqual(notification.action, COMMENT)
+
+        TopicNotification.mark_as_read(user=self.user, topic=self.topic)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 0)
+
+        # Reading the topic catches up with the event
+        comment2 = utils.create_comment(topic=self.topic, user=self.user2)
+        TopicNotification.notify_new_comment(comment=comment2)
+        TopicNotification.mark_as_read(user=self.user, topic=self.topic)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 0)
+        self.assertEqual(TopicNotification.objects.get(pk=self.topic_notification.pk).comment, comment2)
+
     def test_topic_notification_notify_new_comment_unactive(self):
         """
         Should do nothing if notification is unactive
@@ -476,6 +546,22 @@ class TopicNotificationModelsTest(TestCase):
         self.assertEqual(TopicNotification.objects.get(pk=self.topic_notification.pk).action, MENTION)
         self.assertFalse(TopicNotification.objects.get(pk=self.topic_notification.pk).is_read)
 
+    def test_topic_notification_notify_new_mentions_many(self):
+        """
+        Should create the missing notifications and update the existing ones
+        """
+        user = utils.create_user()
+        comment = utils.create_comment(topic=self.topic_notification.topic)
+        mentions = {self.user.username: self.user, user.username: user}
+        TopicNotification.notify_new_mentions(comment=comment, mentions=mentions)
+        self.assertEqual(TopicNotification.objects.filter(topic=comment.topic).count(), 3)
+        self.assertEqual(TopicNotification.objects.get(pk=self.topic_notification.pk).comment, comment)
+        self.assertTrue(TopicNotification.objects.get(pk=self.topic_notification2.pk).is_read)
+        notification = TopicNotification.objects.get(user=user, topic=comment.topic)
+        self.assertEqual(notification.action, MENTION)
+        self.assertFalse(notification.is_read)
+        self.assertTrue(notification.is_active)
+
 
 class TopicNotificationTemplateTagsTest(TestCase):
 
@@ -504,7 +590,7 @@ class TopicNotificationTemplateTagsTest(TestCase):
         out = template.render(context)
         self.assertEqual(out, "True")
 
-        TopicNotification.objects.all().update(is_read=True)
+        TopicNotification.objects.read(user=self.user)
         out = template.render(context)
         self.assertEqual(out, "False")
 
@@ -537,6 +623,106 @@ class TopicNotificationTemplateTagsTest(TestCase):
         self.assertEqual(len(TopicNotification.objects.filter(user=self.user, is_active=True, is_read=False)), 5)
         self.assertFalse(has_topic_notifications(self.user))
 
+    def test_topic_notification_unread_count(self):
+        """
+        Should cache the unread count until the notifications change
+        """
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+
+        TopicNotification.mark_as_read(user=self.user, topic=self.topic)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 0)
+
+        comment = utils.create_comment(topic=self.topic)
+        TopicNotification.notify_new_comment(comment)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+
+    def test_topic_notification_unread_count_maintained(self):
+        """
+        Should update the count on write, rather than recount it
+        """
+        topic = utils.create_topic(self.category)
+        TopicNotification.objects.create(user=self.user, topic=topic, comment=self.comment,
+                                         is_active=True, is_read=True)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+        self.assertEqual(cache.get(_unread_count_key(self.user.pk)), 1)
+
+        comment = utils.create_comment(topic=topic)
+        TopicNotification.notify_new_comment(comment)
+        self.assertEqual(cache.get(_unread_count_key(self.user.pk)), 2)
+
+        # The followed topics lookup, the token changed
+        with self.assertNumQueries(1):
+            self.assertEqual(TopicNotification.get_unread_count(self.user), 2)
+
+        TopicNotification.mark_as_read(user=self.user, topic=topic)
+        self.assertEqual(cache.get(_unread_count_key(self.user.pk)), 1)
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 1)
+
+        TopicNotification.objects.read(user=self.user)
+        self.assertIsNone(cache.get(_unread_count_key(self.user.pk)))
+        self.assertEqual(TopicNotification.get_unread_count(self.user), 0)
+
+    def test_topic_notification_version(self):
+        """
+        Should change the version of the topic followers alone
+        """
+        user = utils.create_user()
+        topic = utils.create_topic(self.category)
+        TopicNotification.objects.create(user=user, topic=topic, comment=self.comment,
+                                         is_active=True, is_read=True)
+        version = TopicNotification.get_version(self.user)
+        other_version = TopicNotification.get_version(user)
+        self.assertEqual(TopicNotification.get_unread_count(user), 0)
+
+        TopicNotification.objects.filter(pk=self.topic_notification.pk).update(is_read=True)
+        comment = utils.create_comment(topic=self.topic)
+
+        # Not before the block exits (ie: the transaction commits)
+        with deferred_bumps():
+            TopicNotification.notify_new_comment(comment)
+            self.assertEqual(TopicNotification.get_version(self.user), version)
+
+        self.assertNotEqual(TopicNotification.get_version(self.user), version)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(TopicNotification.get_version(user), other_version)
+            self.assertEqual(TopicNotification.get_unread_count(user), 0)
+
+    @override_settings(ST_TOPIC_NOTIFICATION_FAN_OUT_LIMIT=1)
+    def test_topic_notification_version_fan_out_on_read(self):
+        """
+        Should combine the stamps of the followed fan-out on read topics alone
+        """
+        user = utils.create_user()
+        topic = utils.create_topic(self.category)
+        TopicNotification.objects.create(user=user, topic=self.topic, comment=self.comment,
+                                         is_active=True, is_read=True)
+        TopicNotification.objects.create(user=self.user, topic=topic, comment=self.comment,
+                                         is_active=True, is_read=True)
+        self.assertEqual(list(TopicNotification._followed_topic_ids(self.user)), [])
+        version = TopicNotification.get_version(self.user)
+
+        # The event gets created, the subscribers get bumped
+        comment = utils.create_comment(topic=self.topic, user=user)
+        TopicNotification.notify_new_comment(comment)
+        self.assertEqual(list(TopicNotification._followed_topic_ids(self.user)), [self.topic.pk])
+        version2 = TopicNotification.get_version(self.user)
+        self.assertNotEqual(version2, version)
+
+        comment = utils.create_comment(topic=self.topic, user=user)
+        TopicNotification.notify_new_comment(comment)
+        version3 = TopicNotification.get_version(self.user)
+        self.assertNotEqual(version3, version2)
+
+        # Small topic, the token gets bumped
+        comment = utils.create_comment(topic=topic, user=user)
+        TopicNotification.notify_new_comment(comment)
+        self.assertNotEqual(TopicNotification.get_version(self.user), version3)
+        self.assertFalse(TopicNotificationEvent.objects.filter(topic=topic).exists())
+
     def test_render_notification_form_notify(self):
         """
         should display the form
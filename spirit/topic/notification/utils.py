@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import uuid
+import hashlib
+import threading
+from functools import partial
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+_deferred = threading.local()
+
+
+def _cache():
+    return caches[settings.ST_TOPIC_NOTIFICATION_CACHE]
+
+
+def _token_key(user_id):
+    return 'spirit:topic:notification:version:%d' % user_id
+
+
+def _topics_key(user_id):
+    return 'spirit:topic:notification:topics:%d' % user_id
+
+
+def _stamp_key(topic_id):
+    return 'spirit:topic:notification:stamp:%d' % topic_id
+
+
+def _unread_count_key(user_id):
+    return 'spirit:topic:notification:unread:%d' % user_id
+
+
+def _pending_count_key(user_id):
+    return 'spirit:topic:notification:pending:%d' % user_id
+
+
+def _new_versions(cache, keys, values):
+    # A missing (evicted) version gets a new
+    # one, it must never go back to a known one
+    missing = {
+        key: uuid.uuid4().hex
+        for key in keys
+        if values.get(key) is None
+    }
+    cache.set_many(missing, timeout=None)
+    return [values.get(key) or missing[key] for key in keys]
+
+
+def _get_version(cache, user, values, followed):
+    token, = _new_versions(cache, [_token_key(user.pk)], values)
+    topics = values.get(_topics_key(user.pk))
+
+    # The user token changes along the followed event topics
+    if topics is None or topics[0] != token:
+        topics = (token, list(followed(user)))
+        cache.set(_topics_key(user.pk), topics, timeout=settings.ST_TOPIC_NOTIFICATION_UNREAD_TIMEOUT)
+
+    stamp_keys = [_stamp_key(topic_id) for topic_id in topics[1]]
+    stamps = _new_versions(cache, stamp_keys, cache.get_many(stamp_keys))
+    version = '.'.join([token] + stamps)
+    return hashlib.md5(version.encode('utf-8')).hexdigest(), topics[1]
+
+
+def get_version(user, followed):
+    """
+    Return the version of the user notifications,\
+    it changes whenever they do. It's the user\
+    token plus the stamps of the followed fan-out\
+    on read topics. The *followed* callable returns\
+    (for the user) the ids of those topics, it's\
+    called when the user token changes
+    """
+    cache = _cache()
+    values = cache.get_many([_token_key(user.pk), _topics_key(user.pk)])
+    version, _topic_ids = _get_version(cache, user, values, followed)
+    return version
+
+
+def _defer(call):
+    calls = getattr(_deferred, 'calls', None)
+
+    if calls is not None:
+        calls.append(call)
+        return
+
+    call()
+
+
+def _bump(keys):
+    keys = set(keys)
+
+    if not keys:
+        return
+
+    pending = getattr(_deferred, 'keys', None)
+
+    if pending is not None:
+        pending.update(keys)
+        return
+
+    _cache().set_many(
+        {key: uuid.uuid4().hex for key in keys},
+        timeout=None)
+
+
+def bump_versions(user_ids):
+    """
+    Change the token of the users, this must be\
+    done whenever their notifications or followed\
+    topics change (but not the new comments of\
+    the fan-out on read topics, see bump_topic_versions)
+    """
+    _bump(_token_key(pk) for pk in user_ids)
+
+
+def bump_topic_versions(topic_ids):
+    """
+    Change the version of the notifications\
+    of every follower of the fan-out on read\
+    topics, the user tokens of a topic with\
+    many followers can't be bumped on write
+    """
+    _bump(_stamp_key(pk) for pk in topic_ids)
+
+
+@contextmanager
+def deferred_bumps():
+    """
+    Bump the versions (and the unread counts)\
+    once the block exits. It must wrap the atomic\
+    blocks, otherwise a concurrent read may cache\
+    the uncommitted (old) data along the new version
+    """
+    if getattr(_deferred, 'keys', None) is not None:
+        yield
+        return
+
+    _deferred.keys = set()
+    _deferred.calls = []
+
+    try:
+        yield
+    finally:
+        keys, _deferred.keys = _deferred.keys, None
+        calls, _deferred.calls = _deferred.calls, None
+
+        for call in calls:
+            call()
+
+        _bump(keys)
+
+
+def _incr(keys, delta):
+    cache = _cache()
+
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Missing, the next read recounts it
+            pass
+
+
+def incr_unread_counts(user_ids, delta=1):
+    """
+    Add the delta to the unread count of the users.\
+    This must be done whenever their unread\
+    notifications change (but not the events\
+    of the fan-out on read topics)
+    """
+    keys = [_unread_count_key(pk) for pk in user_ids]
+
+    if keys and delta:
+        _defer(partial(_incr, keys, delta))
+
+
+def reset_unread_counts(user_ids):
+    """
+    Drop the unread count of the users,\
+    the next read recounts it. For the writes\
+    that can't tell the number of changes
+    """
+    keys = [_unread_count_key(pk) for pk in user_ids]
+
+    if keys:
+        _defer(partial(_cache().delete_many, keys))
+
+
+def get_unread_count(user, recount, recount_pending, followed):
+    """
+    Return the unread notifications count of the user.\
+    The write paths maintain the count (see incr_unread_counts),\
+    the *recount* callable is called (with the user) on a miss.\
+    The pending events of the fan-out on read topics are\
+    stored along the version, the *recount_pending*\
+    callable is called (with the user) when it changes
+    """
+    cache = _cache()
+    count_key = _unread_count_key(user.pk)
+    pending_key = _pending_count_key(user.pk)
+    values = cache.get_many([
+        _token_key(user.pk), _topics_key(user.pk), count_key, pending_key])
+    version, topic_ids = _get_version(cache, user, values, followed)
+    count = values.get(count_key)
+
+    if count is None:
+        count = recount(user)
+        cache.add(count_key, count, timeout=settings.ST_TOPIC_NOTIFICATION_UNREAD_TIMEOUT)
+
+    pending = values.get(pending_key)
+
+    if not topic_ids:
+        pending = (version, 0)
+    elif pending is None or pending[0] != version:
+        pending = (version, recount_pending(user))
+        cache.set(pending_key, pending, timeout=settings.ST_TOPIC_NOTIFICATION_UNREAD_TIMEOUT)
+
+    # The decrements may drift below zero
+    return max(count, 0) + pending[1]
@@ -6,10 +6,11 @@ import json
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django.conf import settings
 from django.contrib import messages
 from django.utils.html import escape
+from django.utils.http import parse_etags, quote_etag
 
 from djconfig import config
 
@@ -55,6 +56,17 @@ def index_ajax(request):
     if not request.is_ajax():
         return Http404()
 
+    # The client already has this version
+    version = TopicNotification.get_version(request.user)
+    known_versions = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    known_versions.append(request.GET.get('since'))
+
+    if version in known_versions:
+        response = HttpResponseNotModified()
+        response['ETag'] = quote_etag(version)
+        return response
+
+    TopicNotification.merge_events(request.user)
     notifications = TopicNotification.objects\
         .for_access(request.user)\
         .order_by("is_read", "-date")\
@@ -73,11 +85,15 @@ def index_ajax(request):
         for n in notifications
     ]
 
-    return HttpResponse(json.dumps({'n': notifications, }), content_type="application/json")
+    response = HttpResponse(json.dumps({'n': notifications, 'v': version}), content_type="application/json")
+    response['ETag'] = quote_etag(version)
+
+    return response
 
 
 @login_required
 def index_unread(request):
+    TopicNotification.merge_events(request.user)
     notifications = TopicNotification.objects\
         .for_access(request.user)\
         .filter(is_read=False)
@@ -104,6 +120,7 @@ def index_unread(request):
 
 @login_required
 def index(request):
+    TopicNotification.merge_events(request.user)
     notifications = yt_paginate(
         TopicNotification.objects.for_access(request.user),
         per_page=config.topics_per_page,
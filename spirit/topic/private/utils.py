@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 from ..notification.models import TopicNotification
+from ..utils import invalidate_read_state
 
 
 def notify_access(user, topic_private):
@@ -10,4 +11,5 @@ def notify_access(user, topic_private):
         user=user,
         comment=topic_private.topic.comment_set.last(),
         is_read=False
-    )
\ No newline at end of file
+    )
+    invalidate_read_state(user=user, topic=topic_private.topic)
@@ -14,10 +14,10 @@ from django.conf import settings
 from djconfig import config
 
 from ...core import utils
-from ...core.utils.paginator import paginate, yt_paginate
+from ...core.utils.paginator import keyset_paginate, yt_paginate
 from ...core.utils.ratelimit.decorators import ratelimit
 from ...comment.forms import CommentForm
-from ...comment.utils import comment_posted
+from ...comment.utils import comment_posted, pages_cache_key
 from ...comment.models import Comment
 from ..models import Topic
 from ..utils import topic_viewed
@@ -82,11 +82,13 @@ def detail(request, topic_id, slug):
 
     comments = Comment.objects\
         .for_topic(topic=topic)\
+        .for_listing()\
         .with_likes(user=request.user)\
-        .order_by('date')
+        .order_by('date', 'pk')
 
-    comments = paginate(
+    comments = keyset_paginate(
         comments,
+        cache_key=pages_cache_key(topic),
         per_page=config.comments_per_page,
         page_number=request.GET.get('page', 1)
     )
@@ -8,15 +8,18 @@ from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.db import connection
 
 from djconfig.utils import override_djconfig
 
 from ..core.tests import utils
 from . import utils as utils_topic
-from ..comment.models import MOVED
+from ..comment.models import MOVED, CLOSED
 from .models import Topic
 from .forms import TopicForm
 from ..comment.models import Comment
+from ..comment.utils import comment_posted
 from ..comment.bookmark.models import CommentBookmark
 from .poll.forms import TopicPollForm, TopicPollChoiceFormSet
 from .notification.models import TopicNotification
@@ -195,6 +198,79 @@ class TopicViewTest(TestCase):
         self.assertEqual(response.context['topic'], topic)
         self.assertEqual(list(response.context['comments']), [comment1, comment2])
 
+    def test_topic_detail_view_num_queries(self):
+        """
+        The number of queries should not grow with the number of comments
+        """
+        utils.login(self)
+        topic = utils.create_topic(category=utils.create_category())
+        utils.create_comment(topic=topic)
+        url = reverse('spirit:topic:detail', kwargs={'pk': topic.pk, 'slug': topic.slug})
+        self.client.get(url)
+
+        def num_queries():
+            cache.clear()
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        expected = num_queries()
+
+        for _ in range(3):
+            utils.create_comment(topic=topic)
+
+        self.assertEqual(num_queries(), expected)
+
+    @override_settings(ST_PAGE_CACHE_ENABLE=True)
+    def test_topic_detail_view_page_cache(self):
+        """
+        Should cache the page for anonymous users until a comment gets posted
+        """
+        topic = utils.create_topic(category=utils.create_category())
+        utils.create_comment(topic=topic, comment_html='comment_one')
+        url = reverse('spirit:topic:detail', kwargs={'pk': topic.pk, 'slug': topic.slug})
+        self.assertContains(self.client.get(url), 'comment_one')
+
+        comment = utils.create_comment(topic=topic, comment_html='comment_two')
+        self.assertNotContains(self.client.get(url), 'comment_two')
+
+        comment_posted(comment=comment, mentions=None)
+        self.assertContains(self.client.get(url), 'comment_two')
+
+        # Users get the fresh page
+        utils.create_comment(topic=topic, comment_html='comment_three')
+        utils.login(self)
+        self.assertContains(self.client.get(url), 'comment_three')
+
+    @override_settings(ST_PAGE_CACHE_ENABLE=True)
+    def test_topic_detail_view_page_cache_views(self):
+        """
+        Should count the views of the cached page
+        """
+        topic = utils.create_topic(category=utils.create_category())
+        url = reverse('spirit:topic:detail', kwargs={'pk': topic.pk, 'slug': topic.slug})
+
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        Topic.flush_view_counts(topic_ids=[topic.pk])
+        self.assertEqual(Topic.objects.get(pk=topic.pk).view_count, 3)
+
+    @override_settings(ST_PAGE_CACHE_ENABLE=True, ALLOWED_HOSTS=['foo.com', 'bar.com'])
+    def test_topic_detail_view_page_cache_host(self):
+        """
+        Should cache the page per host
+        """
+        topic = utils.create_topic(category=utils.create_category())
+        url = reverse('spirit:topic:detail', kwargs={'pk': topic.pk, 'slug': topic.slug})
+        self.assertEqual(self.client.get(url, HTTP_HOST='foo.com').status_code, 200)
+        utils.create_comment(topic=topic, comment_html='comment_one')
+        self.assertNotContains(self.client.get(url, HTTP_HOST='foo.com'), 'comment_one')
+        self.assertContains(self.client.get(url, HTTP_HOST='bar.com'), 'comment_one')
+
     @override_djconfig(comments_per_page=2)
     def test_topic_detail_view_paginate(self):
         """
@@ -421,13 +497,58 @@ class TopicUtilsTest(TestCase):
         topic = utils.create_topic(category=category, user=self.user)
         comment = utils.create_comment(topic=topic)
         notification = TopicNotification.objects.create(user=topic.user, topic=topic, comment=comment, is_read=False)
-        unread = TopicUnread.objects.create(user=topic.user, topic=topic, is_read=False)
+        unread = TopicUnread.objects.create(user=topic.user, topic=topic)
+        topic = Topic.objects.get(pk=topic.pk)
         utils_topic.topic_viewed(req, topic)
         self.assertEqual(len(CommentBookmark.objects.filter(user=self.user, topic=topic)), 1)
         self.assertTrue(TopicNotification.objects.get(pk=notification.pk).is_read)
         self.assertTrue(TopicUnread.objects.get(pk=unread.pk).is_read)
         self.assertEqual(Topic.objects.get(pk=topic.pk).view_count, 1)
 
+    def test_topic_viewed_skip_writes(self):
+        """
+        Should not write the read state when nothing changed
+        """
+        req = RequestFactory().get('/?page=1')
+        req.user = self.user
+
+        category = utils.create_category()
+        topic = utils.create_topic(category=category, user=self.user)
+        comment = utils.create_comment(topic=topic)
+        utils_topic.topic_viewed(req, topic)
+
+        with self.assertNumQueries(0):
+            utils_topic.topic_viewed(req, topic)
+
+        # New comment
+        notification = TopicNotification.objects.create(user=self.user, topic=topic, comment=comment, is_read=False)
+        topic.increase_comment_count()
+        topic = Topic.objects.get(pk=topic.pk)
+        utils_topic.topic_viewed(req, topic)
+        self.assertTrue(TopicNotification.objects.get(pk=notification.pk).is_read)
+
+        # Next page
+        req = RequestFactory().get('/?page=2')
+        req.user = self.user
+        utils_topic.topic_viewed(req, topic)
+        self.assertNotEqual(CommentBookmark.objects.get(user=self.user, topic=topic).comment_number, 1)
+
+    def test_topic_viewed_moderation_action(self):
+        """
+        Should mark the topic as read after a moderation action,\
+        it gets a comment number but the last_active doesn't change
+        """
+        utils.login(self)
+        category = utils.create_category()
+        topic = utils.create_topic(category=category)
+        utils.create_comment(topic=topic)
+        self.client.get(reverse('spirit:topic:detail', kwargs={'pk': topic.pk, 'slug': topic.slug}))
+
+        Comment.create_moderation_action(user=topic.user, topic=topic, action=CLOSED)
+        self.client.get(reverse('spirit:topic:detail', kwargs={'pk': topic.pk, 'slug': topic.slug}))
+        response = self.client.get(reverse('spirit:topic:unread:index'))
+        self.assertEqual(list(response.context['page']), [])
+
 
 class TopicModelsTest(TestCase):
 
@@ -444,6 +565,42 @@ class TopicModelsTest(TestCase):
         self.topic.increase_view_count()
         self.assertEqual(Topic.objects.get(pk=self.topic.pk).view_count, 1)
 
+    def test_topic_increase_view_count_buffered(self):
+        """
+        Should write the buffered views once per interval
+        """
+        self.topic.increase_view_count()
+        self.topic.increase_view_count()
+        self.topic.increase_view_count()
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).view_count, 1)
+
+        self.topic.flush_view_count()
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).view_count, 3)
+
+    def test_topic_flush_view_counts(self):
+        """
+        Should write the buffered views of every viewed topic
+        """
+        topic_b = utils.create_topic(category=self.category, user=self.user)
+        self.topic.increase_view_count()
+        self.topic.increase_view_count()
+        topic_b.increase_view_count()
+        topic_b.increase_view_count()
+        topic_b.increase_view_count()
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).view_count, 1)
+        self.assertEqual(Topic.objects.get(pk=topic_b.pk).view_count, 1)
+
+        # An UPDATE per distinct count
+        with self.assertNumQueries(2):
+            self.assertEqual(Topic.flush_view_counts(), 2)
+
+        self.assertEqual(Topic.objects.get(pk=self.topic.pk).view_count, 2)
+        self.assertEqual(Topic.objects.get(pk=topic_b.pk).view_count, 3)
+
+        # Nothing pending
+        with self.assertNumQueries(0):
+            self.assertEqual(Topic.flush_view_counts(), 0)
+
     def test_topic_increase_comment_count(self):
         """
         increase_comment_count
@@ -459,3 +616,21 @@ class TopicModelsTest(TestCase):
         Topic.objects.filter(pk=self.topic.pk).update(comment_count=10)
         self.topic.decrease_comment_count()
         self.assertEqual(Topic.objects.get(pk=self.topic.pk).comment_count, 9)
+
+    def test_topic_save_category_visibility(self):
+        """
+        Should copy the removed and private state of the category (and its parent)
+        """
+        self.assertFalse(self.topic.is_category_removed)
+        self.assertFalse(self.topic.is_private)
+
+        subcategory = utils.create_subcategory(self.category)
+        self.category.is_removed = True
+        self.category.save()
+        topic = utils.create_topic(category=subcategory)
+        self.assertTrue(topic.is_category_removed)
+
+        private = utils.create_category(is_private=True)
+        topic = utils.create_topic(category=private)
+        self.assertTrue(topic.is_private)
+        self.assertFalse(topic.is_category_removed)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('spirit_topic_unread', '0002_auto_20150828_2003'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='topicunread',
+            index_together=set([('user', 'is_read')]),
+        ),
+    ]
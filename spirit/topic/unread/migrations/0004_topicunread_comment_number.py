@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.db.models import Max
+
+
+def populate_comment_number(apps, schema_editor):
+    # The unread ones are left behind. The read ones
+    # point to the last comment, the comments are
+    # numbered by spirit_comment 0005_populate_comment_number
+    TopicUnread = apps.get_model("spirit_topic_unread", "TopicUnread")
+    Comment = apps.get_model("spirit_comment", "Comment")
+
+    topics = Comment.objects\
+        .filter(topic__topicunread__is_read=True)\
+        .values('topic_id')\
+        .annotate(last_number=Max('number'))\
+        .order_by()\
+        .values_list('topic_id', 'last_number')
+
+    for topic_id, last_number in topics:
+        TopicUnread.objects\
+            .filter(topic_id=topic_id, is_read=True)\
+            .update(comment_number=last_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spirit_topic_unread', '0003_auto_indexes'),
+        ('spirit_topic', '0005_auto_indexes'),
+        ('spirit_comment', '0005_populate_comment_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topicunread',
+            name='comment_number',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_comment_number),
+        migrations.AlterIndexTogether(
+            name='topicunread',
+            index_together=set([]),
+        ),
+        migrations.RemoveField(
+            model_name='topicunread',
+            name='is_read',
+        ),
+    ]
@@ -9,12 +9,16 @@ from django.utils import timezone
 
 
 class TopicUnread(models.Model):
-
+    """
+    The read cursor of a user, the topic\
+    is unread when its last comment number\
+    is ahead of the last one the user has seen
+    """
     user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='st_topics_unread')
     topic = models.ForeignKey('spirit_topic.Topic')
 
     date = models.DateTimeField(default=timezone.now)
-    is_read = models.BooleanField(default=True)
+    comment_number = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ('user', 'topic')
@@ -25,6 +29,10 @@ class TopicUnread(models.Model):
     def get_absolute_url(self):
         return self.topic.get_absolute_url()
 
+    @property
+    def is_read(self):
+        return self.comment_number >= self.topic.last_comment_number
+
     @classmethod
     def create_or_mark_as_read(cls, user, topic):
         if not user.is_authenticated():
@@ -33,12 +41,31 @@ class TopicUnread(models.Model):
         return cls.objects.update_or_create(
             user=user,
             topic=topic,
-            defaults={'is_read': True, }
+            defaults={'comment_number': topic.last_comment_number, }
         )
 
     @classmethod
     def unread_new_comment(cls, comment):
+        cls.unread_new_comments(comments=[comment, ])
+
+    @classmethod
+    def unread_new_comments(cls, comments):
+        # Comments must belong to the same topic.
+        # They are unread for everyone since the topic
+        # number is ahead of the cursors. A single author
+        # has read up to its last comment, unless it had
+        # missed someone else's before. When there are
+        # many authors, each one has missed someone else's
+        authors = {c.user_id for c in comments}
+
+        if len(authors) != 1:
+            return
+
+        numbers = [c.number for c in comments]
         cls.objects\
-            .filter(topic=comment.topic)\
-            .exclude(user=comment.user)\
-            .update(is_read=False, date=timezone.now())
+            .filter(
+                user_id=authors.pop(),
+                topic_id=comments[0].topic_id,
+                comment_number__gte=min(numbers) - 1,
+                comment_number__lt=max(numbers))\
+            .update(comment_number=max(numbers))
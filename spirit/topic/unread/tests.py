@@ -8,6 +8,7 @@ from django.core.urlresolvers import reverse
 
 from ...core.tests import utils
 from .models import TopicUnread
+from ..models import Topic
 from ...comment.bookmark.models import CommentBookmark
 
 
@@ -32,8 +33,8 @@ class TopicUnreadViewTest(TestCase):
         """
         topic unread list
         """
-        TopicUnread.objects.filter(pk__in=[self.topic_unread.pk, self.topic_unread2.pk])\
-            .update(is_read=False)
+        Topic.objects.filter(pk__in=[self.topic.pk, self.topic2.pk])\
+            .update(last_comment_number=1)
 
         utils.login(self)
         response = self.client.get(reverse('spirit:topic:unread:index'))
@@ -50,7 +51,8 @@ class TopicUnreadViewTest(TestCase):
         TopicUnread.objects.all().delete()
 
         topic_a = utils.create_private_topic(user=self.user)
-        TopicUnread.objects.create(user=self.user, topic=topic_a.topic, is_read=False)
+        TopicUnread.objects.create(user=self.user, topic=topic_a.topic)
+        Topic.objects.all().update(last_comment_number=1)
 
         utils.login(self)
         response = self.client.get(reverse('spirit:topic:unread:index'))
@@ -71,11 +73,12 @@ class TopicUnreadViewTest(TestCase):
         topic_c = utils.create_topic(category=category_removed)
         topic_d = utils.create_topic(category=subcategory)
         topic_e = utils.create_topic(category=subcategory_removed)
-        TopicUnread.objects.create(user=self.user, topic=topic_a.topic, is_read=False)
-        TopicUnread.objects.create(user=self.user, topic=topic_b, is_read=False)
-        TopicUnread.objects.create(user=self.user, topic=topic_c, is_read=False)
-        TopicUnread.objects.create(user=self.user, topic=topic_d, is_read=False)
-        TopicUnread.objects.create(user=self.user, topic=topic_e, is_read=False)
+        TopicUnread.objects.create(user=self.user, topic=topic_a.topic)
+        TopicUnread.objects.create(user=self.user, topic=topic_b)
+        TopicUnread.objects.create(user=self.user, topic=topic_c)
+        TopicUnread.objects.create(user=self.user, topic=topic_d)
+        TopicUnread.objects.create(user=self.user, topic=topic_e)
+        Topic.objects.all().update(last_comment_number=1)
 
         utils.login(self)
         response = self.client.get(reverse('spirit:topic:unread:index'))
@@ -111,9 +114,9 @@ class TopicUnreadViewTest(TestCase):
         """
         topic unread list with bookmarks
         """
-        TopicUnread.objects\
-            .filter(pk__in=[self.topic_unread.pk, self.topic_unread2.pk])\
-            .update(is_read=False)
+        Topic.objects\
+            .filter(pk__in=[self.topic.pk, self.topic2.pk])\
+            .update(last_comment_number=1)
         bookmark = CommentBookmark.objects.create(topic=self.topic2, user=self.user)
 
         utils.login(self)
@@ -144,16 +147,26 @@ class TopicUnreadModelsTest(TestCase):
         TopicUnread.create_or_mark_as_read(user=user, topic=self.topic)
         self.assertEqual(len(TopicUnread.objects.filter(user=user, topic=self.topic)), 1)
 
-        TopicUnread.objects.all().update(is_read=True)
-        TopicUnread.create_or_mark_as_read(user=user, topic=self.topic)
+        utils.create_comment(topic=self.topic)
+        self.assertFalse(TopicUnread.objects.get(user=user, topic=self.topic).is_read)
+        TopicUnread.create_or_mark_as_read(user=user, topic=Topic.objects.get(pk=self.topic.pk))
         self.assertTrue(TopicUnread.objects.get(user=user, topic=self.topic).is_read)
 
     def test_topic_unread_new_comment(self):
         """
         Mark as unread
         """
-        TopicUnread.objects.all().update(is_read=True)
         comment = utils.create_comment(user=self.user, topic=self.topic)
         TopicUnread.unread_new_comment(comment=comment)
         self.assertTrue(TopicUnread.objects.get(user=self.user, topic=self.topic).is_read)
         self.assertFalse(TopicUnread.objects.get(user=self.user2, topic=self.topic).is_read)
+
+    def test_topic_unread_new_comment_missed(self):
+        """
+        Should keep as unread the comments missed by the author
+        """
+        utils.create_comment(topic=self.topic)
+        comment = utils.create_comment(user=self.user, topic=self.topic)
+        TopicUnread.unread_new_comment(comment=comment)
+        self.assertFalse(TopicUnread.objects.get(user=self.user, topic=self.topic).is_read)
+        self.assertEqual(TopicUnread.objects.get(user=self.user, topic=self.topic).comment_number, 0)
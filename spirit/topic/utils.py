@@ -2,21 +2,130 @@
 
 from __future__ import unicode_literals
 
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count
+
+from ..core.utils import page_cache
 from ..comment.bookmark.models import CommentBookmark
+from ..comment.models import Comment, COMMENT
+from ..user.models import UserProfile
 from .notification.models import TopicNotification
+from .notification.utils import deferred_bumps
 from .unread.models import TopicUnread
+from .models import Topic
+
+
+def _read_state_key(user_id, topic_id):
+    return 'spirit:topic:read:%d:%d' % (user_id, topic_id)
+
+
+def invalidate_read_state(user, topic):
+    """
+    Must be called when the topic becomes\
+    unread for the user, without a new comment
+    """
+    caches[settings.ST_TOPIC_READ_CACHE].delete(_read_state_key(user.pk, topic.pk))
+
+
+def _counts_by_user(queryset):
+    counts = queryset\
+        .values('user_id')\
+        .annotate(count=Count('pk'))\
+        .order_by()
+    return {c['user_id']: c['count'] for c in counts}
+
+
+def update_comment_counters(comments, sign):
+    """
+    Add (or subtract, sign=-1) the *comments*\
+    to the authors counters. The removed ones\
+    and the actions are skipped
+    """
+    counts = _counts_by_user(comments.filter(is_removed=False, action=COMMENT))
+    UserProfile.update_many_counters(
+        'comment_count', {pk: sign * count for pk, count in counts.items()})
+
+
+def update_user_counters(topics, sign):
+    """
+    Add (or subtract, sign=-1) the *topics* and\
+    their comments to the authors counters. Used\
+    when the topics become (or stop being) counted.\
+    There's an UPDATE per distinct count
+    """
+    counts = _counts_by_user(topics)
+    UserProfile.update_many_counters(
+        'topic_count', {pk: sign * count for pk, count in counts.items()})
+    update_comment_counters(Comment.objects.filter(topic__in=topics), sign)
+
+
+def purge_topic_pages(topic):
+    """
+    Expire the cached pages listing or showing the topic
+    """
+    category = topic.category
+    keys = [
+        page_cache.topic_key(topic.pk),
+        page_cache.category_key(category.pk),
+        page_cache.ACTIVE
+    ]
+
+    if category.parent_id:
+        keys.append(page_cache.category_key(category.parent_id))
+
+    page_cache.purge(*keys)
+
+
+def count_cached_view(request, pk, **kwargs):
+    """
+    Count the view of a topic page\
+    served from the page cache
+    """
+    Topic(pk=int(pk)).increase_view_count()
 
 
 def topic_viewed(request, topic):
+    """
+    Persist the read state of the user. The persisted\
+    state is cached per topic last_active and last comment\
+    number (the moderation actions change the number alone)\
+    so the writes are skipped when nothing changed
+    """
     # Todo test detail views
     user = request.user
     comment_number = CommentBookmark.page_to_comment_number(request.GET.get('page', 1))
+    topic.increase_view_count()
+
+    if not user.is_authenticated():
+        return
+
+    cache = caches[settings.ST_TOPIC_READ_CACHE]
+    key = _read_state_key(user.pk, topic.pk)
+    last_active, last_number, bookmark_number = cache.get(key, (None, None, None))
+    is_read = (
+        last_active == topic.last_active and
+        last_number == topic.last_comment_number)
+    is_bookmarked = comment_number is None or bookmark_number == comment_number
+
+    if is_read and is_bookmarked:
+        return
+
+    with deferred_bumps(), transaction.atomic():
+        if not is_bookmarked:
+            CommentBookmark.update_or_create(
+                user=user,
+                topic=topic,
+                comment_number=comment_number
+            )
+            bookmark_number = comment_number
+
+        if not is_read:
+            TopicNotification.mark_as_read(user=user, topic=topic)
+            TopicUnread.create_or_mark_as_read(user=user, topic=topic)
 
-    CommentBookmark.update_or_create(
-        user=user,
-        topic=topic,
-        comment_number=comment_number
-    )
-    TopicNotification.mark_as_read(user=user, topic=topic)
-    TopicUnread.create_or_mark_as_read(user=user, topic=topic)
-    topic.increase_view_count()
\ No newline at end of file
+    cache.set(
+        key,
+        (topic.last_active, topic.last_comment_number, bookmark_number),
+        timeout=settings.ST_TOPIC_READ_CACHE_TIMEOUT)
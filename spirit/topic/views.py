@@ -8,12 +8,13 @@ from django.http import HttpResponsePermanentRedirect
 
 from djconfig import config
 
-from ..core.utils.paginator import paginate, yt_paginate
+from ..core.utils.paginator import keyset_paginate, yt_paginate
 from ..core.utils.ratelimit.decorators import ratelimit
+from ..core.utils.page_cache import anonymous_page_cache, topic_key, category_key, purge, tag, ACTIVE
 from ..category.models import Category
 from ..comment.models import MOVED
 from ..comment.forms import CommentForm
-from ..comment.utils import comment_posted
+from ..comment.utils import comment_posted, pages_cache_key
 from ..comment.models import Comment
 from .poll.forms import TopicPollForm, TopicPollChoiceFormSet
 from .models import Topic
@@ -79,7 +80,11 @@ def update(request, pk):
             topic = form.save()
 
             if topic.category_id != category_id:
+                topic.move_counters(from_category_id=category_id)
                 Comment.create_moderation_action(user=request.user, topic=topic, action=MOVED)
+                purge(category_key(category_id))
+
+            utils.purge_topic_pages(topic)
 
             return redirect(request.POST.get('next', topic.get_absolute_url()))
     else:
@@ -90,6 +95,7 @@ def update(request, pk):
     return render(request, 'spirit/topic/update.html', context)
 
 
+@anonymous_page_cache(topic_key('{pk}'), on_hit=utils.count_cached_view)
 def detail(request, pk, slug):
     topic = Topic.objects.get_public_or_404(pk, request.user)
 
@@ -100,11 +106,13 @@ def detail(request, pk, slug):
 
     comments = Comment.objects\
         .for_topic(topic=topic)\
+        .for_listing()\
         .with_likes(user=request.user)\
-        .order_by('date')
+        .order_by('date', 'pk')
 
-    comments = paginate(
+    comments = keyset_paginate(
         comments,
+        cache_key=pages_cache_key(topic),
         per_page=config.comments_per_page,
         page_number=request.GET.get('page', 1)
     )
@@ -114,9 +122,17 @@ def detail(request, pk, slug):
         'comments': comments
     }
 
-    return render(request, 'spirit/topic/detail.html', context)
+    # Removing or hiding the category hides the topic
+    category = topic.category
+    keys = [category_key(category.pk)]
+
+    if category.parent_id:
+        keys.append(category_key(category.parent_id))
+
+    return tag(render(request, 'spirit/topic/detail.html', context), *keys)
 
 
+@anonymous_page_cache(ACTIVE)
 def index_active(request):
     categories = Category.objects\
         .visible()\
@@ -2,11 +2,10 @@
 
 from __future__ import unicode_literals
 
-from django.conf import settings
 from django.contrib.auth import logout
 from django.utils import timezone
 
-from .models import UserProfile
+from .utils import presence
 
 
 class TimezoneMiddleware(object):
@@ -25,13 +24,7 @@ class LastIPMiddleware(object):
             return
 
         last_ip = request.META['REMOTE_ADDR'].strip()
-
-        if request.user.st.last_ip == last_ip:
-            return
-
-        UserProfile.objects\
-            .filter(user__pk=request.user.pk)\
-            .update(last_ip=last_ip)
+        presence.update(request.user, last_ip=last_ip)
 
 
 class LastSeenMiddleware(object):
@@ -40,15 +33,7 @@ class LastSeenMiddleware(object):
         if not request.user.is_authenticated():
             return
 
-        threshold = settings.ST_USER_LAST_SEEN_THRESHOLD_MINUTES * 60
-        delta = timezone.now() - request.user.st.last_seen
-
-        if delta.seconds < threshold:
-            return
-
-        UserProfile.objects\
-            .filter(user__pk=request.user.pk)\
-            .update(last_seen=timezone.now())
+        presence.update(request.user)
 
 
 class ActiveUserMiddleware(object):
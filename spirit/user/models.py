@@ -9,7 +9,9 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 
 from ..core.utils.timezone import TIMEZONE_CHOICES
-from ..core.utils.models import AutoSlugField
+from ..core.utils.models import AutoSlugField, increments
+
+COUNTER_FIELDS = ('topic_count', 'comment_count', 'received_likes_count')
 
 
 class UserProfile(models.Model):
@@ -29,6 +31,7 @@ class UserProfile(models.Model):
 
     topic_count = models.PositiveIntegerField(_("topic count"), default=0)
     comment_count = models.PositiveIntegerField(_("comment count"), default=0)
+    received_likes_count = models.PositiveIntegerField(_("received likes count"), default=0)
 
     class Meta:
         verbose_name = _("forum profile")
@@ -41,11 +44,55 @@ class UserProfile(models.Model):
         if self.is_administrator:
             self.is_moderator = True
 
+        # The counters are maintained by update_counters(),
+        # saving a stale instance must not overwrite them
+        if not self._state.adding and 'update_fields' not in kwargs:
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+
         super(UserProfile, self).save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('spirit:user:detail', kwargs={'pk': self.user.pk, 'slug': self.slug})
 
+    @classmethod
+    def update_counters(cls, user_id, topic_count=0, comment_count=0, received_likes_count=0):
+        """
+        Add the counts (which may be negative)\
+        to the profile of the user
+        """
+        fields = increments(
+            topic_count=topic_count,
+            comment_count=comment_count,
+            received_likes_count=received_likes_count)
+
+        if not fields:
+            return
+
+        cls.objects\
+            .filter(user_id=user_id)\
+            .update(**fields)
+
+    @classmethod
+    def update_many_counters(cls, field_name, counts):
+        """
+        Add the counts (a dict of user_id and count)\
+        to the profiles of the users. There is an\
+        UPDATE per distinct count rather than per user
+        """
+        user_ids_by_count = {}
+
+        for user_id, count in counts.items():
+            user_ids_by_count.setdefault(count, []).append(user_id)
+
+        for count, user_ids in user_ids_by_count.items():
+            cls.objects\
+                .filter(user_id__in=user_ids)\
+                .update(**increments(**{field_name: count}))
+
 
 class User(AbstractUser):
     # Backward compatibility
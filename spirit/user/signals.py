@@ -2,10 +2,12 @@
 
 from __future__ import unicode_literals
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.contrib.auth import get_user_model
 
 from .models import UserProfile
+from ..core.models import ForumStats, DailyStats
+from ..core.utils.markdown.utils import mention
 
 User = get_user_model()
 
@@ -15,7 +17,27 @@ def update_or_create_user_profile(sender, instance, created, **kwargs):
 
     if created:
         UserProfile.objects.create(user=user)
+        ForumStats.update_counters(user_count=1)
+        DailyStats.update_counters(user_count=1)
     else:
         user.st.save()
 
-post_save.connect(update_or_create_user_profile, sender=User, dispatch_uid=__name__)
\ No newline at end of file
+
+def track_username(sender, instance, **kwargs):
+    # The username as loaded, to invalidate it on rename
+    instance._st_username = instance.__dict__.get('username')
+
+
+def invalidate_mention(sender, instance, **kwargs):
+    mention.invalidate(username=instance.username)
+
+    if instance._st_username and instance._st_username != instance.username:
+        mention.invalidate(username=instance._st_username)
+
+    instance._st_username = instance.username
+
+
+post_init.connect(track_username, sender=User, dispatch_uid=__name__ + '.username')
+post_save.connect(update_or_create_user_profile, sender=User, dispatch_uid=__name__)
+post_save.connect(invalidate_mention, sender=User, dispatch_uid=__name__ + '.mention')
+post_delete.connect(invalidate_mention, sender=User, dispatch_uid=__name__ + '.mention')
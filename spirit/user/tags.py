@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth import get_user_model
+
+from ..core.tags.registry import register
+from .utils import presence
+
+User = get_user_model()
+
+
+@register.inclusion_tag('spirit/user/_online.html')
+def render_online_users(minutes=5, limit=50):
+    user_ids = presence.get_online_user_ids(minutes=minutes)
+    users = User.objects\
+        .filter(pk__in=user_ids)\
+        .select_related('st')\
+        .order_by('username')[:limit]
+    return {'users': users, 'count': len(user_ids)}
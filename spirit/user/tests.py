@@ -10,7 +10,9 @@ from django.contrib.auth import get_user_model, HASH_SESSION_KEY
 from django.core import mail
 from django.utils.translation import ugettext as _
 from django.utils import timezone
-from django.test.utils import override_settings
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.db import connection
+from django.template import Template, Context
 
 from djconfig.utils import override_djconfig
 
@@ -18,6 +20,8 @@ from ..core.tests import utils
 from .forms import UserProfileForm, EmailChangeForm, UserForm, EmailCheckForm
 from ..comment.like.models import CommentLike
 from .utils.tokens import UserEmailChangeTokenGenerator
+from .utils import presence
+from .models import UserProfile
 from ..topic.models import Topic
 from ..comment.models import Comment
 from ..comment.bookmark.models import CommentBookmark
@@ -159,6 +163,33 @@ class UserViewTest(TestCase):
         self.assertEqual(list(response.context['comments']), [comment, ])
         self.assertEqual(response.context['p_user'], self.user2)
 
+    def test_profile_comments_num_queries(self):
+        """
+        The number of queries should not grow with the number of comments
+        """
+        utils.login(self)
+        utils.create_comment(user=self.user2, topic=self.topic)
+        url = reverse("spirit:user:detail", kwargs={'pk': self.user2.pk, 'slug': self.user2.st.slug})
+
+        def num_queries():
+            cache.clear()
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        # The first request records the last ip/seen
+        self.client.get(url)
+        expected = num_queries()
+        topic = utils.create_topic(utils.create_category())
+
+        for number in range(3):
+            utils.create_comment(user=self.user2, topic=topic)
+
+        self.assertEqual(num_queries(), expected)
+
     def test_profile_comments_order(self):
         """
         comments ordered by date
@@ -589,3 +620,129 @@ class UserModelTest(TestCase):
         user.st.is_administrator = True
         user.st.save()
         self.assertTrue(user.st.is_moderator)
+
+    def test_profile_counters(self):
+        """
+        Should maintain the topic, comment and received likes counters
+        """
+        user = utils.create_user()
+        category = utils.create_category()
+        topic = utils.create_topic(category, user=user)
+        comment = utils.create_comment(topic=topic, user=user)
+        utils.create_private_topic(user=user)
+        utils.create_comment(topic=topic, user=user, action=1)
+        comment.increase_likes_count()
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user).comment_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=user).received_likes_count, 1)
+
+        comment.decrease_likes_count()
+        self.assertEqual(UserProfile.objects.get(user=user).received_likes_count, 0)
+
+        # stale instance
+        user.st.location = "foo"
+        user.st.save()
+        self.assertEqual(UserProfile.objects.get(user=user).topic_count, 1)
+
+
+class UserPresenceTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = utils.create_user()
+
+    @override_settings(ST_PRESENCE_DEFERRED=True)
+    def test_presence_update(self):
+        """
+        Should record the presence in the cache and flush it to the profile
+        """
+        # More than a day away
+        last_seen = timezone.now() - datetime.timedelta(days=1, seconds=1)
+        UserProfile.objects.filter(user=self.user).update(last_seen=last_seen)
+        self.user.st.last_seen = last_seen
+
+        with self.assertNumQueries(0):
+            presence.update(self.user)
+            presence.update(self.user, last_ip='1.2.3.4')
+
+        self.assertEqual(presence.get_online_user_ids(), {self.user.pk})
+        self.assertEqual(UserProfile.objects.get(user=self.user).last_seen, last_seen)
+
+        self.assertEqual(presence.flush(), 1)
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertGreater(profile.last_seen, last_seen)
+        self.assertEqual(profile.last_ip, '1.2.3.4')
+
+    def test_presence_update_not_deferred(self):
+        """
+        Should update the profile right away
+        """
+        last_seen = timezone.now() - datetime.timedelta(days=1, seconds=1)
+        UserProfile.objects.filter(user=self.user).update(last_seen=last_seen)
+        self.user.st.last_seen = last_seen
+        presence.update(self.user)
+        presence.update(self.user, last_ip='1.2.3.4')
+        self.assertEqual(presence.get_online_user_ids(), {self.user.pk})
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertGreater(profile.last_seen, last_seen)
+        self.assertEqual(profile.last_ip, '1.2.3.4')
+
+        with self.assertNumQueries(0):
+            presence.update(self.user)
+            presence.update(self.user, last_ip='1.2.3.4')
+
+    def test_presence_update_threshold(self):
+        """
+        Should not record the presence within the threshold
+        """
+        presence.update(self.user)
+        self.assertEqual(presence.get_online_user_ids(), set())
+        self.assertEqual(presence.flush(), 0)
+
+    @override_settings(ST_PRESENCE_DEFERRED=True)
+    def test_presence_online_users_cached(self):
+        """
+        Should cache the online users briefly
+        """
+        UserProfile.objects\
+            .filter(user=self.user)\
+            .update(last_seen=timezone.now() - datetime.timedelta(days=1))
+        self.user.st.last_seen = timezone.now() - datetime.timedelta(days=1)
+        self.assertEqual(presence.get_online_user_ids(), set())
+
+        presence.update(self.user)
+        self.assertEqual(presence.get_online_user_ids(), set())
+
+        cache.delete('spirit:presence:online:5')
+        self.assertEqual(presence.get_online_user_ids(), {self.user.pk})
+
+    def test_render_online_users(self):
+        """
+        Should render the online users
+        """
+        user_b = utils.create_user()
+        UserProfile.objects\
+            .filter(user=self.user)\
+            .update(last_seen=timezone.now() - datetime.timedelta(days=1))
+        self.user.st.last_seen = timezone.now() - datetime.timedelta(days=1)
+        presence.update(self.user)
+        out = Template(
+            "{% load spirit_tags %}"
+            "{% render_online_users %}"
+        ).render(Context())
+        self.assertIn(self.user.username, out)
+        self.assertNotIn(user_b.username, out)
+
+        response = self.client.get(reverse('spirit:topic:index-active'))
+        self.assertContains(response, self.user.username)
+
+    def test_presence_middleware(self):
+        """
+        Should record the presence of the logged in user
+        """
+        UserProfile.objects\
+            .filter(user=self.user)\
+            .update(last_seen=timezone.now() - datetime.timedelta(days=1))
+        utils.login(self)
+        self.client.get(reverse('spirit:user:update'))
+        self.assertEqual(presence.get_online_user_ids(), {self.user.pk})
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, When, Value, DateTimeField, GenericIPAddressField
+from django.utils import timezone
+
+from ..models import UserProfile
+from ...core.utils import buckets
+
+PREFIX = 'spirit:presence'
+FLUSHED_KEY = 'spirit:presence:flushed'
+
+
+def _cache():
+    return caches[settings.ST_PRESENCE_CACHE]
+
+
+def _user_key(user_id):
+    return 'spirit:presence:user:%d' % user_id
+
+
+def _online_key(minutes):
+    return 'spirit:presence:online:%d' % minutes
+
+
+def _user_ids(minutes):
+    return buckets.get(_cache(), PREFIX, minutes)
+
+
+def update(user, last_ip=None):
+    """
+    Record the user presence (and ip) in the cache,\
+    only once per ST_USER_LAST_SEEN_THRESHOLD_MINUTES\
+    (or ip change). The profile is updated right away,\
+    unless ST_PRESENCE_DEFERRED, then flush() does it
+    """
+    cache = _cache()
+    key = _user_key(user.pk)
+    now = timezone.now()
+    record = cache.get(key) or {
+        'last_seen': user.st.last_seen,
+        'last_ip': user.st.last_ip
+    }
+
+    if last_ip is not None:
+        if record['last_ip'] == last_ip:
+            return
+
+        record['last_ip'] = last_ip
+        changed = {'last_ip': last_ip}
+    else:
+        threshold = settings.ST_USER_LAST_SEEN_THRESHOLD_MINUTES * 60
+        delta = now - record['last_seen']
+
+        if delta.total_seconds() < threshold:
+            return
+
+        record['last_seen'] = now
+        changed = {'last_seen': now}
+
+    if not settings.ST_PRESENCE_DEFERRED:
+        UserProfile.objects\
+            .filter(user_id=user.pk)\
+            .update(**changed)
+
+    timeout = settings.ST_PRESENCE_MINUTES * 60
+    cache.set(key, record, timeout=timeout * 2)
+    buckets.add(cache, PREFIX, user.pk, timeout=timeout, date=now)
+
+
+def get_online_user_ids(minutes=5):
+    """
+    Return the ids of the users seen\
+    in the last *minutes*, without querying the db.\
+    The result is cached ST_PRESENCE_ONLINE_TIMEOUT seconds
+    """
+    minutes = min(minutes, settings.ST_PRESENCE_MINUTES)
+    cache = _cache()
+    key = _online_key(minutes)
+    user_ids = cache.get(key)
+
+    if user_ids is None:
+        now_minute = buckets.minute()
+        user_ids = _user_ids(range(now_minute - minutes, now_minute + 1))
+        cache.set(key, user_ids, timeout=settings.ST_PRESENCE_ONLINE_TIMEOUT)
+
+    return user_ids
+
+
+def flush():
+    """
+    Write the presence of the users seen since\
+    the last flush to their profile. This is a single\
+    UPDATE. Returns the count of updated users
+    """
+    cache = _cache()
+    now_minute = buckets.minute()
+    start = max(
+        cache.get(FLUSHED_KEY, 0),
+        now_minute - settings.ST_PRESENCE_MINUTES + 1)
+    user_ids = _user_ids(range(start, now_minute + 1))
+    records = cache.get_many([_user_key(pk) for pk in user_ids])
+    records = {pk: records[_user_key(pk)] for pk in user_ids if _user_key(pk) in records}
+
+    if records:
+        last_seen = [
+            When(user_id=pk, then=Value(record['last_seen']))
+            for pk, record in records.items()
+        ]
+        last_ip = [
+            When(user_id=pk, then=Value(record['last_ip']))
+            for pk, record in records.items()
+        ]
+        UserProfile.objects\
+            .filter(user_id__in=list(records.keys()))\
+            .update(
+                last_seen=Case(*last_seen, output_field=DateTimeField()),
+                last_ip=Case(*last_ip, output_field=GenericIPAddressField()))
+
+    # The current minute is scanned again next time
+    cache.set(FLUSHED_KEY, now_minute, timeout=None)
+    return len(records)
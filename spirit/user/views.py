@@ -143,7 +143,9 @@ def topics(request, pk, slug):
 def comments(request, pk, slug):
     user_comments = Comment.objects\
         .visible()\
-        .filter(user_id=pk)
+        .filter(user_id=pk)\
+        .for_listing()\
+        .select_related('topic')
 
     return _activity(
         request, pk, slug,
@@ -159,6 +161,8 @@ def likes(request, pk, slug):
     user_comments = Comment.objects\
         .visible()\
         .filter(comment_likes__user_id=pk)\
+        .for_listing()\
+        .select_related('topic')\
         .order_by('-comment_likes__date', '-pk')
 
     return _activity(